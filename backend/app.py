@@ -1,9 +1,15 @@
+import os
 from flask import Flask
 from flask_cors import CORS
 from routes.forecastRoutes import forecast_bp
 from routes.userRoutes import user_bp
-from config.db import init_app
+from config.db import init_app, ensure_indexes
 from controllers.userController import init_mail
+from services.heavyImports import PRELOAD_HEAVY_IMPORTS, preload_heavy_modules
+from services.emailQueue import start_email_workers
+from services.trainingJobs import training_jobs
+from services.reportJobs import report_jobs
+from middlewares.requestMetrics import init_metrics
 
 app = Flask(__name__)
 CORS(app)
@@ -11,10 +17,21 @@ CORS(app)
 # Initialize DB
 init_app(app)
 init_mail(app)
+init_metrics(app)
 
 app.register_blueprint(forecast_bp)
 # Register routes
 app.register_blueprint(user_bp, url_prefix='/api/users')
 
+if PRELOAD_HEAVY_IMPORTS:
+    preload_heavy_modules()
+
 if __name__ == "__main__":
+    # The development server runs the jobs itself; gunicorn starts scripts.runJobs.
+    # The debug reloader runs this file twice, and only its child serves requests
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        ensure_indexes()
+        training_jobs.start()
+        report_jobs.start()
+        start_email_workers()
     app.run(debug=True)
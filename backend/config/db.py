@@ -1,9 +1,52 @@
 from flask_pymongo import PyMongo
+from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError, OperationFailure
 from dotenv import load_dotenv
 import os
 
 mongo = PyMongo()
 
+# {collection: [(keys, options)]} created once per deploy by ensure_indexes (the
+# gunicorn master, the development server or scripts.ensureIndexes); creating
+# an existing index is a no-op
+INDEXES = {
+    "users": [
+        # register_user and login_user look users up by email
+        ([("email", ASCENDING)], {"unique": True}),
+    ],
+    "forecasts": [
+        # Keyset pages of the admin listing and of each user's history
+        ([("timestamp", ASCENDING), ("_id", ASCENDING)], {}),
+        # Per-user history, exports and counts; also the user grouping of /trends
+        ([("user_id", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)], {}),
+    ],
+    "report_jobs": [
+        # Reusing a pending PDF job for the same history version
+        ([("user_id", ASCENDING), ("version", ASCENDING), ("status", ASCENDING)], {}),
+        # Job runners claiming the oldest queued report and finding expired leases
+        ([("status", ASCENDING), ("submitted_at", ASCENDING)], {}),
+    ],
+    "email_outbox": [
+        # Email workers claiming the next due message
+        ([("status", ASCENDING), ("next_attempt_at", ASCENDING)], {}),
+    ],
+    "training_jobs": [
+        ([("submitted_at", DESCENDING)], {}),
+        # Job runners claiming the oldest queued job and finding expired leases
+        ([("status", ASCENDING), ("submitted_at", ASCENDING)], {}),
+    ],
+    "model_artifacts.files": [
+        # GridFS model store lookups of a site's artifact version
+        ([("metadata.site_id", ASCENDING), ("metadata.version", ASCENDING)], {}),
+    ],
+}
+
+# How long ensure_indexes waits for MongoDB before giving up, instead of the driver's 30s per call
+INDEX_SERVER_TIMEOUT_MS = int(os.getenv("INDEX_SERVER_TIMEOUT_MS", 5000))
+
+# Used by worker processes that never run init_app (training jobs, scripts)
+_standalone_client = None
+
 def init_app(app):
     load_dotenv()
     app.config["MONGO_URI"] = os.getenv("MONGO_URI")
@@ -12,3 +55,76 @@ def init_app(app):
         raise ValueError("MONGO_URI is not set in the environment variables.")
     
     mongo.init_app(app)
+
+def reconnect(app):
+    """Replace the clients a forked worker inherited; MongoClient is not fork-safe."""
+    global _standalone_client
+    _standalone_client = None
+    mongo.init_app(app)
+
+def find_duplicates(db, collection, keys, limit=20):
+    """Up to `limit` ({key: value}, count) groups of documents sharing the values of `keys`."""
+    pipeline = [
+        {"$group": {"_id": {key: f"${key}" for key, _ in keys}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$sort": {"count": -1}},
+        {"$limit": limit}
+    ]
+    return [(group["_id"], group["count"]) for group in db[collection].aggregate(pipeline, allowDiskUse=True)]
+
+def ensure_indexes(db=None):
+    """Create the declared indexes and return whether all of them exist.
+
+    Without `db` a short-lived client is used that gives up after
+    INDEX_SERVER_TIMEOUT_MS, so a database that is down costs one short wait
+    and a warning, not a blocked startup.
+    """
+    client = None
+    if db is None:
+        load_dotenv()
+        client = MongoClient(os.getenv("MONGO_URI"), serverSelectionTimeoutMS=INDEX_SERVER_TIMEOUT_MS)
+        db = client.get_default_database()
+
+    ok = True
+    try:
+        try:
+            db.client.admin.command("ping")
+        except PyMongoError as e:
+            print(f"Could not create indexes, MongoDB is unreachable: {str(e)}")
+            return False
+
+        for collection, indexes in INDEXES.items():
+            for keys, options in indexes:
+                try:
+                    db[collection].create_index(keys, **options)
+                except OperationFailure as e:
+                    ok = False
+                    if e.code != 11000:
+                        print(f"Could not create index {keys} on {collection}: {str(e)}")
+                        continue
+                    # Unique index over existing duplicates: name them so they can be merged by hand
+                    fields = ", ".join(key for key, _ in keys)
+                    print(f"Could not create unique index on {collection} ({fields}); duplicated values:")
+                    for values, count in find_duplicates(db, collection, keys):
+                        print(f"  {values} x{count}")
+                except PyMongoError as e:
+                    ok = False
+                    print(f"Could not create index {keys} on {collection}: {str(e)}")
+    finally:
+        if client is not None:
+            client.close()
+    return ok
+
+def get_db():
+    """Return the app database, connecting directly when running outside the Flask app."""
+    global _standalone_client
+    if mongo.db is not None:
+        return mongo.db
+
+    if _standalone_client is None:
+        load_dotenv()
+        uri = os.getenv("MONGO_URI")
+        if not uri:
+            raise ValueError("MONGO_URI is not set in the environment variables.")
+        _standalone_client = MongoClient(uri)
+    return _standalone_client.get_default_database()
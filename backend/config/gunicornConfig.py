@@ -0,0 +1,97 @@
+"""gunicorn settings for the pre-fork production server (see wsgi.py).
+
+Workers and threads come from WEB_WORKERS / WEB_THREADS. When a preloaded
+site gets a new model, the master loads and warms it, then replaces its
+workers gracefully: new ones are forked with the new model while the old ones
+finish their requests. MODEL_RELOAD_CHECK_SECONDS=0 turns that off; workers
+then load new versions on their own, each into private memory.
+
+Training and report jobs run in a scripts.runJobs process that the master
+starts and restarts (JOB_RUNNER=false when a runner is deployed elsewhere),
+so replacing the workers never interrupts them. Its handle is kept in
+services.jobRunnerProcess, since each reload re-executes this file.
+
+Memory per worker is measured with scripts/measureWorkerMemory.py once the
+server has taken some traffic: RSS counts the shared pages in every worker,
+PSS and private dirty memory are what each worker really costs. Run it again
+with WEB_PRELOAD=false to see what preloading saves on a given model. With 4
+gthread workers, the slim SARIMAX model and no job runner, after 200
+/predict_forecast requests each (1 vCPU / 5 GiB VM, MiB):
+
+                       total RSS   total PSS   private dirty per worker
+    WEB_PRELOAD=true       950.9       382.1                       37.4
+    WEB_PRELOAD=false      990.2       659.3                      124.1
+"""
+import gc
+import os
+import signal
+import multiprocessing
+
+bind = os.getenv("WEB_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.getenv("WEB_THREADS", 4))
+worker_class = "gthread"
+timeout = int(os.getenv("WEB_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", 60))
+# Load the app and models once in the master (wsgi.py) instead of in every worker
+preload_app = os.getenv("WEB_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+MODEL_RELOAD_CHECK_SECONDS = float(os.getenv("MODEL_RELOAD_CHECK_SECONDS", 30))
+# The master runs scripts.runJobs beside the workers; turn off when a runner is deployed separately
+JOB_RUNNER = os.getenv("JOB_RUNNER", "true").lower() in ("1", "true", "yes")
+
+def on_starting(server):
+    from services.metrics import METRICS_DIR
+
+    # Counts of a previous run would be added to this one's
+    if METRICS_DIR and os.path.isdir(METRICS_DIR):
+        for filename in os.listdir(METRICS_DIR):
+            os.remove(os.path.join(METRICS_DIR, filename))
+
+def when_ready(server):
+    from config.db import ensure_indexes
+    from services.jobRunnerProcess import start_job_runner
+    from services.serverWarmup import watch_model_versions
+
+    # Once per deploy, in the master, rather than in every worker
+    ensure_indexes()
+    if JOB_RUNNER:
+        start_job_runner(server.log)
+
+    if MODEL_RELOAD_CHECK_SECONDS > 0:
+        def request_reload(sites):
+            server.log.info("New model for %s, reloading workers", ", ".join(sites))
+            # Handled by the arbiter's main loop, which calls on_reload below
+            os.kill(os.getpid(), signal.SIGHUP)
+
+        watch_model_versions(request_reload, MODEL_RELOAD_CHECK_SECONDS)
+
+def on_reload(server):
+    from services.serverWarmup import preload_models
+
+    # Runs in the master before the new workers are forked
+    gc.unfreeze()
+    preload_models()
+    gc.collect()
+    gc.freeze()
+
+def on_exit(server):
+    from services.jobRunnerProcess import stop_job_runner
+
+    stop_job_runner()
+
+def post_fork(server, worker):
+    from config.db import reconnect
+    from wsgi import app
+
+    reconnect(app)
+
+def post_worker_init(worker):
+    from services.emailQueue import start_email_workers
+    from services.metrics import start_snapshot_writer
+    from services.serverWarmup import warm_worker
+
+    warm_worker()
+    # Threads only start after the fork; each worker also sends retries and mail queued elsewhere
+    start_email_workers()
+    start_snapshot_writer()
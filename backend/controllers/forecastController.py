@@ -1,20 +1,33 @@
-from flask import Blueprint, request, jsonify, g, Response, make_response
+from flask import Blueprint, request, jsonify, g, Response, send_file
 import pandas as pd
 import numpy as np
-from statsmodels.tsa.statespace.sarimax import SARIMAX
-from sklearn.preprocessing import MinMaxScaler
-from models.forecastModel import save_model, load_model
+from models.forecastModel import load_model, get_model_bundle, get_model_cache_stats, list_model_sites, validate_site_id
+from services.sarimaxTrainer import missing_columns, parse_training_options, FEATURE_COLUMNS
+from models.seasonality import add_model_regressors
+from services.siteTraining import SITE_COLUMN, SITE_TRAINING_WORKERS, MAX_SITE_TRAINING_WORKERS
+from services.scenarioForecast import encode_features, parse_scenarios, forecast_scenarios, summarize_scenarios
+from services.forecastResponse import iso_timestamps, build_forecast_data
+from models.forecastDocument import compact_series
+from services.forecastTrends import trends_summary, list_trend_forecasts
+from services.forecastHistory import parse_history_args, list_user_forecasts, parse_time
+from services.forecastExport import (
+    export_filter, export_cursor, stream_csv, export_columnar, record_export,
+    EXPORT_BATCH_SIZE, EXPORT_DIR, EXPORT_FORMATS
+)
+from services.forecastRollups import record_forecasts, global_summary, user_summary
+from pymongo.errors import PyMongoError
+from services.forecastCache import forecast_cache, forecast_key
+from services.userCache import get_user_names
+from services.metrics import span, timed_stream
+from services.trainingJobs import save_upload, submit_training_job, get_job, list_jobs
+from services.forecastReport import history_version, report_path
+from services.reportJobs import submit_report_job, get_report_job
 from config.db import mongo
 from bson import ObjectId
 import datetime
-import io
-import csv
+import os
+import tempfile
 from middlewares.authMiddleware import token_required
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-import matplotlib.pyplot as plt
-from reportlab.pdfgen import canvas
-from matplotlib.backends.backend_pdf import FigureCanvasPdf
 
 forecast_bp = Blueprint('forecast', __name__)
 
@@ -26,81 +39,119 @@ def train_sarimax():
     if "file" not in request.files:
         return jsonify({"error": "No file uploaded"}), 400
 
+    # "full" retrains from scratch, "append" extends the saved model with newer rows,
+    # "multisite" trains one model per site found in the upload's site column
+    mode = request.form.get("mode", "full")
+    if mode not in ("full", "append", "multisite"):
+        return jsonify({"error": "mode must be 'full', 'append' or 'multisite'"}), 400
+    site_column = request.form.get("site_column", SITE_COLUMN)
+    # Each worker is a process fitting a whole model; never more than the host is configured for
+    workers = max(1, min(request.form.get("workers", SITE_TRAINING_WORKERS, type=int), MAX_SITE_TRAINING_WORKERS))
+    refit = request.form.get("refit", "false").lower() in ("1", "true", "yes")
+
+    # Resampling and seasonality are fixed at full training; appends reuse the model's settings
+    try:
+        site_id = validate_site_id(request.form.get("site_id"))
+        options = parse_training_options(request.form)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     file = request.files["file"]
+    csv_path = save_upload(file)
     try:
-        df = pd.read_csv(file)
+        # Only the header is read here; the full file is parsed by the training worker
+        columns = pd.read_csv(csv_path, nrows=0).columns
     except Exception as e:
+        os.remove(csv_path)
         return jsonify({"error": f"Error reading file: {str(e)}"}), 400
 
-    required_columns = [
-        "Timestamp", "Temperature", "Humidity", "SquareFootage", "Occupancy",
-        "HVACUsage", "LightingUsage", "RenewableEnergy", "DayOfWeek",
-        "Holiday", "EnergyConsumption"
-    ]
-    
-    if not all(col in df.columns for col in required_columns):
+    if missing_columns(columns):
+        os.remove(csv_path)
         return jsonify({"error": "CSV must contain required energy forecasting columns"}), 400
 
-    # Convert timestamp and sort by date
-    df["Timestamp"] = pd.to_datetime(df["Timestamp"])
-    df.set_index("Timestamp", inplace=True)
-    df = df.sort_index()
+    if mode == "multisite" and site_column not in columns:
+        os.remove(csv_path)
+        return jsonify({"error": f"CSV must contain the site column '{site_column}'"}), 400
 
-    # Convert categorical values to numerical
-    df["HVACUsage"] = df["HVACUsage"].map({"On": 1, "Off": 0})
-    df["LightingUsage"] = df["LightingUsage"].map({"On": 1, "Off": 0})
-    df["Holiday"] = df["Holiday"].map({"Yes": 1, "No": 0})
+    if mode == "multisite":
+        job_id = submit_training_job(csv_path, g.user_id, filename=file.filename, mode=mode,
+                                     args=(options, site_column, workers))
+    elif mode == "append":
+        job_id = submit_training_job(csv_path, g.user_id, filename=file.filename, mode=mode, site_id=site_id,
+                                     args=(refit, site_id))
+    else:
+        job_id = submit_training_job(csv_path, g.user_id, filename=file.filename, mode=mode, site_id=site_id,
+                                     args=(options, site_id))
 
-    # Ensure consistent DayOfWeek mapping
-    day_mapping = {
-        "Sunday": 0, "Monday": 1, "Tuesday": 2, "Wednesday": 3,
-        "Thursday": 4, "Friday": 5, "Saturday": 6
-    }
-    df["DayOfWeek"] = df["DayOfWeek"].map(day_mapping).fillna(0).astype(int)
-
-    # Normalize DayOfWeek to 0-1 scale
-    df["DayOfWeek"] = df["DayOfWeek"] / 6.0  
-
-    # Scale features using MinMaxScaler
-    feature_columns = [
-        "Temperature", "Humidity", "SquareFootage", "Occupancy",
-        "HVACUsage", "LightingUsage", "RenewableEnergy", "DayOfWeek", "Holiday"
-    ]
-    scaler = MinMaxScaler()
-    df[feature_columns] = scaler.fit_transform(df[feature_columns])
-
-    # Scale target variable
-    energy_scaler = MinMaxScaler()
-    df["EnergyConsumption"] = energy_scaler.fit_transform(df[["EnergyConsumption"]])
-
-    # Train SARIMAX Model
-    model = SARIMAX(
-        df["EnergyConsumption"], 
-        exog=df[feature_columns],  
-        order=(5,1,0),            
-        seasonal_order=(1,1,1,24) 
-    )
-    
-    fitted_model = model.fit()
-
-    # Save the trained model and scalers
-    save_model(fitted_model, energy_scaler, scaler)
-
-    return jsonify({"message": "SARIMAX model trained successfully."})
+    return jsonify({"message": "SARIMAX training job queued.", "job_id": job_id}), 202
+
+@token_required
+def get_training_job(job_id):
+    if g.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    if not ObjectId.is_valid(job_id):
+        return jsonify({"error": "Invalid job id"}), 400
+
+    job = get_job(job_id)
+    if not job:
+        return jsonify({"error": "Training job not found"}), 404
+
+    return jsonify(job)
+
+@token_required
+def list_training_jobs():
+    if g.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    limit = min(request.args.get("limit", 20, type=int), 100)
+    return jsonify({"jobs": list_jobs(limit)})
+
+@token_required
+def model_cache_stats():
+    if g.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    return jsonify(get_model_cache_stats())
+
+@token_required
+def forecast_cache_stats():
+    if g.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    return jsonify(forecast_cache.snapshot())
+
+@token_required
+def list_sites():
+    if g.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    return jsonify({"sites": list_model_sites()})
+
+def update_rollups(forecast_entries):
+    """Fold saved forecasts into the dashboard rollups without failing the request."""
+    try:
+        record_forecasts(forecast_entries)
+    except PyMongoError as e:
+        # The forecast is stored; scripts.rebuildRollups repairs the drift
+        print(f"Error updating forecast rollups: {str(e)}")
 
 @token_required 
 def predict_forecast():
-    model, energy_scaler, feature_scaler = load_model()
-    if model is None:
-        return jsonify({"error": "No trained model found."}), 400
-
     try:
         data = request.get_json()
         future_timestamps = data.get("timestamps", [])
         feature_inputs = data.get("features", [])
+        site_id = validate_site_id(data.get("site_id"))
     except Exception as e:
         return jsonify({"error": f"Invalid input: {str(e)}"}), 400
 
+    with span("model_load"):
+        bundle = get_model_bundle(site_id)
+    if bundle is None:
+        return jsonify({"error": "No trained model found."}), 400
+    model, energy_scaler, feature_scaler = bundle.model, bundle.energy_scaler, bundle.feature_scaler
+
     if not future_timestamps or not feature_inputs or len(future_timestamps) != len(feature_inputs):
         return jsonify({"error": "Provide matching timestamps and feature values."}), 400
 
@@ -113,291 +164,286 @@ def predict_forecast():
     if not all(col in feature_df.columns for col in required_features):
         return jsonify({"error": f"Missing required feature columns: {required_features}"}), 400
 
-    # Convert categorical values to numerical
-    feature_df["HVACUsage"] = feature_df["HVACUsage"].astype(int)
-    feature_df["LightingUsage"] = feature_df["LightingUsage"].astype(int)
-    feature_df["Holiday"] = feature_df["Holiday"].map({"Yes": 1, "No": 0}).fillna(0).astype(int)
+    # Convert categorical values to numerical and normalize DayOfWeek
+    feature_df = encode_features(feature_df)
+
+    # Identical requests against the same model version reuse the cached result
+    cache_key = forecast_key(site_id, bundle.version, future_dates, feature_df[required_features])
+    cached, generation = forecast_cache.get(cache_key, site_id)
+    if cached is not None:
+        forecast, energy_savings, peak_load, contributions = cached
+    else:
+        # Scale the features
+        feature_df_scaled = feature_scaler.transform(feature_df[required_features])
+
+        # Generate forecast for the periods following the training data
+        with span("predict"):
+            model_exog = add_model_regressors(getattr(model, "spec", None), future_dates, feature_df_scaled)
+            forecast = model.forecast(steps=len(future_dates), exog=model_exog)
+        forecast = energy_scaler.inverse_transform(np.array(forecast).reshape(-1, 1)).flatten()
+        forecast = np.maximum(forecast, 0)
+
+        avg_renewable_energy = np.mean(feature_df["RenewableEnergy"])
+        energy_savings = forecast * (avg_renewable_energy / 100)
+        peak_load = forecast.max()
+
+        # Estimate feature contributions (Fixed Negative Issue)
+        with span("contributions"):
+            feature_sums = np.abs(feature_df_scaled).sum(axis=1)[:, None]
+            contributions = np.abs(feature_df_scaled) * (forecast[:, None] / feature_sums)
+        forecast_cache.put(cache_key, site_id, (forecast, energy_savings, peak_load, contributions), generation)
 
-    # Normalize DayOfWeek to 0-1 scale
-    feature_df["DayOfWeek"] = feature_df["DayOfWeek"] / 6.0  
-
-    # Scale the features
-    feature_df_scaled = feature_scaler.transform(feature_df[required_features])
-
-    # Generate forecast
-    forecast = model.predict(start=len(feature_df), end=len(feature_df) + len(future_dates) - 1, exog=feature_df_scaled)
-    forecast = energy_scaler.inverse_transform(np.array(forecast).reshape(-1, 1)).flatten()
-    forecast = np.maximum(forecast, 0)
+    # Fetch user details
+    with span("user_lookup"):
+        first_name, last_name = get_user_names(g.user_id)
+
+    # Save forecast details in the compact layout; the response keeps the per-entry shape
+    with span("build_records"):
+        timestamps = iso_timestamps(future_dates)
+        forecast_entry = {
+            "user_id": ObjectId(g.user_id),
+            "site_id": site_id,
+            "first_name": first_name,
+            "last_name": last_name,
+            "timestamp": datetime.datetime.now(),
+            "series": compact_series(timestamps, forecast, energy_savings, peak_load, contributions, required_features)
+        }
+        forecast_data = build_forecast_data(timestamps, forecast, energy_savings, peak_load, contributions, required_features)
+
+    with span("mongo_insert"):
+        mongo.db.forecasts.insert_one(forecast_entry)
+    with span("rollups"):
+        update_rollups([forecast_entry])
+    with span("serialize"):
+        return jsonify({
+            "forecast_data": forecast_data,
+            "peak_load": forecast_data[0]["peak_load"],
+            "first_name": first_name,
+            "last_name": last_name
+        })
 
-    avg_renewable_energy = np.mean(feature_df["RenewableEnergy"])
-    energy_savings = forecast * (avg_renewable_energy / 100)
-    peak_load = max(forecast)
+@token_required
+def predict_forecast_batch():
+    try:
+        data = request.get_json()
+        future_timestamps = data.get("timestamps", [])
+        site_id = validate_site_id(data.get("site_id"))
+        scenarios = parse_scenarios(data, len(future_timestamps))
+    except Exception as e:
+        return jsonify({"error": f"Invalid input: {str(e)}"}), 400
 
-    # Estimate feature contributions (Fixed Negative Issue)
-    feature_sums = np.abs(feature_df_scaled).sum(axis=1)[:, None]
-    contributions = np.abs(feature_df_scaled) * (forecast[:, None] / feature_sums)
-    contributions = pd.DataFrame(contributions, columns=required_features)
+    if not future_timestamps:
+        return jsonify({"error": "Provide the timestamps to forecast."}), 400
 
-    # Fetch user details
-    user = mongo.db.users.find_one({"_id": ObjectId(g.user_id)}, {"first_name": 1, "last_name": 1})
-    first_name = user.get("first_name", "Unknown") if user else "Unknown"
-    last_name = user.get("last_name", "Unknown") if user else "Unknown"
+    # One model lookup for the whole batch
+    with span("model_load"):
+        model, energy_scaler, feature_scaler = load_model(site_id)
+    if model is None:
+        return jsonify({"error": "No trained model found."}), 400
 
-    # Save forecast details
-    forecast_entry = {
-        "user_id": ObjectId(g.user_id),
+    future_dates = pd.to_datetime(future_timestamps)
+    names = [name for name, _ in scenarios]
+    try:
+        with span("predict"):
+            forecast, energy_savings, peak_load, contributions = forecast_scenarios(
+                model, energy_scaler, feature_scaler, future_dates, [features for _, features in scenarios]
+            )
+    except (KeyError, ValueError, TypeError) as e:
+        return jsonify({"error": f"Invalid scenario features: {str(e)}"}), 400
+
+    # Fetch user details once for every scenario
+    with span("user_lookup"):
+        first_name, last_name = get_user_names(g.user_id)
+
+    batch_id = ObjectId()
+    created_at = datetime.datetime.now()
+    timestamps = iso_timestamps(future_dates)
+    forecast_entries = []
+    for s, name in enumerate(names):
+        forecast_entries.append({
+            "user_id": ObjectId(g.user_id),
+            "site_id": site_id,
+            "batch_id": batch_id,
+            "scenario": name,
+            "first_name": first_name,
+            "last_name": last_name,
+            "timestamp": created_at,
+            "series": compact_series(
+                timestamps, forecast[s], energy_savings[s], peak_load[s], contributions[s], FEATURE_COLUMNS
+            )
+        })
+
+    # A single round trip stores every scenario
+    with span("mongo_insert"):
+        mongo.db.forecasts.insert_many(forecast_entries, ordered=False)
+    with span("rollups"):
+        update_rollups(forecast_entries)
+
+    response = {
+        "batch_id": str(batch_id),
         "first_name": first_name,
         "last_name": last_name,
-        "timestamp": datetime.datetime.now(),
-        "forecast_data": [
+        "scenarios": [
             {
-                "timestamp": ts.isoformat(),
-                "forecast_energy": round(energy, 2),
-                "energy_savings": round(savings, 2),
-                "peak_load": round(peak_load, 2),
-                "feature_contributions": {feat: round(contributions.iloc[i][feat], 2) for feat in required_features}
+                "name": entry["scenario"],
+                "peak_load": round(float(peak_load[s]), 2),
+                "forecast_data": build_forecast_data(
+                    timestamps, forecast[s], energy_savings[s], peak_load[s], contributions[s], FEATURE_COLUMNS
+                )
             }
-            for i, (ts, energy, savings) in enumerate(zip(future_dates, forecast, energy_savings))
+            for s, entry in enumerate(forecast_entries)
         ]
     }
+    if data.get("summary"):
+        response["summary"] = summarize_scenarios(names, forecast, energy_savings, peak_load)
 
-    mongo.db.forecasts.insert_one(forecast_entry)
-    return jsonify({
-        "forecast_data": forecast_entry["forecast_data"],
-        "peak_load": forecast_entry["forecast_data"][0]["peak_load"],
-        "first_name": first_name,
-        "last_name": last_name
-    })
+    with span("serialize"):
+        return jsonify(response)
 
 @token_required
 def get_forecast_trends():
     if g.role != "admin":
         return jsonify({"error": "Unauthorized"}), 403
 
-    # Fetch all forecast records (including new ones)
-    forecasts = list(mongo.db.forecasts.find({}, {
-        "_id": 1, "user_id": 1, "timestamp": 1, "forecast_data": 1
-    }))
-
-    # Fetch total users count
-    total_users = mongo.db.users.count_documents({})
-    
-    # Get unique users who made forecasts
-    unique_user_ids = set(forecast["user_id"] for forecast in forecasts)
-    total_users_forecasting = len(unique_user_ids)
-
-    # Fetch user details for each unique user_id
-    user_details = {str(user["_id"]): user for user in mongo.db.users.find({}, {"_id": 1, "first_name": 1, "last_name": 1})}
-
-    # Initialize summary metrics
-    total_energy = 0
-    total_energy_savings = 0
-    peak_loads = []
-    all_features = {  
-        "Temperature": 0, "Humidity": 0, "SquareFootage": 0, "Occupancy": 0,
-        "HVACUsage": 0, "LightingUsage": 0, "RenewableEnergy": 0, "DayOfWeek": 0, "Holiday": 0
-    }
-    total_entries = 0
-
-    for forecast in forecasts:
-        forecast["_id"] = str(forecast["_id"])
-        forecast["user_id"] = str(forecast["user_id"])
-        forecast["timestamp"] = forecast.get("timestamp", datetime.datetime.now()).isoformat()
-
-        # Attach user details if available
-        user_info = user_details.get(forecast["user_id"], {})
-        forecast["first_name"] = user_info.get("first_name", "Unknown")
-        forecast["last_name"] = user_info.get("last_name", "Unknown")
-
-        # Compute total forecasted energy and energy savings
-        total_forecast_energy = sum(entry["forecast_energy"] for entry in forecast.get("forecast_data", []))
-        total_energy_savings_entry = sum(entry["energy_savings"] for entry in forecast.get("forecast_data", []))
-        peak_load = max(entry["forecast_energy"] for entry in forecast.get("forecast_data", [])) if forecast.get("forecast_data") else 0
-
-        # Aggregate values
-        total_energy += total_forecast_energy
-        total_energy_savings += total_energy_savings_entry
-        peak_loads.append(peak_load)
-
-        # Summing up feature data for trend analysis
-        for entry in forecast.get("forecast_data", []):
-            features = entry.get("feature_contributions", {})
-            for key in all_features:
-                all_features[key] += features.get(key, 0)
-            total_entries += 1
-
-        # Update forecast object
-        forecast["total_forecast_energy"] = round(total_forecast_energy, 2)
-        forecast["total_energy_savings"] = round(total_energy_savings_entry, 2)
-        forecast["peak_load"] = round(peak_load, 2)
-
-    # Compute averages for features
-    avg_features = {
-        key: round(value / total_entries, 2) if total_entries else 0 for key, value in all_features.items()
-    }
-    average_peak_load = round(np.mean(peak_loads), 2) if peak_loads else 0
-
-    return jsonify({
-        "forecasts": forecasts,
-        "total_forecasts": len(forecasts),
-        "total_energy": round(total_energy, 2),
-        "total_energy_savings": round(total_energy_savings, 2),
-        "average_peak_load": average_peak_load,
-        "average_features": avg_features,
-        "total_users": total_users,
-        "total_users_forecasting": total_users_forecasting
-    })
+    include_forecasts = request.args.get("include_forecasts", "true").lower() in ("1", "true", "yes")
+    try:
+        # Newest first: the admin pages show the most recent forecasts
+        params = parse_history_args(request.args, default_order="desc")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Totals, averages and forecaster counts come from the global rollup, or
+    # from an aggregation over raw history until the rollups have been built
+    with span("trends_summary"):
+        trends = global_summary() or trends_summary()
+        trends["total_users"] = mongo.db.users.estimated_document_count()
+
+    # The per-forecast listing is optional and served one keyset page at a time
+    if include_forecasts:
+        with span("mongo_listing"):
+            trends["forecasts"], trends["next_cursor"] = list_trend_forecasts(params)
+        trends["page_size"] = params["page_size"]
+
+    with span("serialize"):
+        return jsonify(trends)
 
 @token_required
 def get_user_forecast():
     user_id = ObjectId(g.user_id)
 
-    # Fetch all user forecasts
-    forecasts = list(mongo.db.forecasts.find({"user_id": user_id}, {"_id": 0, "timestamp": 1, "forecast_data": 1}))
-
-    if not forecasts:
+    # All-time trend analysis is read from the user's rollup
+    with span("user_summary"):
+        summary = user_summary(user_id)
+    if summary is None:
         return jsonify({"message": "No forecasts found for the user."}), 404
 
-    # Initialize trend analysis
-    total_energy = 0
-    total_savings = 0
-    peak_loads = []
-    forecast_count = len(forecasts)
-    energy_by_weekday = {i: [] for i in range(7)}  # Store values for averaging
+    # The raw forecasts are only sent when asked for, one keyset page at a time
+    if request.args.get("include_forecasts", "false").lower() in ("1", "true", "yes"):
+        try:
+            params = parse_history_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        with span("mongo_listing"):
+            summary["forecasts"], summary["next_cursor"] = list_user_forecasts(user_id, params)
+        summary["page_size"] = params["page_size"]
 
-    factor_sums = { 
-        "Temperature": 0, "Humidity": 0, "SquareFootage": 0, "Occupancy": 0,
-        "HVACUsage": 0, "LightingUsage": 0, "RenewableEnergy": 0, "Holiday": 0
-    }
-    factor_counts = {key: 0 for key in factor_sums}  # To calculate averages
-
-    for forecast in forecasts:
-        # Ensure timestamp is in ISO format
-        forecast["timestamp"] = forecast["timestamp"].isoformat() if isinstance(forecast["timestamp"], datetime.datetime) else str(forecast["timestamp"])
-
-        for entry in forecast.get("forecast_data", []):
-            forecast_energy = entry.get("forecast_energy", 0)
-            energy_savings = entry.get("energy_savings", 0)
-            peak_load = entry.get("peak_load", 0)
-
-            total_energy += forecast_energy
-            total_savings += energy_savings
-            peak_loads.append(peak_load)
-
-            # Extract weekday trends
-            timestamp = entry.get("timestamp")
-            if timestamp:
-                try:
-                    weekday = datetime.datetime.fromisoformat(timestamp).weekday()
-                    energy_by_weekday[weekday].append(forecast_energy)
-                except ValueError:
-                    pass  # Skip invalid timestamps
-
-            # Aggregate feature contributions safely
-            for key in factor_sums:
-                if "feature_contributions" in entry and key in entry["feature_contributions"]:
-                    factor_sums[key] += entry["feature_contributions"][key]
-                    factor_counts[key] += 1
-
-    # Compute averages safely
-    avg_peak_load = round(np.mean(peak_loads), 2) if peak_loads else 0
-    min_peak_load = round(min(peak_loads), 2) if peak_loads else 0
-    max_peak_load = round(max(peak_loads), 2) if peak_loads else 0
-    avg_factors = {key: round(factor_sums[key] / factor_counts[key], 2) if factor_counts[key] > 0 else 0 for key in factor_sums}
-    avg_energy_by_weekday = {k: round(np.mean(v), 2) if v else 0 for k, v in energy_by_weekday.items()}
-
-    return jsonify({
-        "total_forecasts": forecast_count,
-        "total_energy": round(total_energy, 2),
-        "total_savings": round(total_savings, 2),
-        "avg_peak_load": avg_peak_load,
-        "min_peak_load": min_peak_load,
-        "max_peak_load": max_peak_load,
-        "avg_factors": avg_factors,
-        "energy_by_weekday": avg_energy_by_weekday,
-        "forecasts": forecasts
-    })
+    with span("serialize"):
+        return jsonify(summary)
 
 @token_required
 def download_forecast_csv():
     try:
         user_id = ObjectId(g.user_id)
+        start = parse_time(request.args["from"]) if request.args.get("from") else None
+        end = parse_time(request.args["to"]) if request.args.get("to") else None
+    except ValueError:
+        return jsonify({"message": "from and to must be ISO-8601 timestamps"}), 400
+    compress = request.args.get("gzip", "false").lower() in ("1", "true", "yes")
 
-        # Fetch all user forecasts
-        forecasts = list(mongo.db.forecasts.find({"user_id": user_id}, {"_id": 0, "timestamp": 1, "forecast_data": 1}))
-
-        if not forecasts:
+    try:
+        query = export_filter(user_id, start, end)
+        with span("mongo_find"):
+            found = mongo.db.forecasts.find_one(query, {"_id": 1})
+        if not found:
             return jsonify({"message": "No forecasts found for the user."}), 404
 
-        # Prepare CSV data
-        csv_output = io.StringIO()
-        csv_writer = csv.writer(csv_output)
-
-        # Add header
-        csv_writer.writerow(["Timestamp", "Forecast Energy", "Energy Savings", "Peak Load", "Feature Contributions"])
+        # Rows are written while the cursor is read, a batch of forecasts at a time
+        batch_size = max(1, min(request.args.get("batch_size", EXPORT_BATCH_SIZE, type=int), 1000))
+        chunks = timed_stream("csv_render", stream_csv(export_cursor(query, batch_size), compress=compress))
 
-        for forecast in forecasts:
-            for entry in forecast.get("forecast_data", []):
-                timestamp = entry.get("timestamp")
-                forecast_energy = entry.get("forecast_energy", 0)
-                energy_savings = entry.get("energy_savings", 0)
-                peak_load = entry.get("peak_load", 0)
-                feature_contributions = ", ".join([f"{key}: {value}" for key, value in entry.get("feature_contributions", {}).items()])
+        filename = "forecast_data.csv.gz" if compress else "forecast_data.csv"
+        return Response(chunks, mimetype="application/gzip" if compress else "text/csv",
+                        headers={"Content-Disposition": f"attachment;filename={filename}"})
+    except Exception as e:
+        print(f"Error in download_forecast_csv: {str(e)}")  # Log the error
+        return jsonify({"message": f"An error occurred: {str(e)}"}), 500
 
-                csv_writer.writerow([timestamp, forecast_energy, energy_savings, peak_load, feature_contributions])
+@token_required
+def bulk_export_forecasts():
+    if g.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
 
-        # Make the StringIO object seekable
-        csv_output.seek(0)
+    fmt = request.args.get("format", "parquet")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {sorted(EXPORT_FORMATS)}"}), 400
 
-        # Send the file as response
-        return Response(csv_output.getvalue(), mimetype="text/csv", headers={"Content-Disposition": "attachment;filename=forecast_data.csv"})
+    try:
+        user_id = ObjectId(request.args["user_id"]) if request.args.get("user_id") else None
+        start = parse_time(request.args["from"]) if request.args.get("from") else None
+        end = parse_time(request.args["to"]) if request.args.get("to") else None
+    except Exception:
+        return jsonify({"error": "Invalid user_id, from or to"}), 400
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=EXPORT_FORMATS[fmt], dir=EXPORT_DIR)
+    os.close(fd)
+    try:
+        with span("export_render"):
+            stats = export_columnar(path, fmt, user_id, start, end)
     except Exception as e:
-        print(f"Error in download_forecast_csv: {str(e)}")  # Log the error
-        return jsonify({"message": f"An error occurred: {str(e)}"}), 500
+        os.remove(path)
+        print(f"Error in bulk_export_forecasts: {str(e)}")  # Log the error
+        return jsonify({"error": f"Export failed: {str(e)}"}), 500
+    record_export(stats, requested_by=g.user_id)
+
+    response = send_file(path, mimetype="application/octet-stream", as_attachment=True,
+                         download_name=f"forecasts{EXPORT_FORMATS[fmt]}")
+    response.headers["X-Export-Rows"] = str(stats["rows"])
+    response.headers["X-Export-Seconds"] = str(stats["seconds"])
+    # The file is only needed until it has been sent
+    response.call_on_close(lambda: os.path.exists(path) and os.remove(path))
+    return response
 
 @token_required
 def download_forecast_pdf():
     user_id = ObjectId(g.user_id)
 
-    # Fetch all user forecasts
-    forecasts = list(mongo.db.forecasts.find({"user_id": user_id}, {"_id": 0, "timestamp": 1, "forecast_data": 1}))
-
-    if not forecasts:
+    with span("history_version"):
+        version = history_version(user_id)
+    if version is None:
         return jsonify({"message": "No forecasts found for the user."}), 404
 
-    # Create PDF document
-    pdf_output = io.BytesIO()
-    c = canvas.Canvas(pdf_output, pagesize=letter)
-
-    # Set font and styles
-    c.setFont("Helvetica", 10)
-
-    # Add some title
-    c.drawString(100, 750, "Forecast Data")
-    c.drawString(100, 730, f"User ID: {str(user_id)}")
-
-    y_position = 710
-    for forecast in forecasts:
-        c.drawString(100, y_position, f"Timestamp: {forecast['timestamp']}")
-        y_position -= 20
-
-        for entry in forecast.get("forecast_data", []):
-            c.drawString(100, y_position, f"Forecast Energy: {entry.get('forecast_energy')}")
-            c.drawString(100, y_position - 15, f"Energy Savings: {entry.get('energy_savings')}")
-            c.drawString(100, y_position - 30, f"Peak Load: {entry.get('peak_load')}")
-            c.drawString(100, y_position - 45, f"Feature Contributions: {entry.get('feature_contributions')}")
-            y_position -= 60
-
-            if y_position < 100:  # Handle page overflow
-                c.showPage()
-                y_position = 750
-
-    # Save the PDF
-    c.save()
-
-    # Send the PDF file as response
-    pdf_output.seek(0)
-    response = make_response(pdf_output.read())
-    response.headers["Content-Type"] = "application/pdf"
-    response.headers["Content-Disposition"] = "attachment;filename=forecast_data.pdf"
-    return response
+    # A report of this exact history is served straight from the cache
+    path = report_path(user_id, version)
+    if os.path.exists(path):
+        return send_file(path, mimetype="application/pdf", as_attachment=True, download_name="forecast_data.pdf")
+
+    job_id = submit_report_job(user_id, version)
+    return jsonify({
+        "message": "PDF report is being generated.",
+        "job_id": job_id,
+        "status_url": f"/download/pdf/jobs/{job_id}"
+    }), 202
+
+@token_required
+def get_pdf_report_job(job_id):
+    if not ObjectId.is_valid(job_id):
+        return jsonify({"error": "Invalid job id"}), 400
+
+    job = get_report_job(job_id)
+    if not job or (job["user_id"] != g.user_id and g.role != "admin"):
+        return jsonify({"error": "Report job not found"}), 404
+
+    if job["status"] == "done":
+        job["download_url"] = "/download/pdf"
+    return jsonify(job)
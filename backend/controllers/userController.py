@@ -6,9 +6,11 @@ from werkzeug.security import check_password_hash
 from config.db import mongo
 from models.userModel import get_user_schema
 from dotenv import load_dotenv
-from middlewares.authMiddleware import token_required
+from middlewares.authMiddleware import token_required, token_cache
+from services.userCache import get_user_doc, invalidate_user, user_cache
 from bson import ObjectId
-from flask_mail import Mail, Message
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from services.emailQueue import mail, init_email_queue, enqueue_email
 
 # Load environment variables
 load_dotenv("./config/.env")
@@ -23,8 +25,6 @@ MAIL_USE_TLS = os.getenv("MAIL_USE_TLS", "True") == "True"
 MAIL_USE_SSL = os.getenv("MAIL_USE_SSL", "False") == "True"
 MAIL_FROM = os.getenv("MAIL_FROM")
 
-mail = Mail()
-
 def init_mail(app):
     """Initialize Flask-Mail with app"""
     app.config.update(
@@ -36,6 +36,7 @@ def init_mail(app):
         MAIL_USE_SSL=MAIL_USE_SSL,
     )
     mail.init_app(app)
+    init_email_queue(app)
 
 def generate_jwt(user_id,role,expires_in=JWT_EXPIRATION_MINUTES):
     """Generate JWT token"""
@@ -51,12 +52,7 @@ def send_verification_email(email, user_id):
     verification_url = url_for("user_bp.verify_email", token=token, _external=True)
 
     # Email content with HTML formatting
-    msg = Message(
-        "Verify Your Email",
-        sender=MAIL_FROM,
-        recipients=[email]
-    )
-    msg.html = f"""
+    html = f"""
     <html>
     <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
         <h2 style="color: #2c3e50;">Welcome to EnerGauge!</h2>
@@ -75,11 +71,12 @@ def send_verification_email(email, user_id):
     </html>
     """
     
+    # Queued for the background senders so registration does not wait on SMTP
     try:
-        mail.send(msg)
+        enqueue_email([email], "Verify Your Email", html, sender=MAIL_FROM, kind="verification")
         return True
-    except Exception as e:
-        print("Error sending email:", e)
+    except PyMongoError as e:
+        print("Error queueing email:", e)
         return False
 
 def verify_email():
@@ -99,6 +96,7 @@ def verify_email():
 
         # Update user verification status
         mongo.db.users.update_one({"_id": ObjectId(user_id)}, {"$set": {"is_verified": True}})
+        invalidate_user(user_id)
         return jsonify({"message": "Email verified successfully"}), 200
 
     except jwt.ExpiredSignatureError:
@@ -134,8 +132,11 @@ def register_user():
         is_verified=False
     )
 
-    # Insert user into database
-    inserted_user = mongo.db.users.insert_one(user_data)
+    # Insert user into database; the unique email index catches concurrent sign-ups
+    try:
+        inserted_user = mongo.db.users.insert_one(user_data)
+    except DuplicateKeyError:
+        return jsonify({"message": "User already exists"}), 400
 
     # Send verification email
     email_sent = send_verification_email(data["email"], inserted_user.inserted_id)
@@ -169,7 +170,7 @@ def login_user():
 def get_user_profile():
     """Get user profile details"""
     user_id = g.user_id  # Use `g.user_id` instead of `request.user_id`
-    user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"password": 0})  # Exclude password
+    user = get_user_doc(user_id)  # Cached, without the password
 
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -191,6 +192,7 @@ def update_user_profile():
         return jsonify({"message": "No valid fields to update"}), 400
 
     result = mongo.db.users.update_one({"_id": ObjectId(user_id)}, {"$set": update_data})
+    invalidate_user(user_id)
 
     if result.modified_count == 0:
         return jsonify({"message": "No changes made"}), 200
@@ -214,7 +216,7 @@ def get_all_users():
 @token_required
 def get_user(user_id):
     """Get user details by ID"""
-    user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"password": 0})  # Exclude password field
+    user = get_user_doc(user_id)  # Cached, without the password
 
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -236,6 +238,7 @@ def update_user(user_id):
         return jsonify({"message": "No valid fields to update"}), 400
 
     result = mongo.db.users.update_one({"_id": ObjectId(user_id)}, {"$set": update_data})
+    invalidate_user(user_id)
 
     if result.modified_count == 0:
         return jsonify({"message": "No changes made"}), 200
@@ -247,8 +250,17 @@ def update_user(user_id):
 def delete_user(user_id):
     """Delete user by ID"""
     result = mongo.db.users.delete_one({"_id": ObjectId(user_id)})
+    invalidate_user(user_id)
 
     if result.deleted_count == 0:
         return jsonify({"message": "User not found"}), 404
 
     return jsonify({"message": "User deleted successfully"}), 200
+
+@token_required
+def get_auth_cache_stats():
+    """Hit rates of the token and user caches"""
+    if g.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    return jsonify({"token_claims": token_cache.snapshot(), "users": user_cache.snapshot()}), 200
@@ -1,13 +1,34 @@
 from flask import request, jsonify, g
 import os
+import time
 import jwt
 from functools import wraps
 from dotenv import load_dotenv
+from services.ttlCache import TTLCache
 
 # Load environment variables
 load_dotenv("./config/.env")
 JWT_SECRET = os.getenv("JWT_SECRET")
 
+# Verified claims per token, so repeat requests skip the signature check
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", 60))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 10000))
+
+token_cache = TTLCache(TOKEN_CACHE_MAX_ENTRIES, TOKEN_CACHE_TTL_SECONDS)
+
+def verify_token(token):
+    """Return the user_id and role claims of a valid token; raises jwt.InvalidTokenError otherwise."""
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+
+    decoded_data = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+    claims = {"user_id": decoded_data["user_id"], "role": decoded_data.get("role")}
+    # A cached token never outlives its own expiry
+    ttl = decoded_data["exp"] - time.time() if "exp" in decoded_data else None
+    token_cache.put(token, claims, ttl=ttl)
+    return claims
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -22,9 +43,9 @@ def token_required(f):
 
         try:
             # Decode token
-            decoded_data = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-            g.user_id = decoded_data["user_id"]  # Attach user_id to `g` instead of `request`
-            g.role = decoded_data.get("role") 
+            claims = verify_token(token)
+            g.user_id = claims["user_id"]  # Attach user_id to `g` instead of `request`
+            g.role = claims["role"]
         except jwt.ExpiredSignatureError:
             return jsonify({"message": "Token has expired"}), 401
         except jwt.InvalidTokenError:
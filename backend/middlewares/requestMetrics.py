@@ -0,0 +1,54 @@
+from flask import request, g, Response, jsonify
+import os
+import hmac
+import time
+from services.metrics import request_latency, render_metrics
+from services.requestProfiler import start_profile, finish_profile
+
+# Send the request's spans back in a Server-Timing header (shown by browser dev tools)
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+# Bearer token the scraper must send to /metrics; the endpoint is disabled when unset
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+def metrics():
+    # Routes, latencies and worker counts are not for anonymous clients
+    if not METRICS_TOKEN:
+        return jsonify({"message": "Metrics are disabled; set METRICS_TOKEN"}), 403
+    if not hmac.compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {METRICS_TOKEN}".encode()):
+        return jsonify({"message": "Invalid token"}), 401
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+def init_metrics(app):
+    """Time every request, add Server-Timing headers and serve /metrics."""
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.request_profiled = start_profile()
+
+    @app.after_request
+    def record_request_timing(response):
+        started = g.get("request_started")
+        if started is None:
+            return response
+
+        if SERVER_TIMING:
+            timings = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in g.get("timing_spans", {}).items()]
+            timings.append(f"total;dur={(time.perf_counter() - started) * 1000:.1f}")
+            response.headers["Server-Timing"] = ", ".join(timings)
+
+        # The route pattern, not the path, keeps the label set small
+        labels = (request.method, request.url_rule.rule if request.url_rule else "unmatched", str(response.status_code))
+        profiled = g.get("request_profiled")
+
+        def record():
+            # Runs once the body has been sent, so streamed downloads are timed in full
+            seconds = time.perf_counter() - started
+            request_latency.observe(labels, seconds)
+            if profiled:
+                finish_profile(f"{labels[0]} {labels[1]}", seconds)
+
+        response.call_on_close(record)
+        return response
+
+    app.add_url_rule("/metrics", "metrics", metrics)
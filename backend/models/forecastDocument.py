@@ -0,0 +1,130 @@
+import datetime
+import numpy as np
+
+# Compact forecasts keep their entries in `series` instead of `forecast_data`:
+#
+#   "series": {
+#       "start": "2024-01-01T00:00:00",      # first entry timestamp (ISO string, as in the API)
+#       "step_seconds": 3600,               # spacing of the entries
+#       "timestamps": [...],                # only when the entries are not evenly spaced
+#       "forecast_energy": [...],
+#       "energy_savings": [...],
+#       "peak_load": 92.4,
+#       "contributions": {"Temperature": [...], ...}   # one column per feature
+#   }
+#
+# Key names appear once per forecast instead of once per entry, and the
+# arrays stay readable by aggregation pipelines. Legacy documents are served
+# unchanged; the reader below gives both layouts the API shape.
+
+def _series_times(timestamps):
+    """Start and step when `timestamps` are evenly spaced and rebuild exactly, else None."""
+    if not timestamps:
+        return None
+    try:
+        parsed = [datetime.datetime.fromisoformat(ts) for ts in timestamps]
+    except (TypeError, ValueError):
+        return None
+    if parsed[0].tzinfo is not None:
+        return None
+
+    step = (parsed[1] - parsed[0]).total_seconds() if len(parsed) > 1 else 0
+    start = {"start": timestamps[0], "step_seconds": int(step) if float(step).is_integer() else step}
+    if _rebuild_times(start, len(timestamps)) != list(timestamps):
+        return None
+    return start
+
+def _rebuild_times(series, count):
+    start = datetime.datetime.fromisoformat(series["start"])
+    step = series["step_seconds"]
+    # Whole-second times (the usual case) are formatted by NumPy in one call, like Timestamp.isoformat()
+    if start.tzinfo is None and start.microsecond == 0 and float(step).is_integer():
+        times = np.datetime64(start, "s") + np.arange(count) * np.timedelta64(int(step), "s")
+        return np.datetime_as_string(times, unit="s").tolist()
+    step = datetime.timedelta(seconds=step)
+    return [(start + i * step).isoformat() for i in range(count)]
+
+def compact_series(timestamps, forecast, energy_savings, peak_load, contributions, feature_names):
+    """Build the `series` field of a forecast from its arrays.
+
+    Values are rounded to two decimals as in the API; `contributions` is a
+    (steps, features) array in `feature_names` order.
+    """
+    contributions = np.round(np.asarray(contributions, dtype=float), 2)
+    series = _series_times(timestamps) or {"timestamps": list(timestamps)}
+    series.update({
+        "forecast_energy": np.round(np.asarray(forecast, dtype=float), 2).tolist(),
+        "energy_savings": np.round(np.asarray(energy_savings, dtype=float), 2).tolist(),
+        "peak_load": round(float(peak_load), 2),
+        "contributions": {feat: contributions[:, j].tolist() for j, feat in enumerate(feature_names)}
+    })
+    return series
+
+def compact_from_entries(forecast_data):
+    """The `series` equivalent of legacy forecast_data records, or None if they cannot be packed.
+
+    Records need the same keys throughout and one shared peak_load, so that
+    reading the series back gives the original records.
+    """
+    if not forecast_data:
+        return None
+    first = forecast_data[0]
+    feature_names = list(first.get("feature_contributions", {}))
+    keys = {"timestamp", "forecast_energy", "energy_savings", "peak_load", "feature_contributions"}
+    for entry in forecast_data:
+        if (set(entry) != keys or entry["peak_load"] != first["peak_load"]
+                or list(entry["feature_contributions"]) != feature_names):
+            return None
+
+    series = _series_times([entry["timestamp"] for entry in forecast_data]) \
+        or {"timestamps": [entry["timestamp"] for entry in forecast_data]}
+    series.update({
+        "forecast_energy": [entry["forecast_energy"] for entry in forecast_data],
+        "energy_savings": [entry["energy_savings"] for entry in forecast_data],
+        "peak_load": first["peak_load"],
+        "contributions": {
+            feat: [entry["feature_contributions"][feat] for entry in forecast_data] for feat in feature_names
+        }
+    })
+    if expand_series(series) != forecast_data:
+        return None
+    return series
+
+def expand_series(series):
+    """forecast_data records of a compact series, exactly as the API has always returned them."""
+    energy = series.get("forecast_energy", [])
+    timestamps = series.get("timestamps") or _rebuild_times(series, len(energy))
+    contributions = series.get("contributions", {})
+    feature_names = list(contributions)
+    rows = zip(*[contributions[feat] for feat in feature_names]) if feature_names else ([] for _ in energy)
+    peak_load = series.get("peak_load")
+
+    return [
+        {
+            "timestamp": ts,
+            "forecast_energy": value,
+            "energy_savings": savings,
+            "peak_load": peak_load,
+            "feature_contributions": dict(zip(feature_names, row))
+        }
+        for ts, value, savings, row in zip(timestamps, energy, series.get("energy_savings", []), rows)
+    ]
+
+def forecast_entries(forecast):
+    """The forecast_data records of a forecast document in either layout."""
+    if forecast.get("series") is not None:
+        return expand_series(forecast["series"])
+    return forecast.get("forecast_data", [])
+
+def with_forecast_data(forecast):
+    """Give a document in either layout the API shape: `forecast_data` in place of `series`."""
+    if "series" in forecast:
+        forecast["forecast_data"] = expand_series(forecast.pop("series"))
+    return forecast
+
+def projection_fields(fields):
+    """Projection field list that also fetches `series` whenever forecast_data is asked for."""
+    fields = list(fields)
+    if "forecast_data" in fields and "series" not in fields:
+        fields.append("series")
+    return fields
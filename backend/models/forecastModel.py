@@ -1,31 +1,52 @@
-import joblib
 import os
 from config.db import mongo
+from models.forecastDocument import with_forecast_data
+from models.modelRegistry import (
+    registry, LocalModelStore, DEFAULT_SITE, ModelBundle, MODEL_DIR,
+    MODEL_PATH, SCALER_PATH, FEATURE_SCALER_PATH, validate_site_id
+)
 
-MODEL_PATH = "models/trainedDataForecast/sarimax_model.pkl"
-SCALER_PATH = "models/trainedDataForecast/energy_scaler.pkl"
-FEATURE_SCALER_PATH = "models/trainedDataForecast/feature_scaler.pkl"
+# Paths of the default site, kept for scripts that work on local artifacts
+SLIM_MODEL_DIR = os.path.join(MODEL_DIR, "slim")
+VERSION_PATH = os.path.join(MODEL_DIR, "model_version.txt")
 
-def save_model(model, energy_scaler, feature_scaler):
-    """Save the SARIMAX model and scalers."""
-    os.makedirs("models/trainedDataForecast", exist_ok=True)
-    
-    joblib.dump(model, MODEL_PATH)
-    joblib.dump(energy_scaler, SCALER_PATH)
-    joblib.dump(feature_scaler, FEATURE_SCALER_PATH)
+def slim_model_path(version, site_id=DEFAULT_SITE):
+    """Local directory holding the slim artifact for a model version."""
+    return LocalModelStore().slim_path(site_id, version)
 
-def load_model():
+def save_model(model, energy_scaler, feature_scaler, metadata=None, site_id=DEFAULT_SITE, expected_version=None):
+    """Save the SARIMAX model and scalers for a site and return the new model version.
+
+    With `expected_version`, a site that moved to another version meanwhile
+    raises StaleModelError instead of being overwritten.
+    """
+    return registry.save(validate_site_id(site_id), model, energy_scaler, feature_scaler, metadata, expected_version)
+
+def get_model_version(site_id=DEFAULT_SITE):
+    """Return the current model version of a site, or None if it has none."""
+    return registry.store.current_version(validate_site_id(site_id))
+
+def get_model_bundle(site_id=DEFAULT_SITE):
+    """Return the site's ModelBundle, loading it lazily and reloading it after a new save."""
+    return registry.get(validate_site_id(site_id))
+
+def get_model_cache_stats():
+    """Return a snapshot of the model registry counters."""
+    return registry.snapshot()
+
+def list_model_sites():
+    """Return the site ids that have a trained model."""
+    return registry.store.list_sites()
+
+def load_model(site_id=DEFAULT_SITE):
     """Load the SARIMAX model and scalers if available."""
-    if not os.path.exists(MODEL_PATH) or not os.path.exists(SCALER_PATH) or not os.path.exists(FEATURE_SCALER_PATH):
+    bundle = get_model_bundle(site_id)
+    if bundle is None:
         return None, None, None
-    
-    model = joblib.load(MODEL_PATH)
-    energy_scaler = joblib.load(SCALER_PATH)
-    feature_scaler = joblib.load(FEATURE_SCALER_PATH)
 
-    return model, energy_scaler, feature_scaler
+    return bundle.model, bundle.energy_scaler, bundle.feature_scaler
 
 def get_forecast_history():
     """Retrieve all stored forecasts for dashboard trends."""
-    forecasts = list(mongo.db.forecasts.find({}, {"_id": 0}))  # Exclude ObjectId
+    forecasts = [with_forecast_data(f) for f in mongo.db.forecasts.find({}, {"_id": 0})]  # Exclude ObjectId
     return forecasts
@@ -0,0 +1,355 @@
+import os
+import re
+import time
+import shutil
+import datetime
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+import numpy as np
+from config.db import get_db
+from models.slimModel import export_slim, load_slim, SLIM_FILES
+
+DEFAULT_SITE = "default"
+MODEL_DIR = "models/trainedDataForecast"
+
+# "local" keeps artifacts under MODEL_DIR, "gridfs" stores them in MongoDB
+MODEL_STORE = os.getenv("MODEL_STORE", "local")
+# Memory budget for loaded models across all sites, and an upper bound on their number
+MODEL_CACHE_MAX_BYTES = int(os.getenv("MODEL_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+MODEL_CACHE_MAX_SITES = int(os.getenv("MODEL_CACHE_MAX_SITES", 64))
+# How often a cached GridFS model asks MongoDB whether a newer version exists
+MODEL_VERSION_CHECK_SECONDS = float(os.getenv("MODEL_VERSION_CHECK_SECONDS", 5))
+# Reads of a site model before giving up on one that keeps being replaced mid-read
+LOAD_ATTEMPTS = 3
+
+# How many slim versions to keep so workers still loading an older one are not cut off
+KEEP_SLIM_VERSIONS = 2
+
+# Legacy full-pickle artifacts of the default site, loaded when no slim artifact exists
+MODEL_PATH = "models/trainedDataForecast/sarimax_model.pkl"
+SCALER_PATH = "models/trainedDataForecast/energy_scaler.pkl"
+FEATURE_SCALER_PATH = "models/trainedDataForecast/feature_scaler.pkl"
+
+SITE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# A model and the scalers it was trained with, always swapped together
+ModelBundle = namedtuple("ModelBundle", ["model", "energy_scaler", "feature_scaler", "version"])
+
+# Serializes the version check and switch of local saves made by this process
+_version_lock = threading.Lock()
+
+class StaleModelError(Exception):
+    """A save based on one model version found the site already on another."""
+
+    def __init__(self, site_id, expected_version, current_version):
+        super().__init__(
+            f"Model of site '{site_id}' changed from version {expected_version} to {current_version} "
+            "while this job ran; submit the upload again."
+        )
+
+def validate_site_id(site_id):
+    """Return a usable site id, rejecting anything that is not safe as a path component."""
+    site_id = site_id or DEFAULT_SITE
+    if not SITE_ID_PATTERN.match(str(site_id)):
+        raise ValueError("site_id may only contain letters, digits, '-' and '_' (max 64 characters)")
+    return str(site_id)
+
+def new_version():
+    """A sortable version stamp for a freshly saved model."""
+    return datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+
+def _atomic_write(path, text):
+    """Write a small text file by renaming a temporary file over it."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+class LocalModelStore:
+    """Slim artifacts in per-site directories on the local disk.
+
+    The default site keeps the original layout directly under MODEL_DIR; other
+    sites live in MODEL_DIR/sites/<site_id>/.
+    """
+
+    def site_dir(self, site_id):
+        return MODEL_DIR if site_id == DEFAULT_SITE else os.path.join(MODEL_DIR, "sites", site_id)
+
+    def version_path(self, site_id):
+        return os.path.join(self.site_dir(site_id), "model_version.txt")
+
+    def slim_path(self, site_id, version):
+        return os.path.join(self.site_dir(site_id), "slim", version)
+
+    def current_version(self, site_id):
+        path = self.version_path(site_id)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return f.read().strip() or None
+
+    def stamp(self, site_id):
+        """Identify the current artifacts of a site, or None if it has no complete model."""
+        version = self.current_version(site_id)
+        if version and os.path.isdir(self.slim_path(site_id, version)):
+            return ("slim", version)
+
+        if site_id != DEFAULT_SITE:
+            return None
+        try:
+            mtimes = tuple(os.stat(path).st_mtime_ns for path in (MODEL_PATH, SCALER_PATH, FEATURE_SCALER_PATH))
+        except FileNotFoundError:
+            return None
+        return ("pickle",) + mtimes
+
+    def save(self, site_id, version, model, energy_scaler, feature_scaler, metadata, expected_version=None):
+        # Each version gets its own directory, so files are never rewritten under a reader
+        export_slim(self.slim_path(site_id, version), model, energy_scaler, feature_scaler, metadata)
+
+        # The version stamp is written last so readers never see a version whose files are incomplete
+        with _version_lock:
+            current_version = self.current_version(site_id)
+            if expected_version is not None and current_version != expected_version:
+                shutil.rmtree(self.slim_path(site_id, version), ignore_errors=True)
+                raise StaleModelError(site_id, expected_version, current_version)
+            _atomic_write(self.version_path(site_id), version)
+
+        slim_dir = os.path.join(self.site_dir(site_id), "slim")
+        for old_version in sorted(os.listdir(slim_dir))[:-KEEP_SLIM_VERSIONS]:
+            shutil.rmtree(os.path.join(slim_dir, old_version), ignore_errors=True)
+
+    def load(self, site_id, stamp):
+        if stamp[0] == "slim":
+            return load_slim(self.slim_path(site_id, stamp[1]))
+
+        # Legacy pickles only; unpickling them pulls in statsmodels and scikit-learn
+        import joblib
+
+        model = joblib.load(MODEL_PATH)
+        energy_scaler = joblib.load(SCALER_PATH)
+        feature_scaler = joblib.load(FEATURE_SCALER_PATH)
+        return model, energy_scaler, feature_scaler
+
+    def list_sites(self):
+        sites_dir = os.path.join(MODEL_DIR, "sites")
+        sites = sorted(os.listdir(sites_dir)) if os.path.isdir(sites_dir) else []
+        return ([DEFAULT_SITE] if self.stamp(DEFAULT_SITE) else []) + [s for s in sites if self.stamp(s)]
+
+class GridFSModelStore:
+    """Slim artifacts stored as GridFS files, with the current version per site in `model_versions`.
+
+    Loaded versions are unpacked into a local cache directory so they can
+    still be memory-mapped.
+    """
+
+    bucket_name = "model_artifacts"
+    cache_dir = os.path.join(tempfile.gettempdir(), "energauge_model_cache")
+
+    def __init__(self):
+        self._checked = {}
+
+    def _bucket(self):
+        import gridfs
+        return gridfs.GridFSBucket(get_db(), bucket_name=self.bucket_name)
+
+    def current_version(self, site_id):
+        doc = get_db().model_versions.find_one({"_id": site_id})
+        return doc["version"] if doc else None
+
+    def stamp(self, site_id):
+        version = self.current_version(site_id)
+        self._checked[site_id] = time.monotonic()
+        return ("slim", version) if version else None
+
+    def recently_checked(self, site_id):
+        return time.monotonic() - self._checked.get(site_id, 0) < MODEL_VERSION_CHECK_SECONDS
+
+    def save(self, site_id, version, model, energy_scaler, feature_scaler, metadata, expected_version=None):
+        bucket = self._bucket()
+        staging = tempfile.mkdtemp()
+        try:
+            export_slim(staging, model, energy_scaler, feature_scaler, metadata)
+            for filename in os.listdir(staging):
+                with open(os.path.join(staging, filename), "rb") as f:
+                    bucket.upload_from_stream(
+                        f"{site_id}/{version}/{filename}", f,
+                        metadata={"site_id": site_id, "version": version, "filename": filename}
+                    )
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        # Switch the site over only once every file is uploaded, and only from the expected version
+        files = get_db()[f"{self.bucket_name}.files"]
+        switch = {"$set": {"version": version, "updated_at": datetime.datetime.now()}}
+        if expected_version is None:
+            get_db().model_versions.update_one({"_id": site_id}, switch, upsert=True)
+        elif not get_db().model_versions.update_one({"_id": site_id, "version": expected_version}, switch).matched_count:
+            for doc in files.find({"metadata.site_id": site_id, "metadata.version": version}, {"_id": 1}):
+                bucket.delete(doc["_id"])
+            raise StaleModelError(site_id, expected_version, self.current_version(site_id))
+
+        versions = sorted(files.distinct("metadata.version", {"metadata.site_id": site_id}))
+        for old_version in versions[:-KEEP_SLIM_VERSIONS]:
+            for doc in files.find({"metadata.site_id": site_id, "metadata.version": old_version}, {"_id": 1}):
+                bucket.delete(doc["_id"])
+
+    def load(self, site_id, stamp):
+        version = stamp[1]
+        directory = os.path.join(self.cache_dir, site_id, version)
+        if not os.path.isdir(directory):
+            os.makedirs(os.path.dirname(directory), exist_ok=True)
+            staging = tempfile.mkdtemp(dir=os.path.dirname(directory))
+            try:
+                bucket = self._bucket()
+                for doc in bucket.find({"metadata.site_id": site_id, "metadata.version": version}):
+                    with open(os.path.join(staging, doc.metadata["filename"]), "wb") as f:
+                        bucket.download_to_stream(doc._id, f)
+                missing = [name for name in SLIM_FILES if not os.path.exists(os.path.join(staging, name))]
+                if missing:
+                    raise FileNotFoundError(f"Model {site_id}/{version} is missing {', '.join(missing)} in GridFS")
+            except Exception:
+                # Never leave a partial download where the next load would trust it
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+            try:
+                os.replace(staging, directory)
+            except OSError:
+                # Another worker unpacked the same version first
+                shutil.rmtree(staging, ignore_errors=True)
+        return load_slim(directory)
+
+    def list_sites(self):
+        return sorted(doc["_id"] for doc in get_db().model_versions.find({}, {"_id": 1}))
+
+def _bundle_nbytes(bundle):
+    """Approximate memory held by a loaded model: its arrays and the filter output built from them."""
+    total = 0
+    holders = [bundle.energy_scaler, bundle.feature_scaler, getattr(bundle.model, "arrays", None)]
+    results = getattr(bundle.model, "results", bundle.model)
+    holders.append(getattr(results, "filter_results", None))
+    for holder in holders:
+        if holder is None:
+            continue
+        values = holder.values() if isinstance(holder, dict) else vars(holder).values()
+        total += sum(value.nbytes for value in values if isinstance(value, np.ndarray))
+    return total
+
+class ModelRegistry:
+    """Lazily loaded models per site, kept in an LRU cache bounded by memory and count."""
+
+    def __init__(self, store, max_bytes=MODEL_CACHE_MAX_BYTES, max_sites=MODEL_CACHE_MAX_SITES):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.max_sites = max_sites
+        self._entries = OrderedDict()  # site_id -> (stamp, ModelBundle, nbytes)
+        self._lock = threading.Lock()
+        self._site_locks = {}
+        self._listeners = []
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "evictions": 0,
+            "load_seconds_total": 0.0,
+            "last_load_seconds": None
+        }
+
+    def add_listener(self, callback):
+        """Call `callback(site_id)` whenever a site's model is saved or (re)loaded."""
+        self._listeners.append(callback)
+
+    def _notify(self, site_id):
+        for callback in self._listeners:
+            callback(site_id)
+
+    def _current_stamp(self, site_id, cached_stamp):
+        # GridFS lookups cost a round trip, so a cached stamp is trusted for a few seconds
+        if cached_stamp is not None and getattr(self.store, "recently_checked", None) and self.store.recently_checked(site_id):
+            return cached_stamp
+        return self.store.stamp(site_id)
+
+    def get(self, site_id=DEFAULT_SITE):
+        """Return the site's current ModelBundle, loading it on first use or after a new save."""
+        entry = self._entries.get(site_id)
+        stamp = self._current_stamp(site_id, entry[0] if entry else None)
+        if stamp is None:
+            return None
+
+        if entry is not None and entry[0] == stamp:
+            with self._lock:
+                if site_id in self._entries:
+                    self._entries.move_to_end(site_id)
+                self.stats["hits"] += 1
+            return entry[1]
+
+        # One loader per site; other sites keep being served meanwhile
+        with self._lock:
+            site_lock = self._site_locks.setdefault(site_id, threading.Lock())
+        with site_lock:
+            entry = self._entries.get(site_id)
+            with self._lock:
+                # Counters are shared by every request thread of the worker
+                self.stats["hits" if entry is not None and entry[0] == stamp else "misses"] += 1
+            if entry is not None and entry[0] == stamp:
+                return entry[1]
+
+            started = time.perf_counter()
+            for attempt in range(LOAD_ATTEMPTS):
+                version = stamp[1] if stamp[0] == "slim" else None
+                bundle = ModelBundle(*self.store.load(site_id, stamp), version=version)
+                # Legacy pickles may be replaced while we read them, which could mix the triple
+                latest_stamp = self.store.stamp(site_id)
+                if latest_stamp == stamp or latest_stamp is None or attempt == LOAD_ATTEMPTS - 1:
+                    # `stamp` stays the one this bundle was loaded for; a newer save is loaded on the next get
+                    break
+                stamp = latest_stamp
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                self._entries[site_id] = (stamp, bundle, _bundle_nbytes(bundle))
+                self._entries.move_to_end(site_id)
+                self._evict()
+                self.stats["loads"] += 1
+                self.stats["load_seconds_total"] += elapsed
+                self.stats["last_load_seconds"] = round(elapsed, 4)
+
+            # Also how a model saved by another process is picked up
+            self._notify(site_id)
+        return bundle
+
+    def _evict(self):
+        """Drop least recently used sites until the cache fits its budgets (keeping at least one); call with _lock held."""
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_sites
+            or sum(entry[2] for entry in self._entries.values()) > self.max_bytes
+        ):
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def save(self, site_id, model, energy_scaler, feature_scaler, metadata=None, expected_version=None):
+        """Store a new version; with `expected_version`, only if the site is still on that version."""
+        version = new_version()
+        self.store.save(site_id, version, model, energy_scaler, feature_scaler, metadata, expected_version)
+        self._notify(site_id)
+        return version
+
+    def snapshot(self):
+        """Counters plus what is currently loaded, for the stats endpoint."""
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0
+        stats["load_seconds_total"] = round(stats["load_seconds_total"], 4)
+        with self._lock:
+            stats["loaded_sites"] = {
+                site_id: {"version": entry[1].version, "bytes": entry[2]}
+                for site_id, entry in self._entries.items()
+            }
+        stats["loaded_bytes"] = sum(site["bytes"] for site in stats["loaded_sites"].values())
+        stats["max_bytes"] = self.max_bytes
+        stats["max_sites"] = self.max_sites
+        stats["store"] = MODEL_STORE
+        return stats
+
+registry = ModelRegistry(GridFSModelStore() if MODEL_STORE == "gridfs" else LocalModelStore())
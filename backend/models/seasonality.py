@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+def fourier_names(terms):
+    """Column names of the regressors produced by fourier_terms."""
+    return [f"{kind}_{k}" for k in range(1, terms + 1) for kind in ("sin", "cos")]
+
+def fourier_terms(timestamps, period_seconds, terms):
+    """Sine/cosine regressors for a seasonal cycle of `period_seconds`.
+
+    Phases come from absolute time rather than the row position, so the same
+    timestamp always gets the same values in training and in prediction.
+    """
+    # Training indexes are in ns but parsed request timestamps may be in us or s
+    seconds = pd.DatetimeIndex(timestamps).as_unit("ns").asi8 / 1e9
+    cycles = np.outer(seconds / period_seconds, np.arange(1, terms + 1)) * 2 * np.pi
+
+    regressors = np.empty((len(seconds), 2 * terms))
+    regressors[:, 0::2] = np.sin(cycles)
+    regressors[:, 1::2] = np.cos(cycles)
+    return regressors
+
+def add_model_regressors(spec, timestamps, scaled_features):
+    """Append any regressors the model generates itself to the scaled user features."""
+    seasonality = (spec or {}).get("seasonality") or {}
+    if seasonality.get("mode") != "fourier":
+        return scaled_features
+
+    fourier = fourier_terms(timestamps, seasonality["period_seconds"], seasonality["terms"])
+    return np.hstack([np.asarray(scaled_features, dtype=float), fourier])
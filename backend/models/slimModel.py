@@ -0,0 +1,159 @@
+import os
+import json
+import numpy as np
+
+# Bump when the on-disk layout changes so old loaders refuse new artifacts
+SLIM_FORMAT_VERSION = 1
+
+# SARIMAX constructor settings that must match for the stored parameters to make sense
+_SPEC_ATTRIBUTES = [
+    "order", "seasonal_order", "trend", "measurement_error", "time_varying_regression",
+    "mle_regression", "simple_differencing", "enforce_stationarity", "enforce_invertibility",
+    "hamilton_representation", "concentrate_scale"
+]
+
+# Every file export_slim writes; a copy missing any of them is incomplete
+SLIM_FILES = [
+    f"{name}.npy" for name in (
+        "params", "predicted_state", "predicted_state_cov", "last_endog", "last_exog",
+        "energy_min", "energy_scale", "feature_min", "feature_scale"
+    )
+] + ["meta.json"]
+
+class ArrayScaler:
+    """Minimal stand-in for a fitted MinMaxScaler, backed by (possibly memory-mapped) arrays."""
+
+    def __init__(self, min_, scale_):
+        self.min_ = min_
+        self.scale_ = scale_
+
+    def transform(self, X):
+        return np.asarray(X, dtype=float) * self.scale_ + self.min_
+
+    def inverse_transform(self, X):
+        return (np.asarray(X, dtype=float) - self.min_) / self.scale_
+
+class SlimSARIMAX:
+    """Forecast-only SARIMAX rebuilt from the final filter state of a fitted model.
+
+    The state space model is re-created on the last observation alone and
+    initialized with the predicted state for that observation, so filtering it
+    yields the same out-of-sample forecasts as the full results object.
+    """
+
+    def __init__(self, spec, arrays):
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+        self.spec = spec
+        self.arrays = arrays
+
+        model = SARIMAX(
+            np.array(arrays["last_endog"]),
+            exog=np.array(arrays["last_exog"]),
+            trend_offset=spec["trend_offset"],
+            **{key: spec[key] for key in _SPEC_ATTRIBUTES}
+        )
+        model.initialize_known(np.array(arrays["predicted_state"]), np.array(arrays["predicted_state_cov"]))
+        self.results = model.filter(np.array(arrays["params"]))
+
+    @property
+    def params(self):
+        return self.arrays["params"]
+
+    @property
+    def exog_names(self):
+        return self.spec["exog_names"]
+
+    def forecast(self, steps, exog):
+        """Forecast `steps` periods past the end of the training data."""
+        return self.results.forecast(steps=steps, exog=exog)
+
+    def extend(self, endog, exog, refit=False, maxiter=50):
+        """Continue the model with new observations that follow the training data.
+
+        `endog` and `exog` should carry a plain RangeIndex; continuity of the
+        timestamps is the caller's responsibility. Without `refit` the stored parameters are kept and only the new rows are
+        filtered. With `refit` the parameters are re-estimated on the new rows,
+        starting from the current ones and from the current state.
+        """
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+        model = SARIMAX(
+            endog,
+            exog=exog,
+            trend_offset=self.spec["trend_offset"] + 1,
+            **{key: self.spec[key] for key in _SPEC_ATTRIBUTES}
+        )
+        # The state predicted for the first new row, given all the data seen so far
+        model.initialize_known(self.results.predicted_state[:, -1], self.results.predicted_state_cov[:, :, -1])
+
+        if refit:
+            return model.fit(start_params=np.array(self.params), maxiter=maxiter, disp=False)
+        return model.filter(np.array(self.params))
+
+def _to_json_value(value):
+    """Convert tuples and numpy scalars in a model spec into JSON types."""
+    if isinstance(value, (tuple, list)):
+        return [_to_json_value(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def export_slim(directory, results, energy_scaler, feature_scaler, metadata=None):
+    """Write the parts of a fitted SARIMAX results object needed for forecasting.
+
+    `metadata` is stored alongside the spec in meta.json (e.g. the last training
+    timestamp and sampling step that incremental updates must continue from).
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    model = results.model
+    nobs = int(results.nobs)
+
+    spec = {key: _to_json_value(getattr(model, key)) for key in _SPEC_ATTRIBUTES}
+    spec.update(metadata or {})
+    spec.update({
+        "format_version": SLIM_FORMAT_VERSION,
+        # Keep a trend, if any, aligned with the single observation we re-filter
+        "trend_offset": int(getattr(model, "trend_offset", 1)) + nobs - 1,
+        "nobs": nobs,
+        "exog_names": list(model.exog_names or []),
+        "param_names": list(model.param_names)
+    })
+
+    arrays = {
+        "params": np.asarray(results.params, dtype=float),
+        "predicted_state": results.predicted_state[:, nobs - 1],
+        "predicted_state_cov": results.predicted_state_cov[:, :, nobs - 1],
+        "last_endog": np.asarray(model.endog[-1:], dtype=float).reshape(-1),
+        "last_exog": np.asarray(model.exog[-1:], dtype=float),
+        "energy_min": np.asarray(energy_scaler.min_, dtype=float),
+        "energy_scale": np.asarray(energy_scaler.scale_, dtype=float),
+        "feature_min": np.asarray(feature_scaler.min_, dtype=float),
+        "feature_scale": np.asarray(feature_scaler.scale_, dtype=float)
+    }
+
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(spec, f, indent=2)
+
+def load_slim(directory, mmap_mode="r"):
+    """Load a slim artifact; arrays are memory-mapped so worker processes share their pages."""
+    with open(os.path.join(directory, "meta.json")) as f:
+        spec = json.load(f)
+
+    if spec.get("format_version") != SLIM_FORMAT_VERSION:
+        raise ValueError(f"Unsupported slim model format: {spec.get('format_version')}")
+
+    arrays = {}
+    for filename in os.listdir(directory):
+        if filename.endswith(".npy"):
+            arrays[filename[:-4]] = np.load(os.path.join(directory, filename), mmap_mode=mmap_mode)
+
+    model = SlimSARIMAX(spec, arrays)
+    energy_scaler = ArrayScaler(arrays["energy_min"], arrays["energy_scale"])
+    feature_scaler = ArrayScaler(arrays["feature_min"], arrays["feature_scale"])
+
+    return model, energy_scaler, feature_scaler
@@ -1,13 +1,21 @@
 from flask import Blueprint
-from controllers.forecastController import train_sarimax, predict_forecast, get_forecast_trends,  get_user_forecast, download_forecast_csv, download_forecast_pdf
+from controllers.forecastController import train_sarimax, predict_forecast, get_forecast_trends,  get_user_forecast, download_forecast_csv, download_forecast_pdf, get_pdf_report_job, bulk_export_forecasts, get_training_job, list_training_jobs, model_cache_stats, forecast_cache_stats, list_sites, predict_forecast_batch
 
 
 forecast_bp = Blueprint("forecast", __name__)
 
 forecast_bp.route('/train_arima', methods=['POST'])(train_sarimax)
+forecast_bp.route('/train_jobs', methods=['GET'])(list_training_jobs)
+forecast_bp.route('/train_jobs/<job_id>', methods=['GET'])(get_training_job)
+forecast_bp.route('/model/cache_stats', methods=['GET'])(model_cache_stats)
+forecast_bp.route('/model/sites', methods=['GET'])(list_sites)
+forecast_bp.route('/predict_forecast/cache_stats', methods=['GET'])(forecast_cache_stats)
 forecast_bp.route('/predict_forecast', methods=['POST'])(predict_forecast)
+forecast_bp.route('/predict_forecast/batch', methods=['POST'])(predict_forecast_batch)
 forecast_bp.route('/trends', methods=['GET'])(get_forecast_trends)
 forecast_bp.route('/userforecast', methods=['GET'])(get_user_forecast)
 
 forecast_bp.add_url_rule('/download/csv', 'download_forecast_csv', download_forecast_csv)
 forecast_bp.add_url_rule('/download/pdf', 'download_forecast_pdf', download_forecast_pdf)
+forecast_bp.route('/download/pdf/jobs/<job_id>', methods=['GET'])(get_pdf_report_job)
+forecast_bp.route('/download/bulk', methods=['GET'])(bulk_export_forecasts)
@@ -8,7 +8,8 @@ from controllers.userController import (
     update_user,
     delete_user,
     get_user,
-    verify_email
+    verify_email,
+    get_auth_cache_stats
 )
 
 user_bp = Blueprint("user_bp", __name__)
@@ -22,3 +23,4 @@ user_bp.route("/userslist", methods=["GET"])(get_all_users)
 user_bp.route("/usersdata/<user_id>", methods=["GET"])(get_user)
 user_bp.route("/update/<user_id>", methods=["PUT"])(update_user)
 user_bp.route("/delete/<user_id>", methods=["DELETE"])(delete_user)
+user_bp.route("/cache_stats", methods=["GET"])(get_auth_cache_stats)
@@ -0,0 +1,91 @@
+"""Requests per second on /predict_forecast with and without the token and user caches.
+
+The app runs in-process behind Flask's test client against a scratch
+database on the given server; a bench user is created there and the
+database is dropped afterwards. Every request sends the same payload, so
+after the first one forecasts come from the forecast cache and the runs
+differ only in token verification and the user lookup. Needs a trained
+model of the site. Run from the backend directory:
+
+    python -m scripts.benchAuthCaches [--uri mongodb://localhost:27017] [--requests 500] [--concurrency 4]
+"""
+import argparse
+import datetime
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+def payload(steps=24):
+    start = datetime.datetime(2024, 1, 1)
+    return {
+        "timestamps": [(start + datetime.timedelta(hours=i)).isoformat() for i in range(steps)],
+        "features": [{
+            "Temperature": 20.0, "Humidity": 45.0, "SquareFootage": 1500.0, "Occupancy": 10,
+            "HVACUsage": 1, "LightingUsage": 0, "RenewableEnergy": 5.0,
+            "DayOfWeek": 0, "Holiday": "No"
+        } for _ in range(steps)]
+    }
+
+def run(client, token, body, requests, concurrency):
+    """(requests per second, median latency in ms, status codes seen)."""
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def one(_):
+        started = time.perf_counter()
+        response = client.post("/predict_forecast", json=body, headers=headers)
+        return time.perf_counter() - started, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+    return requests / elapsed, statistics.median(r[0] for r in results) * 1000, sorted({r[1] for r in results})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default="mongodb://localhost:27017", help="server only, without a database")
+    parser.add_argument("--database", default="energauge_auth_bench")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--site", default=None)
+    args = parser.parse_args()
+
+    # Set before the app reads it; load_dotenv does not override it
+    os.environ["MONGO_URI"] = f"{args.uri.rstrip('/')}/{args.database}"
+    from app import app
+    from config.db import mongo
+    from controllers.userController import generate_jwt
+    from middlewares.authMiddleware import token_cache
+    from models.userModel import get_user_schema
+    from services.userCache import user_cache
+
+    user_id = mongo.db.users.insert_one(get_user_schema(
+        "Bench", "User", "bench@example.com", "bench-password", is_verified=True
+    )).inserted_id
+    token = generate_jwt(user_id, "user")
+    body = payload()
+    if args.site:
+        body["site_id"] = args.site
+    client = app.test_client()
+
+    caches = [token_cache, user_cache]
+    ttls = [cache.ttl for cache in caches]
+    try:
+        # Warm up: loads the model and fills the forecast cache
+        run(client, token, body, 5, 1)
+        for label, enabled in (("without caches", False), ("with caches", True)):
+            for cache, ttl in zip(caches, ttls):
+                cache.invalidate()
+                cache.ttl = ttl if enabled else 0
+            before = [dict(cache.stats) for cache in caches]
+            rate, median_ms, statuses = run(client, token, body, args.requests, args.concurrency)
+            print(f"{label:<16} {rate:>8.1f} req/s  median {median_ms:.2f} ms  status {statuses}")
+            if enabled:
+                hit_rates = [(cache.stats["hits"] - start["hits"]) / args.requests for cache, start in zip(caches, before)]
+                print(f"{'':<16} token hit rate {hit_rates[0]:.2%}, user hit rate {hit_rates[1]:.2%}")
+    finally:
+        mongo.cx.drop_database(args.database)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Time SARIMAX training with the default seasonal terms against the fast-fit options.
+
+Synthetic one-minute building data is generated for each size, then fitted with:
+
+  * sarima            - the default (5,1,0)(1,1,1,24) model on the raw rows
+  * fourier           - (5,1,0) plus Fourier regressors on the raw rows
+  * hourly+fourier    - hourly resampling followed by the Fourier model
+
+Run from the backend directory:
+
+    python -m scripts.benchFastFit [--rows 10000 100000 1000000] [--baseline-max-rows 100000]
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from services.csvIngest import scale_training_frame
+from services.sarimaxTrainer import (
+    FEATURE_COLUMNS, fit_sarimax, resample_frame, seasonality_metadata, parse_training_options
+)
+
+def synthetic_frame(rows, seed=0):
+    """Unscaled, already-encoded training data sampled every minute."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2023-01-01", periods=rows, freq="min", name="Timestamp")
+    hours = index.hour.to_numpy() + index.minute.to_numpy() / 60
+    daily = np.sin(2 * np.pi * hours / 24)
+
+    df = pd.DataFrame({
+        "Temperature": 20 + 5 * daily + rng.normal(0, 1, rows),
+        "Humidity": 50 + rng.normal(0, 5, rows),
+        "SquareFootage": np.full(rows, 1500.0),
+        "Occupancy": np.clip(5 + 4 * daily + rng.normal(0, 1, rows), 0, None),
+        "HVACUsage": (daily > 0).astype(float),
+        "LightingUsage": ((hours > 7) & (hours < 20)).astype(float),
+        "RenewableEnergy": np.clip(10 * daily, 0, None),
+        "DayOfWeek": ((index.dayofweek + 1) % 7) / 6.0,
+        "Holiday": np.zeros(rows),
+    }, index=index)
+    df["EnergyConsumption"] = 70 + 10 * daily + 0.5 * df["Occupancy"] + rng.normal(0, 2, rows)
+    return df.astype(np.float32)
+
+def timed_fit(raw, options):
+    """Prepare and fit one configuration, returning seconds spent and rows fitted."""
+    started = time.perf_counter()
+    df = resample_frame(raw, options["resample"]) if options["resample"] else raw
+    df, _, _ = scale_training_frame(df, FEATURE_COLUMNS, "EnergyConsumption")
+    step_seconds = (df.index[1] - df.index[0]).total_seconds()
+    fit_sarimax(df, seasonality_metadata(options, step_seconds))
+    return time.perf_counter() - started, len(df)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--baseline-max-rows", type=int, default=100000,
+                        help="skip the raw-row configurations above this size")
+    args = parser.parse_args()
+
+    configurations = {
+        "sarima": parse_training_options({}),
+        "fourier": parse_training_options({"seasonality": "fourier"}),
+        "hourly+fourier": parse_training_options({"resample": "h", "seasonality": "fourier"}),
+    }
+
+    print(f"{'rows':>9} {'configuration':<16} {'fitted rows':>11} {'seconds':>9}")
+    for rows in args.rows:
+        raw = synthetic_frame(rows)
+        for name, options in configurations.items():
+            if not options["resample"] and rows > args.baseline_max_rows:
+                print(f"{rows:>9} {name:<16} {'-':>11} {'skipped':>9}")
+                continue
+            seconds, fitted_rows = timed_fit(raw, options)
+            print(f"{rows:>9} {name:<16} {fitted_rows:>11} {seconds:>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Time building the predict_forecast response with the per-cell loop against the array version.
+
+The model itself is not involved: a synthetic forecast, savings and
+contribution array is turned into forecast_data records both ways, and the
+records are then serialized to JSON as the response would be.
+
+Run from the backend directory:
+
+    python -m scripts.benchForecastResponse [--horizons 24 1000 10000 100000] [--repeat 3]
+"""
+import argparse
+import json
+import time
+import numpy as np
+import pandas as pd
+from services.forecastResponse import iso_timestamps, build_forecast_data
+from services.sarimaxTrainer import FEATURE_COLUMNS
+
+def synthetic_arrays(steps, seed=0):
+    """Outputs shaped like predict_forecast's intermediates for a horizon."""
+    rng = np.random.default_rng(seed)
+    # Parsed from strings like a request body, so in the unit pandas infers for them
+    timestamps = pd.date_range("2024-01-01", periods=steps, freq="h").strftime("%Y-%m-%dT%H:%M:%S")
+    future_dates = pd.to_datetime(list(timestamps))
+    forecast = np.maximum(70 + 10 * rng.standard_normal(steps), 0)
+    energy_savings = forecast * 0.12
+    scaled = rng.random((steps, len(FEATURE_COLUMNS)))
+    contributions = scaled * (forecast[:, None] / scaled.sum(axis=1)[:, None])
+    return future_dates, forecast, energy_savings, forecast.max(), contributions
+
+def legacy_forecast_data(future_dates, forecast, energy_savings, peak_load, contributions):
+    """The comprehension predict_forecast used before, kept here for comparison."""
+    contributions = pd.DataFrame(contributions, columns=FEATURE_COLUMNS)
+    return [
+        {
+            "timestamp": ts.isoformat(),
+            "forecast_energy": round(energy, 2),
+            "energy_savings": round(savings, 2),
+            "peak_load": round(peak_load, 2),
+            "feature_contributions": {feat: round(contributions.iloc[i][feat], 2) for feat in FEATURE_COLUMNS}
+        }
+        for i, (ts, energy, savings) in enumerate(zip(future_dates, forecast, energy_savings))
+    ]
+
+def vectorized_forecast_data(future_dates, forecast, energy_savings, peak_load, contributions):
+    return build_forecast_data(
+        iso_timestamps(future_dates), forecast, energy_savings, peak_load, contributions, FEATURE_COLUMNS
+    )
+
+def best_of(repeat, build, arrays):
+    """Fastest build and JSON-serialize times over `repeat` runs."""
+    build_times, dump_times = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        records = build(*arrays)
+        built = time.perf_counter()
+        json.dumps({"forecast_data": records})
+        build_times.append(built - started)
+        dump_times.append(time.perf_counter() - built)
+    return min(build_times), min(dump_times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--horizons", type=int, nargs="+", default=[24, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--legacy-max-horizon", type=int, default=100000,
+                        help="skip the per-cell loop above this horizon")
+    args = parser.parse_args()
+
+    print(f"{'horizon':>8} {'version':<11} {'build s':>9} {'json s':>9} {'speedup':>8}")
+    for steps in args.horizons:
+        arrays = synthetic_arrays(steps)
+        fast_build, fast_dump = best_of(args.repeat, vectorized_forecast_data, arrays)
+
+        if steps > args.legacy_max_horizon:
+            print(f"{steps:>8} {'loop':<11} {'skipped':>9} {'-':>9} {'-':>8}")
+            speedup = "-"
+        else:
+            # One run is enough for the loop at long horizons; it is orders of magnitude slower
+            legacy_build, legacy_dump = best_of(args.repeat if steps <= 1000 else 1, legacy_forecast_data, arrays)
+            print(f"{steps:>8} {'loop':<11} {legacy_build:>9.4f} {legacy_dump:>9.4f} {'':>8}")
+            speedup = f"{legacy_build / fast_build:.1f}x"
+        print(f"{steps:>8} {'vectorized':<11} {fast_build:>9.4f} {fast_dump:>9.4f} {speedup:>8}")
+
+if __name__ == "__main__":
+    main()
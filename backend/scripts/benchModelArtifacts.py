@@ -0,0 +1,84 @@
+"""Compare load time and memory of the pickled and slim model artifacts.
+
+Each format is loaded in a fresh interpreter so import caches and freed
+memory do not leak between measurements. Run from the backend directory
+after `scripts.convertModelArtifacts`:
+
+    python -m scripts.benchModelArtifacts [--repeat 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+def _rss_kib():
+    """Current resident set size of this process in KiB (Linux), falling back to peak RSS."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def _child(artifact_format):
+    """Load one artifact format and print the measurements as JSON."""
+    # Import the heavy libraries first so only the artifact itself is measured
+    import importlib
+    import numpy as np
+    import joblib
+    importlib.import_module("statsmodels.tsa.statespace.sarimax")
+    from models import forecastModel
+    from models.slimModel import load_slim
+
+    rss_before = _rss_kib()
+    started = time.perf_counter()
+    if artifact_format == "slim":
+        version = forecastModel.get_model_version()
+        model, _, feature_scaler = load_slim(forecastModel.slim_model_path(version))
+    else:
+        model = joblib.load(forecastModel.MODEL_PATH)
+        joblib.load(forecastModel.SCALER_PATH)
+        feature_scaler = joblib.load(forecastModel.FEATURE_SCALER_PATH)
+    load_seconds = time.perf_counter() - started
+
+    # A forecast touches every array the model needs, including memory-mapped pages
+    exog = np.zeros((24, feature_scaler.scale_.shape[0]))
+    model.forecast(steps=24, exog=exog)
+
+    print(json.dumps({
+        "format": artifact_format,
+        "load_seconds": load_seconds,
+        "rss_delta_kib": _rss_kib() - rss_before
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", choices=["pickle", "slim"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child)
+        return
+
+    print(f"{'format':<8} {'load ms (best)':>15} {'load ms (median)':>17} {'RSS delta MiB':>14}")
+    for artifact_format in ("pickle", "slim"):
+        runs = []
+        for _ in range(args.repeat):
+            output = subprocess.run(
+                [sys.executable, "-m", "scripts.benchModelArtifacts", "--child", artifact_format],
+                cwd=os.getcwd(), capture_output=True, text=True, check=True
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+
+        load_ms = sorted(run["load_seconds"] * 1000 for run in runs)
+        rss_mib = max(run["rss_delta_kib"] for run in runs) / 1024
+        print(f"{artifact_format:<8} {load_ms[0]:>15.2f} {load_ms[len(load_ms) // 2]:>17.2f} {rss_mib:>14.2f}")
+
+if __name__ == "__main__":
+    main()
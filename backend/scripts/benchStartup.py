@@ -0,0 +1,106 @@
+"""Break down the import time of the web app and fail when it is over budget.
+
+app.py is imported in fresh interpreters under `python -X importtime`, so
+building the app (init_app and the other setup it runs) is counted with its
+imports; the best run is broken down by top-level package. No database is
+needed: the Mongo client connects lazily. Run from the backend directory,
+e.g. in CI (tests/test_startup.py checks the same budget):
+
+    python -m scripts.benchStartup [--repeat 5] [--budget-ms 1500] [--top 15]
+
+Exits 1 when the import time exceeds the budget (STARTUP_IMPORT_BUDGET_MS)
+or when any of services.heavyImports.HEAVY_MODULES is imported at startup.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from services.heavyImports import HEAVY_MODULES
+
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", 1500))
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def total_ms(rows):
+    """Import time of the top-level imports, i.e. of everything the code imported."""
+    return sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000
+
+def startup_env():
+    """Environment for a startup measurement: any MONGO_URI will do, and no preloading."""
+    env = dict(os.environ)
+    env.setdefault("MONGO_URI", "mongodb://localhost:27017/energauge")
+    env.pop("PRELOAD_HEAVY_IMPORTS", None)
+    return env
+
+def measure_imports(modules):
+    """Import `modules` in a fresh interpreter; return (importtime rows, wall seconds)."""
+    code = "; ".join(f"import {name}" for name in modules)
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            env=startup_env(), capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr), wall
+
+def eager_heavy_modules(rows):
+    """Which of HEAVY_MODULES the measured imports loaded."""
+    loaded = {name for name, _, _, _ in rows}
+    # Exact names only: pandas imports the pyarrow core itself, but not pyarrow.parquet
+    return [name for name in HEAVY_MODULES if name in loaded]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_IMPORT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    # Interpreter start-up alone, to separate it from the app's own imports
+    baseline = min(measure_imports([])[1] for _ in range(args.repeat))
+
+    try:
+        runs = [measure_imports(["app"]) for _ in range(args.repeat)]
+    except RuntimeError as e:
+        sys.exit(str(e))
+    # The first run also compiles bytecode; the best run is what a restart costs
+    rows, wall = min(runs, key=lambda run: total_ms(run[0]))
+    startup_ms = total_ms(rows)
+
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"import app: {startup_ms:.0f} ms (runs: {', '.join(f'{total_ms(run[0]):.0f}' for run in runs)} ms)")
+    print(f"process wall time: {wall * 1000:.0f} ms, bare interpreter {baseline * 1000:.0f} ms")
+    print(f"\n{'package':<28} {'self ms':>9}")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<28} {self_us / 1000:>9.1f}")
+
+    eager = eager_heavy_modules(rows)
+    failed = False
+    if eager:
+        failed = True
+        print(f"\nimported at startup, should be lazy: {', '.join(eager)}")
+    if startup_ms > args.budget_ms:
+        failed = True
+        print(f"\nover budget: {startup_ms:.0f} ms > {args.budget_ms:.0f} ms")
+    if not failed:
+        print(f"\nwithin budget ({args.budget_ms:.0f} ms), no heavy library imported")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Time the admin /trends computation in Python against the aggregation pipeline.
+
+Synthetic users and forecasts are written to a scratch database on the
+server in MONGO_URI (never the app database), then the summary is computed
+both ways. Needs a reachable mongod. Run from the backend directory:
+
+    python -m scripts.benchTrends [--forecasts 100000] [--horizon 24] [--users 1000] [--keep]
+"""
+import argparse
+import datetime
+import os
+import time
+import numpy as np
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from services.forecastHistory import parse_history_args
+from services.forecastTrends import trends_summary, list_trend_forecasts
+from services.sarimaxTrainer import FEATURE_COLUMNS
+
+def seed(db, forecasts, horizon, users, batch=2000, seed=0):
+    """Insert synthetic users and forecasts shaped like predict_forecast's documents."""
+    rng = np.random.default_rng(seed)
+    user_ids = [ObjectId() for _ in range(users)]
+    db.users.insert_many([{"_id": uid, "first_name": f"User{i}", "last_name": "Bench"} for i, uid in enumerate(user_ids)])
+
+    start = datetime.datetime(2024, 1, 1)
+    timestamps = [(start + datetime.timedelta(hours=h)).isoformat() for h in range(horizon)]
+    for offset in range(0, forecasts, batch):
+        count = min(batch, forecasts - offset)
+        energy = np.round(rng.uniform(40, 120, (count, horizon)), 2)
+        contributions = np.round(rng.uniform(0, 15, (count, horizon, len(FEATURE_COLUMNS))), 2)
+        docs = []
+        for i in range(count):
+            row_energy = energy[i].tolist()
+            peak = max(row_energy)
+            docs.append({
+                "user_id": user_ids[int(rng.integers(users))],
+                "timestamp": start + datetime.timedelta(minutes=offset + i),
+                "forecast_data": [
+                    {
+                        "timestamp": ts,
+                        "forecast_energy": value,
+                        "energy_savings": round(value * 0.1, 2),
+                        "peak_load": peak,
+                        "feature_contributions": dict(zip(FEATURE_COLUMNS, contributions[i, t].tolist()))
+                    }
+                    for t, (ts, value) in enumerate(zip(timestamps, row_energy))
+                ]
+            })
+        db.forecasts.insert_many(docs, ordered=False)
+
+def python_summary(db):
+    """The summary as get_forecast_trends computed it before, fetching every document."""
+    forecasts = list(db.forecasts.find({}, {"_id": 1, "user_id": 1, "timestamp": 1, "forecast_data": 1}))
+    # The old view also loaded every user to attach names
+    users = {str(user["_id"]): user for user in db.users.find({}, {"_id": 1, "first_name": 1, "last_name": 1})}
+    total_energy = total_savings = total_entries = 0
+    peak_loads = []
+    features = dict.fromkeys(FEATURE_COLUMNS, 0)
+    for forecast in forecasts:
+        entries = forecast.get("forecast_data", [])
+        total_energy += sum(entry["forecast_energy"] for entry in entries)
+        total_savings += sum(entry["energy_savings"] for entry in entries)
+        peak_loads.append(max(entry["forecast_energy"] for entry in entries) if entries else 0)
+        for entry in entries:
+            contributions = entry.get("feature_contributions", {})
+            for key in features:
+                features[key] += contributions.get(key, 0)
+            total_entries += 1
+    return {
+        "total_forecasts": len(forecasts),
+        "total_energy": round(total_energy, 2),
+        "total_users_forecasting": len(set(forecast["user_id"] for forecast in forecasts)),
+        "users_loaded": len(users)
+    }
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--forecasts", type=int, default=100000)
+    parser.add_argument("--horizon", type=int, default=24)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--database", default="energauge_trends_bench")
+    parser.add_argument("--keep", action="store_true", help="leave the scratch database in place")
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    db = client[args.database]
+    if db.forecasts.estimated_document_count() != args.forecasts:
+        client.drop_database(args.database)
+        print(f"Seeding {args.forecasts} forecasts x {args.horizon} steps into {args.database} ...")
+        seed(db, args.forecasts, args.horizon, args.users)
+
+    try:
+        python_seconds, expected = timed(python_summary, db)
+        pipeline_seconds, summary = timed(trends_summary, db)
+        page_seconds, (page, _) = timed(list_trend_forecasts, parse_history_args({"page_size": 50}), db)
+
+        expected.pop("users_loaded")
+        for key, value in expected.items():
+            if abs(summary[key] - value) > 0.01 * max(1, abs(value)):
+                print(f"Mismatch in {key}: python={value} pipeline={summary[key]}")
+
+        print(f"{'method':<26} {'seconds':>9}")
+        print(f"{'python loop (all docs)':<26} {python_seconds:>9.3f}")
+        print(f"{'aggregation summary':<26} {pipeline_seconds:>9.3f}")
+        print(f"{'listing, first page of 50':<26} {page_seconds:>9.3f} ({len(page)} forecasts)")
+        print(f"speedup of the summary: {python_seconds / pipeline_seconds:.1f}x")
+    finally:
+        if not args.keep:
+            client.drop_database(args.database)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Fail if a hot query of the controllers is planned as a collection scan.
+
+The declared indexes (config.db.INDEXES) are created in a scratch database,
+then each query below is explained and its winning plan searched for
+COLLSCAN. Needs a reachable mongod; MONGO_URI's server is used, or
+localhost. Run from the backend directory, e.g. in CI:
+
+    python -m scripts.checkQueryPlans [--uri mongodb://localhost:27017] [--database energauge_plan_check]
+
+Exits 1 when any query scans its collection. Full-history aggregations
+(the /trends fallback and the rollup rebuild) are deliberately not listed.
+"""
+import argparse
+import datetime
+import os
+import sys
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from config.db import ensure_indexes
+from services.forecastHistory import history_match, parse_history_args
+
+def hot_queries():
+    """(name, collection, explain command body) for every indexed lookup the app depends on."""
+    user_id = ObjectId()
+    first_page = parse_history_args({})
+    deep_page = dict(first_page, cursor=(datetime.datetime(2024, 1, 1), ObjectId()))
+    deep_page_desc = dict(deep_page, descending=True)
+    ranged = parse_history_args({"from": "2024-01-01T00:00:00", "to": "2024-02-01T00:00:00"})
+
+    def listing(base_filter, params):
+        direction = -1 if params["descending"] else 1
+        return {"filter": history_match(base_filter, params),
+                "sort": {"timestamp": direction, "_id": direction}, "limit": params["page_size"] + 1}
+
+    return [
+        ("users by email (register/login)", "users", {"filter": {"email": "someone@example.com"}}),
+        ("users by _id", "users", {"filter": {"_id": user_id}}),
+        ("user history, first page", "forecasts", listing({"user_id": user_id}, first_page)),
+        ("user history, deep page", "forecasts", listing({"user_id": user_id}, deep_page)),
+        ("user history, deep page desc", "forecasts", listing({"user_id": user_id}, deep_page_desc)),
+        ("user history, time range", "forecasts", listing({"user_id": user_id}, ranged)),
+        ("user forecasts (exports)", "forecasts", {"filter": {"user_id": user_id}}),
+        ("admin listing, first page", "forecasts", listing({}, first_page)),
+        ("admin listing, deep page", "forecasts", listing({}, deep_page)),
+        ("admin listing, time range", "forecasts", listing({}, ranged)),
+        ("training jobs, newest first", "training_jobs", {"filter": {}, "sort": {"submitted_at": -1}, "limit": 20}),
+        ("model artifact files", "model_artifacts.files",
+         {"filter": {"metadata.site_id": "default", "metadata.version": "20240101000000000000"}}),
+    ]
+
+def collscans(node):
+    """Count COLLSCAN stages anywhere under a plan node."""
+    if isinstance(node, dict):
+        return (node.get("stage") == "COLLSCAN") + sum(collscans(value) for value in node.values())
+    if isinstance(node, list):
+        return sum(collscans(value) for value in node)
+    return 0
+
+def winning_plans(explain):
+    """Every winningPlan in an explain result, whatever the server version nests them under."""
+    if isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "winningPlan":
+                yield value
+            else:
+                yield from winning_plans(value)
+    elif isinstance(explain, list):
+        for value in explain:
+            yield from winning_plans(value)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default=None)
+    parser.add_argument("--database", default="energauge_plan_check")
+    parser.add_argument("--keep", action="store_true", help="leave the scratch database in place")
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = MongoClient(args.uri or os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    db = client[args.database]
+
+    failures = 0
+    try:
+        ensure_indexes(db)
+        for name, collection, command in hot_queries():
+            explain = db.command("explain", {"find": collection, **command}, verbosity="queryPlanner")
+            scans = sum(collscans(plan) for plan in winning_plans(explain))
+            failures += scans > 0
+            print(f"{'COLLSCAN' if scans else 'ok':<9} {collection:<22} {name}")
+    finally:
+        if not args.keep:
+            client.drop_database(args.database)
+
+    print(f"{failures} queries fall back to a collection scan")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Convert the legacy pickled SARIMAX artifacts into the slim format.
+
+Run from the backend directory:
+
+    python -m scripts.convertModelArtifacts [--remove-pickles]
+"""
+import argparse
+import os
+import joblib
+from models.forecastModel import MODEL_PATH, SCALER_PATH, FEATURE_SCALER_PATH, save_model, slim_model_path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--remove-pickles", action="store_true", help="delete the .pkl files after converting")
+    args = parser.parse_args()
+
+    for path in (MODEL_PATH, SCALER_PATH, FEATURE_SCALER_PATH):
+        if not os.path.exists(path):
+            raise SystemExit(f"Missing legacy artifact: {path}")
+
+    model = joblib.load(MODEL_PATH)
+    energy_scaler = joblib.load(SCALER_PATH)
+    feature_scaler = joblib.load(FEATURE_SCALER_PATH)
+
+    version = save_model(model, energy_scaler, feature_scaler)
+    directory = slim_model_path(version)
+    pickle_size = sum(os.path.getsize(path) for path in (MODEL_PATH, SCALER_PATH, FEATURE_SCALER_PATH))
+    if os.path.isdir(directory):
+        slim_size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        print(f"Wrote {directory} ({slim_size / 1024:.1f} KiB, pickles were {pickle_size / 1024:.1f} KiB)")
+    else:
+        print(f"Saved model version {version} to the configured model store")
+
+    if args.remove_pickles:
+        for path in (MODEL_PATH, SCALER_PATH, FEATURE_SCALER_PATH):
+            os.remove(path)
+        print("Removed legacy pickles")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Send the queued outbound email from a standalone process.
+
+Web workers already drain the queue; this is for running a dedicated sender
+or for checking delivery by hand. To try it without a real mail server,
+start a local debugging SMTP server that prints every message it receives,
+and point the app at it:
+
+    python -m aiosmtpd -n -l localhost:1025
+    MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_USE_TLS=False python -m scripts.drainEmailQueue --send-test you@example.com --once
+
+Run from the backend directory. Without --once it keeps polling like a web worker.
+"""
+import argparse
+import time
+from app import app
+from controllers.userController import MAIL_FROM
+from services.emailQueue import drain, enqueue_email, get_email, EMAIL_POLL_SECONDS
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--once", action="store_true", help="send what is due and exit")
+    parser.add_argument("--send-test", metavar="ADDRESS", help="queue a test message first")
+    args = parser.parse_args()
+
+    with app.app_context():
+        test_id = None
+        if args.send_test:
+            test_id = enqueue_email([args.send_test], "EnerGauge test email", "<p>Outbound mail queue test.</p>",
+                                    sender=MAIL_FROM, kind="test", start_workers=False)
+        while True:
+            started = time.perf_counter()
+            sent = drain()
+            if sent:
+                print(f"Sent {sent} messages in {time.perf_counter() - started:.2f}s")
+            if args.once:
+                break
+            time.sleep(EMAIL_POLL_SECONDS)
+
+        if test_id:
+            print(f"Test message: {get_email(test_id)}")
+
+if __name__ == "__main__":
+    main()
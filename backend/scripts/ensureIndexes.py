@@ -0,0 +1,16 @@
+"""Create the indexes declared in config.db.INDEXES.
+
+The gunicorn master and the development server do this at startup; run it
+as a deploy step otherwise, from the backend directory:
+
+    python -m scripts.ensureIndexes
+
+Exits 1 when MongoDB is unreachable or an index could not be created, e.g.
+the unique users.email index over accounts that share an email (they are
+listed so they can be merged first).
+"""
+import sys
+from config.db import ensure_indexes
+
+if __name__ == "__main__":
+    sys.exit(0 if ensure_indexes() else 1)
@@ -0,0 +1,34 @@
+"""Export forecast history to a Parquet or Arrow IPC file.
+
+One row per forecast entry with typed energy, savings, peak load and
+feature contribution columns. Run from the backend directory:
+
+    python -m scripts.exportForecasts forecasts.parquet [--format parquet|arrow]
+        [--user-id ID] [--from 2024-01-01] [--to 2024-02-01] [--row-group-rows 100000]
+"""
+import argparse
+import json
+from bson import ObjectId
+from services.forecastExport import export_columnar, record_export, EXPORT_FORMATS, EXPORT_ROW_GROUP_ROWS, EXPORT_BATCH_SIZE
+from services.forecastHistory import parse_time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default=None,
+                        help="defaults to the path's extension, else parquet")
+    parser.add_argument("--user-id", type=ObjectId, default=None)
+    parser.add_argument("--from", dest="start", type=parse_time, default=None)
+    parser.add_argument("--to", dest="end", type=parse_time, default=None)
+    parser.add_argument("--row-group-rows", type=int, default=EXPORT_ROW_GROUP_ROWS)
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="forecasts fetched per cursor batch")
+    args = parser.parse_args()
+
+    fmt = args.format or next((name for name, ext in EXPORT_FORMATS.items() if args.path.endswith(ext)), "parquet")
+    stats = export_columnar(args.path, fmt, args.user_id, args.start, args.end,
+                            row_group_rows=args.row_group_rows, batch_size=args.batch_size)
+    record_export(stats, requested_by="cli")
+    print(json.dumps(stats, indent=2))
+
+if __name__ == "__main__":
+    main()
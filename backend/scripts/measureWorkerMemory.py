@@ -0,0 +1,70 @@
+"""Report the memory of each gunicorn worker: RSS, PSS and private pages (Linux).
+
+RSS counts every page shared with the master in each worker; PSS divides
+shared pages among the processes mapping them, so the sum of PSS is what the
+server really uses. Run against a server started with
+`gunicorn -c config/gunicornConfig.py wsgi:app`, after warming it with some
+traffic, and again with WEB_PRELOAD=false to compare:
+
+    python -m scripts.measureWorkerMemory [--master PID]
+"""
+import argparse
+import subprocess
+import sys
+
+FIELDS = ["Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"]
+
+def smaps_rollup(pid):
+    """{field: KiB} from /proc/<pid>/smaps_rollup."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0].rstrip(":") in FIELDS:
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values
+
+def find_master():
+    result = subprocess.run(["pgrep", "-f", "gunicorn: master"], capture_output=True, text=True)
+    pids = result.stdout.split()
+    if not pids:
+        result = subprocess.run(["pgrep", "-o", "-f", "gunicorn"], capture_output=True, text=True)
+        pids = result.stdout.split()
+    if not pids:
+        sys.exit("No gunicorn master found; pass --master")
+    return int(pids[0])
+
+def children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--master", type=int, help="pid of the gunicorn master")
+    args = parser.parse_args()
+
+    master = args.master or find_master()
+    processes = [("master", master)] + [("worker", pid) for pid in children(master)]
+
+    print(f"{'process':<8} {'pid':>8} " + " ".join(f"{field + ' MiB':>18}" for field in FIELDS))
+    totals = dict.fromkeys(FIELDS, 0)
+    worker_private = []
+    for role, pid in processes:
+        try:
+            values = smaps_rollup(pid)
+        except OSError as e:
+            print(f"Error reading {role} {pid}: {str(e)}")
+            continue
+        for field in FIELDS:
+            totals[field] += values.get(field, 0)
+        if role == "worker":
+            worker_private.append(values.get("Private_Dirty", 0))
+        print(f"{role:<8} {pid:>8} " + " ".join(f"{values.get(field, 0) / 1024:>18.1f}" for field in FIELDS))
+
+    print(f"\n{len(worker_private)} workers; total PSS {totals['Pss'] / 1024:.1f} MiB, total RSS {totals['Rss'] / 1024:.1f} MiB"
+          f" (RSS double-counts shared pages)")
+    if worker_private:
+        print(f"average private dirty memory per worker: {sum(worker_private) / len(worker_private) / 1024:.1f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Move stored forecasts to the compact `series` layout and report the savings.
+
+Documents are converted in _id order, a batch at a time. A document is only
+rewritten when reading the compact form back gives exactly its original
+forecast_data; the rest are left in the legacy layout, which every reader
+still serves. Run from the backend directory:
+
+    python -m scripts.migrateForecastLayout --measure 1000   # sizes and read times of a sample, no writes
+    python -m scripts.migrateForecastLayout --synthetic 24   # the same on generated forecasts, no database
+    python -m scripts.migrateForecastLayout [--batch-size 500] [--limit N] [--dry-run]
+"""
+import argparse
+import time
+import bson
+from pymongo import UpdateOne
+from config.db import get_db
+from models.forecastDocument import compact_from_entries, forecast_entries
+
+LEGACY = {"forecast_data": {"$exists": True}, "series": {"$exists": False}}
+
+def _compact_doc(doc, series):
+    compact = {key: value for key, value in doc.items() if key != "forecast_data"}
+    compact["series"] = series
+    return compact
+
+def _read_seconds(encoded, repeat):
+    """Best time to decode the documents and materialize their entries, as the API does."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for data in encoded:
+            forecast_entries(bson.decode(data))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def _raw_decode_seconds(encoded):
+    started = time.perf_counter()
+    for data in encoded:
+        bson.decode(data)
+    return time.perf_counter() - started
+
+def synthetic_docs(steps, count=200):
+    """Legacy forecasts of `steps` hourly entries, built the way predict_forecast used to store them."""
+    from bson import ObjectId
+    from services.forecastResponse import iso_timestamps, build_forecast_data
+    from services.sarimaxTrainer import FEATURE_COLUMNS
+    from scripts.benchForecastResponse import synthetic_arrays
+
+    docs = []
+    for seed in range(count):
+        future_dates, forecast, savings, peak_load, contributions = synthetic_arrays(steps, seed)
+        docs.append({
+            "_id": ObjectId(), "user_id": ObjectId(), "first_name": "Ada", "last_name": "Lovelace",
+            "timestamp": future_dates[0].to_pydatetime(),
+            "forecast_data": build_forecast_data(iso_timestamps(future_dates), forecast, savings,
+                                                 peak_load, contributions, FEATURE_COLUMNS)
+        })
+    return docs
+
+def measure(docs, repeat=5):
+    legacy, compact = [], []
+    for doc in docs:
+        series = compact_from_entries(doc["forecast_data"])
+        if series is not None:
+            legacy.append(bson.encode(doc))
+            compact.append(bson.encode(_compact_doc(doc, series)))
+    if not legacy:
+        print("No convertible legacy forecasts to measure")
+        return
+
+    legacy_bytes = sum(len(data) for data in legacy)
+    compact_bytes = sum(len(data) for data in compact)
+    legacy_read = _read_seconds(legacy, repeat)
+    compact_read = _read_seconds(compact, repeat)
+    compact_raw = min(_raw_decode_seconds(compact) for _ in range(repeat))
+    legacy_raw = min(_raw_decode_seconds(legacy) for _ in range(repeat))
+
+    print(f"{len(legacy)} of {len(docs)} sampled forecasts convertible")
+    print(f"{'':<22} {'legacy':>12} {'compact':>12} {'ratio':>7}")
+    print(f"{'BSON bytes':<22} {legacy_bytes:>12} {compact_bytes:>12} {compact_bytes / legacy_bytes:>7.2f}")
+    print(f"{'decode only (s)':<22} {legacy_raw:>12.4f} {compact_raw:>12.4f} {compact_raw / legacy_raw:>7.2f}")
+    print(f"{'decode + entries (s)':<22} {legacy_read:>12.4f} {compact_read:>12.4f} {compact_read / legacy_read:>7.2f}")
+
+def migrate(db, batch_size, limit=None, dry_run=False):
+    migrated = skipped = bytes_before = bytes_after = 0
+    last_id = None
+    started = time.perf_counter()
+    while limit is None or migrated + skipped < limit:
+        query = dict(LEGACY, _id={"$gt": last_id}) if last_id is not None else LEGACY
+        size = batch_size if limit is None else min(batch_size, limit - migrated - skipped)
+        batch = list(db.forecasts.find(query, {"forecast_data": 1}).sort("_id", 1).limit(size))
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        updates = []
+        for doc in batch:
+            series = compact_from_entries(doc["forecast_data"])
+            if series is None:
+                skipped += 1
+                continue
+            bytes_before += len(bson.encode({"forecast_data": doc["forecast_data"]}))
+            bytes_after += len(bson.encode({"series": series}))
+            # The filter skips documents another run already converted
+            updates.append(UpdateOne({"_id": doc["_id"], "series": {"$exists": False}},
+                                     {"$set": {"series": series}, "$unset": {"forecast_data": ""}}))
+        if updates and not dry_run:
+            db.forecasts.bulk_write(updates, ordered=False)
+        migrated += len(updates)
+        print(f"{migrated} converted, {skipped} left as they were ({time.perf_counter() - started:.1f}s)")
+
+    if bytes_before:
+        print(f"forecast entries: {bytes_before} -> {bytes_after} bytes ({bytes_after / bytes_before:.2f}x)"
+              + (" [dry run]" if dry_run else ""))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--measure", type=int, metavar="SAMPLE", help="only report savings on a random sample")
+    parser.add_argument("--synthetic", type=int, metavar="STEPS", help="report savings on generated forecasts")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        measure(synthetic_docs(args.synthetic))
+        return
+
+    db = get_db()
+    if args.measure:
+        measure(list(db.forecasts.aggregate([{"$match": LEGACY}, {"$sample": {"size": args.measure}}])))
+    else:
+        migrate(db, args.batch_size, args.limit, args.dry_run)
+
+if __name__ == "__main__":
+    main()
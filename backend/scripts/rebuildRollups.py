@@ -0,0 +1,33 @@
+"""Rebuild or check the forecast_rollups collection against raw forecast history.
+
+Run from the backend directory once after deploying rollups, and whenever
+the checker reports drift:
+
+    python -m scripts.rebuildRollups           # recompute and replace every rollup
+    python -m scripts.rebuildRollups --check   # only report mismatches; exits 1 if any
+"""
+import argparse
+import sys
+import time
+from services.forecastRollups import rebuild_rollups, check_rollups
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="compare instead of rebuilding")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="relative difference allowed for floating-point sums")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.check:
+        mismatches = check_rollups(tolerance=args.tolerance)
+        for mismatch in mismatches:
+            print(mismatch)
+        print(f"{len(mismatches)} mismatches ({time.perf_counter() - started:.1f}s)")
+        sys.exit(1 if mismatches else 0)
+
+    count = rebuild_rollups()
+    print(f"Rebuilt {count} rollups ({time.perf_counter() - started:.1f}s)")
+
+if __name__ == "__main__":
+    main()
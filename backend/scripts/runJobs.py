@@ -0,0 +1,50 @@
+"""Run the queued training and report jobs in a dedicated process.
+
+Web workers only store jobs in MongoDB; this process claims them one at a
+time, runs them on its own process pool and renews their lease while they
+run. A job whose runner died is queued again once its lease runs out, or
+failed after JOB_MAX_ATTEMPTS starts. The gunicorn master starts one runner
+next to its workers (config/gunicornConfig.py); with any other server run it
+from the backend directory, on the host that receives the uploads and
+serves the reports:
+
+    python -m scripts.runJobs [--once]
+"""
+import argparse
+import os
+import signal
+import time
+from services.trainingJobs import training_jobs
+from services.reportJobs import report_jobs
+from services.metrics import start_snapshot_writer
+
+QUEUES = [training_jobs, report_jobs]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--once", action="store_true", help="run the queued jobs and exit")
+    parser.add_argument("--parent", type=int, help="exit, with the pool workers, once this process is gone")
+    args = parser.parse_args()
+
+    if args.once:
+        for job_queue in QUEUES:
+            started = time.perf_counter()
+            count = job_queue.run_pending()
+            print(f"Ran {count} {job_queue.name} jobs in {time.perf_counter() - started:.2f}s")
+        return
+
+    for job_queue in QUEUES:
+        job_queue.start()
+    # Report render timings reach /metrics through METRICS_DIR
+    start_snapshot_writer()
+    # The runner threads are daemons; keep the process alive until it is stopped
+    while True:
+        time.sleep(5)
+        if args.parent and os.getppid() != args.parent:
+            # The master was killed without stopping us; take the process group down
+            # (started with its own session by services.jobRunnerProcess)
+            print(f"Parent {args.parent} is gone, stopping the job runner")
+            os.killpg(os.getpgrp(), signal.SIGTERM)
+
+if __name__ == "__main__":
+    main()
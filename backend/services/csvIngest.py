@@ -0,0 +1,172 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = int(os.getenv("TRAINING_CSV_CHUNK_ROWS", 100000))
+# Set to a directory to spill ingested columns to disk instead of keeping them in memory
+SPILL_DIR = os.getenv("TRAINING_SPILL_DIR")
+
+NUMERIC_COLUMNS = ["Temperature", "Humidity", "SquareFootage", "Occupancy", "RenewableEnergy", "EnergyConsumption"]
+
+CATEGORICAL_ENCODINGS = {
+    "HVACUsage": {"On": 1, "Off": 0},
+    "LightingUsage": {"On": 1, "Off": 0},
+    "Holiday": {"Yes": 1, "No": 0},
+    "DayOfWeek": {
+        "Sunday": 0, "Monday": 1, "Tuesday": 2, "Wednesday": 3,
+        "Thursday": 4, "Friday": 5, "Saturday": 6
+    }
+}
+
+def _encode_chunk(chunk, columns, first_row):
+    """Turn one raw CSV chunk into float32 columns in `columns` order plus int64 timestamps."""
+    missing = [col for col in ["Timestamp"] + columns if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {missing}")
+
+    encoded = {}
+    for col in columns:
+        if col in CATEGORICAL_ENCODINGS:
+            values = chunk[col].map(CATEGORICAL_ENCODINGS[col]).astype(np.float32)
+            if col == "DayOfWeek":
+                # Unknown day names fall back to Sunday
+                values = values.fillna(0) / 6.0
+            elif values.isna().any():
+                bad = chunk[col][values.isna()].unique()[:5]
+                raise ValueError(
+                    f"Unexpected {col} values {list(bad)} in rows {first_row}-{first_row + len(chunk) - 1}"
+                )
+            encoded[col] = values.to_numpy(dtype=np.float32)
+        else:
+            encoded[col] = chunk[col].to_numpy(dtype=np.float32)
+
+    timestamps = pd.to_datetime(chunk["Timestamp"]).to_numpy(dtype="datetime64[ns]").view(np.int64)
+    return timestamps, encoded
+
+def _scale_in_place(data, n_features, energy_scaler, scaler):
+    """Apply fitted MinMax scalers to the feature and target columns of `data`, one column at a time."""
+    feature_min = np.asarray(scaler.min_).reshape(-1)
+    feature_scale = np.asarray(scaler.scale_).reshape(-1)
+    for j in range(n_features):
+        column = data[:, j]
+        column *= feature_scale[j]
+        column += feature_min[j]
+    target = data[:, n_features]
+    target *= np.asarray(energy_scaler.scale_).reshape(-1)[0]
+    target += np.asarray(energy_scaler.min_).reshape(-1)[0]
+
+def scale_training_frame(df, feature_columns, target_column, energy_scaler=None, scaler=None):
+    """Scale an unscaled frame from load_training_frame, fitting new scalers unless given."""
+    if scaler is None or energy_scaler is None:
+        from sklearn.preprocessing import MinMaxScaler
+
+        scaler = MinMaxScaler().fit(df[feature_columns].to_numpy())
+        energy_scaler = MinMaxScaler().fit(df[[target_column]].to_numpy())
+
+    data = np.asfortranarray(df[feature_columns + [target_column]].to_numpy(dtype=np.float32))
+    _scale_in_place(data, len(feature_columns), energy_scaler, scaler)
+
+    scaled = pd.DataFrame(data, index=df.index, columns=feature_columns + [target_column], copy=False)
+    scaled.attrs.update(df.attrs)
+    return scaled, energy_scaler, scaler
+
+def load_training_frame(csv_path, feature_columns, target_column, energy_scaler=None, scaler=None,
+                        chunk_rows=CHUNK_ROWS, spill_dir=SPILL_DIR, scale=True):
+    """Read a training CSV in chunks into a compact, scaled float32 frame.
+
+    Categorical columns are encoded while reading and the scalers are fitted
+    with partial_fit, so only one raw chunk is held at a time. Encoded columns
+    either accumulate as float32 arrays or, with `spill_dir`, are appended to
+    per-column files that end up as one column-major memory-mapped matrix.
+    The frame is indexed by Timestamp and scaled in place; pass existing
+    scalers to reuse them instead of fitting new ones, or `scale=False` to get
+    the encoded values unscaled (and no scalers) for further aggregation.
+    """
+    columns = feature_columns + [target_column]
+    categorical = [col for col in columns if col in CATEGORICAL_ENCODINGS]
+    dtypes = {col: "float32" for col in columns if col in NUMERIC_COLUMNS}
+    dtypes.update({col: "category" for col in categorical})
+
+    fit_scalers = scale and (scaler is None or energy_scaler is None)
+    if fit_scalers:
+        from sklearn.preprocessing import MinMaxScaler
+
+        scaler, energy_scaler = MinMaxScaler(), MinMaxScaler()
+
+    work_dir = tempfile.mkdtemp(dir=spill_dir) if spill_dir else None
+    column_files = {col: open(os.path.join(work_dir, f"{col}.f32"), "wb") for col in columns} if work_dir else None
+    column_chunks = {col: [] for col in columns}
+    timestamp_chunks = []
+    rows = 0
+
+    try:
+        reader = pd.read_csv(
+            csv_path,
+            usecols=lambda col: col == "Timestamp" or col in columns,
+            dtype=dtypes,
+            chunksize=chunk_rows
+        )
+        for chunk in reader:
+            timestamps, encoded = _encode_chunk(chunk, columns, rows)
+            timestamp_chunks.append(timestamps)
+
+            if fit_scalers:
+                scaler.partial_fit(np.column_stack([encoded[col] for col in feature_columns]))
+                energy_scaler.partial_fit(encoded[target_column].reshape(-1, 1))
+
+            for col in columns:
+                if column_files:
+                    column_files[col].write(encoded[col].tobytes())
+                else:
+                    column_chunks[col].append(encoded[col])
+            rows += len(chunk)
+    except Exception:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+    finally:
+        if column_files:
+            for f in column_files.values():
+                f.close()
+
+    if rows == 0:
+        raise ValueError("CSV contains no rows")
+
+    # Column-major, so every column is one contiguous run in memory or on disk
+    if work_dir:
+        data_path = os.path.join(work_dir, "data.f32")
+        with open(data_path, "wb") as out:
+            for col in columns:
+                with open(os.path.join(work_dir, f"{col}.f32"), "rb") as f:
+                    shutil.copyfileobj(f, out)
+                os.remove(os.path.join(work_dir, f"{col}.f32"))
+        data = np.memmap(data_path, dtype=np.float32, mode="r+", shape=(rows, len(columns)), order="F")
+    else:
+        data = np.empty((rows, len(columns)), dtype=np.float32, order="F")
+        for j, col in enumerate(columns):
+            np.concatenate(column_chunks[col], out=data[:, j])
+            column_chunks[col] = None
+
+    if scale:
+        _scale_in_place(data, len(feature_columns), energy_scaler, scaler)
+
+    timestamps = np.concatenate(timestamp_chunks)
+    if (np.diff(timestamps) < 0).any():
+        # Out-of-order exports need one reordered copy; sorted ones keep the memory map
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = timestamps[order]
+        data = np.asfortranarray(data[order])
+
+    index = pd.DatetimeIndex(timestamps.view("datetime64[ns]"), name="Timestamp")
+    df = pd.DataFrame(data, index=index, columns=columns, copy=False)
+    df.attrs["spill_dir"] = work_dir
+
+    return df, energy_scaler, scaler
+
+def release_training_frame(df):
+    """Delete the spill files behind a frame returned by load_training_frame."""
+    work_dir = df.attrs.get("spill_dir")
+    if work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
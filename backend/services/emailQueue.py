@@ -0,0 +1,192 @@
+import os
+import random
+import socket
+import smtplib
+import datetime
+import threading
+from bson import ObjectId
+from flask_mail import Mail, Message
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from config.db import get_db
+
+# Outbound mail is stored in the `email_outbox` collection and sent by
+# background threads, so requests never wait on the SMTP server. Any process
+# running the workers (web workers, scripts.drainEmailQueue) may send any message.
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", 1))
+# Messages sent over one SMTP connection before it is recycled
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", 20))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", 6))
+# Retry n waits EMAIL_RETRY_BASE_SECONDS * 2^(n-1), capped, with jitter
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", 30))
+EMAIL_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", 3600))
+# How often idle workers look for retries and mail queued by other processes
+EMAIL_POLL_SECONDS = float(os.getenv("EMAIL_POLL_SECONDS", 5))
+# A message claimed by a worker that died is picked up again after this
+EMAIL_LEASE_SECONDS = float(os.getenv("EMAIL_LEASE_SECONDS", 120))
+
+# Message states as stored in `email_outbox`
+QUEUED = "queued"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+# The server refused or dropped the connection: nothing else in the batch can go out
+CONNECTION_ERRORS = (smtplib.SMTPConnectError, smtplib.SMTPServerDisconnected,
+                     smtplib.SMTPAuthenticationError, socket.error)
+
+mail = Mail()
+
+_app = None
+_workers = []
+_wakeup = threading.Event()
+_lock = threading.Lock()
+
+def init_email_queue(app):
+    """Remember the app whose mail settings the workers send with."""
+    global _app
+    _app = app
+
+def start_email_workers():
+    """Start the sending threads of this process if they are not running."""
+    if _app is None:
+        raise RuntimeError("init_email_queue has not been called")
+    with _lock:
+        _workers[:] = [thread for thread in _workers if thread.is_alive()]
+        while len(_workers) < EMAIL_WORKERS:
+            thread = threading.Thread(target=_run_worker, name="email-worker", daemon=True)
+            thread.start()
+            _workers.append(thread)
+
+def enqueue_email(recipients, subject, html, sender=None, kind=None, start_workers=True):
+    """Store a message for the workers to send and return its id."""
+    now = datetime.datetime.now()
+    email_id = get_db().email_outbox.insert_one({
+        "recipients": list(recipients),
+        "subject": subject,
+        "html": html,
+        "sender": sender,
+        "kind": kind,
+        "status": QUEUED,
+        "attempts": 0,
+        "next_attempt_at": now,
+        "locked_until": None,
+        "created_at": now,
+        "sent_at": None,
+        "last_error": None
+    }).inserted_id
+
+    if start_workers:
+        start_email_workers()
+        _wakeup.set()
+    return str(email_id)
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt of a message that failed `attempts` times."""
+    delay = min(EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), EMAIL_RETRY_MAX_SECONDS)
+    # Jitter keeps messages that failed together from retrying together
+    return delay * random.uniform(0.8, 1.2)
+
+def claim_batch(db, limit=EMAIL_BATCH_SIZE):
+    """Atomically lease up to `limit` due messages to this worker.
+
+    Each claim counts as an attempt, so a message whose send keeps killing
+    its worker (and so never records a failure) still runs out of attempts.
+    """
+    batch = []
+    now = datetime.datetime.now()
+    expired = {"status": SENDING, "locked_until": {"$lt": now}}
+    db.email_outbox.update_many(
+        {**expired, "attempts": {"$gte": EMAIL_MAX_ATTEMPTS}},
+        {"$set": {"status": FAILED, "locked_until": None,
+                  "last_error": "The worker stopped while sending this message"}}
+    )
+    due = {"$or": [
+        {"status": QUEUED, "next_attempt_at": {"$lte": now}},
+        {**expired, "attempts": {"$lt": EMAIL_MAX_ATTEMPTS}}
+    ]}
+    lease = {"$set": {"status": SENDING, "locked_until": now + datetime.timedelta(seconds=EMAIL_LEASE_SECONDS)},
+             "$inc": {"attempts": 1}}
+    while len(batch) < limit:
+        doc = db.email_outbox.find_one_and_update(due, lease, sort=[("next_attempt_at", 1)],
+                                                  return_document=ReturnDocument.AFTER)
+        if doc is None:
+            break
+        batch.append(doc)
+    return batch
+
+def _record_failure(db, doc, error):
+    # Already counted when the message was claimed
+    attempts = doc["attempts"]
+    update = {"last_error": str(error), "locked_until": None}
+    if attempts >= EMAIL_MAX_ATTEMPTS:
+        update["status"] = FAILED
+    else:
+        update["status"] = QUEUED
+        update["next_attempt_at"] = datetime.datetime.now() + datetime.timedelta(seconds=retry_delay(attempts))
+    db.email_outbox.update_one({"_id": doc["_id"]}, {"$set": update})
+
+def _message(doc):
+    msg = Message(doc["subject"], sender=doc.get("sender"), recipients=doc["recipients"])
+    msg.html = doc["html"]
+    return msg
+
+def send_batch(db, batch):
+    """Send claimed messages over one SMTP connection; returns how many went out."""
+    sent = 0
+    pending = list(batch)
+    try:
+        with mail.connect() as connection:
+            while pending:
+                doc = pending[0]
+                try:
+                    connection.send(_message(doc))
+                except CONNECTION_ERRORS:
+                    raise
+                except Exception as e:
+                    # Rejected by the server (bad recipient, ...): only this message is retried
+                    pending.pop(0)
+                    _record_failure(db, doc, e)
+                    continue
+                pending.pop(0)
+                db.email_outbox.update_one(
+                    {"_id": doc["_id"]},
+                    {"$set": {"status": SENT, "sent_at": datetime.datetime.now(), "locked_until": None}}
+                )
+                sent += 1
+    except Exception as e:
+        print(f"Error sending email batch: {str(e)}")
+        for doc in pending:
+            _record_failure(db, doc, e)
+    return sent
+
+def drain(db=None, max_batches=None):
+    """Send due messages batch by batch until none are left; returns how many were sent."""
+    db = db if db is not None else get_db()
+    sent = batches = 0
+    while max_batches is None or batches < max_batches:
+        batch = claim_batch(db)
+        if not batch:
+            break
+        sent += send_batch(db, batch)
+        batches += 1
+    return sent
+
+def _run_worker():
+    with _app.app_context():
+        while True:
+            try:
+                drain()
+            except PyMongoError as e:
+                print(f"Error draining email queue: {str(e)}")
+            # Woken early by enqueue_email; the clear happens before the next drain reads the queue
+            _wakeup.wait(EMAIL_POLL_SECONDS)
+            _wakeup.clear()
+
+def get_email(email_id):
+    """Delivery state of one queued message, or None."""
+    doc = get_db().email_outbox.find_one({"_id": ObjectId(email_id)}, {"html": 0})
+    if doc is None:
+        return None
+    doc["_id"] = str(doc["_id"])
+    return doc
@@ -0,0 +1,61 @@
+import os
+import hashlib
+import numpy as np
+from models.modelRegistry import registry
+from services.ttlCache import TTLCache
+
+FORECAST_CACHE_MAX_ENTRIES = int(os.getenv("FORECAST_CACHE_MAX_ENTRIES", 1024))
+FORECAST_CACHE_MAX_BYTES = int(os.getenv("FORECAST_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+FORECAST_CACHE_TTL_SECONDS = float(os.getenv("FORECAST_CACHE_TTL_SECONDS", 600))
+
+def forecast_key(site_id, version, future_dates, features):
+    """Hash of the model version and the normalized forecast inputs.
+
+    Timestamps are hashed as int64 nanoseconds and features as the encoded
+    float64 matrix, so differently formatted but equal requests share a key.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{site_id}\0{version}\0".encode())
+    digest.update(np.ascontiguousarray(future_dates.as_unit("ns").asi8).tobytes())
+    matrix = np.ascontiguousarray(np.asarray(features, dtype=np.float64))
+    digest.update(str(matrix.shape).encode())
+    digest.update(matrix.tobytes())
+    return digest.hexdigest()
+
+def _arrays_nbytes(arrays):
+    return sum(value.nbytes for value in arrays)
+
+class ForecastCache(TTLCache):
+    """TTLCache of forecast arrays, bounded by entries and bytes, grouped by site.
+
+    Entries are dropped per site whenever the registry saves or loads that
+    site's model. A result computed against a model that was replaced while
+    it ran is not stored: `get` hands out the site's generation and `put`
+    only accepts results from the current one.
+    """
+
+    def __init__(self, max_entries=FORECAST_CACHE_MAX_ENTRIES, max_bytes=FORECAST_CACHE_MAX_BYTES,
+                 ttl=FORECAST_CACHE_TTL_SECONDS):
+        super().__init__(max_entries, ttl, max_bytes=max_bytes, sizeof=_arrays_nbytes)
+
+    def get(self, key, site_id):
+        """Return (arrays or None, generation to pass back to put)."""
+        generation = self.generation(site_id)
+        return super().get(key), generation
+
+    def put(self, key, site_id, arrays, generation):
+        arrays = tuple(np.array(value) for value in arrays)
+        for value in arrays:
+            value.setflags(write=False)  # shared between requests
+        super().put(key, arrays, generation, group=site_id)
+
+    def invalidate(self, site_id=None):
+        """Forget one site's forecasts, or everything."""
+        if site_id is None:
+            super().invalidate()
+        else:
+            self.invalidate_group(site_id)
+
+forecast_cache = ForecastCache()
+# A saved or reloaded model makes every cached forecast of that site stale
+registry.add_listener(forecast_cache.invalidate)
@@ -0,0 +1,209 @@
+import csv
+import io
+import os
+import time
+import zlib
+import datetime
+import tempfile
+import pandas as pd
+from config.db import get_db
+from models.forecastDocument import forecast_entries, projection_fields
+from services.sarimaxTrainer import FEATURE_COLUMNS
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 200))
+CSV_CHUNK_BYTES = 64 * 1024
+
+# Columnar exports: rows per Parquet row group / Arrow record batch bound the memory used
+EXPORT_ROW_GROUP_ROWS = int(os.getenv("EXPORT_ROW_GROUP_ROWS", 100000))
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(tempfile.gettempdir(), "energauge_exports"))
+EXPORT_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+CSV_HEADER = ["Timestamp", "Forecast Energy", "Energy Savings", "Peak Load"] + FEATURE_COLUMNS
+
+def export_filter(user_id=None, start=None, end=None):
+    """Query for the forecasts of one user (or everyone) made in [start, end)."""
+    query = {} if user_id is None else {"user_id": user_id}
+    timestamp = {}
+    if start is not None:
+        timestamp["$gte"] = start
+    if end is not None:
+        timestamp["$lt"] = end
+    if timestamp:
+        query["timestamp"] = timestamp
+    return query
+
+def export_cursor(query, batch_size=EXPORT_BATCH_SIZE, db=None, fields=("user_id", "timestamp", "forecast_data")):
+    """Cursor over matching forecasts in creation order, fetched `batch_size` documents at a time."""
+    db = db if db is not None else get_db()
+    projection = {field: 1 for field in projection_fields(fields)}
+    projection.setdefault("_id", 0)
+    return (db.forecasts.find(query, projection)
+            .sort([("timestamp", 1), ("_id", 1)])
+            .batch_size(batch_size))
+
+def forecast_csv_rows(forecasts):
+    """One CSV row per forecast entry, with each feature contribution in its own column."""
+    for forecast in forecasts:
+        for entry in forecast_entries(forecast):
+            contributions = entry.get("feature_contributions", {})
+            yield [
+                entry.get("timestamp"),
+                entry.get("forecast_energy", 0),
+                entry.get("energy_savings", 0),
+                entry.get("peak_load", 0)
+            ] + [contributions.get(feat, "") for feat in FEATURE_COLUMNS]
+
+def stream_csv(forecasts, compress=False, chunk_bytes=CSV_CHUNK_BYTES):
+    """Yield the CSV export as byte chunks of about `chunk_bytes`, gzipped on the fly if asked.
+
+    Only one chunk is held in memory, so the first bytes leave before the
+    cursor is exhausted and memory does not grow with the history.
+    """
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    writer.writerow(CSV_HEADER)
+    for row in forecast_csv_rows(forecasts):
+        writer.writerow(row)
+        if buffer.tell() >= chunk_bytes:
+            chunk = flush()
+            if chunk:
+                yield chunk
+
+    tail = flush()
+    if compressor:
+        tail += compressor.flush()
+    if tail:
+        yield tail
+
+def export_schema():
+    """Typed columns of the columnar export, one row per forecast entry."""
+    import pyarrow as pa
+
+    fields = [
+        ("forecast_id", pa.string()),
+        ("user_id", pa.string()),
+        ("site_id", pa.string()),
+        ("scenario", pa.string()),
+        ("created_at", pa.timestamp("ms")),
+        ("timestamp", pa.timestamp("us")),
+        ("forecast_energy", pa.float64()),
+        ("energy_savings", pa.float64()),
+        ("peak_load", pa.float64())
+    ]
+    fields += [(feat, pa.float64()) for feat in FEATURE_COLUMNS]
+    return pa.schema(fields)
+
+def _empty_columns(schema):
+    return {name: [] for name in schema.names}
+
+def _column_batches(forecasts, schema, row_group_rows):
+    """Yield dicts of column lists holding at most `row_group_rows` entries each."""
+    columns = _empty_columns(schema)
+    rows = 0
+    for forecast in forecasts:
+        forecast_id = str(forecast["_id"])
+        user_id = str(forecast.get("user_id"))
+        site_id = forecast.get("site_id")
+        scenario = forecast.get("scenario")
+        created_at = forecast.get("timestamp")
+        for entry in forecast_entries(forecast):
+            contributions = entry.get("feature_contributions", {})
+            columns["forecast_id"].append(forecast_id)
+            columns["user_id"].append(user_id)
+            columns["site_id"].append(site_id)
+            columns["scenario"].append(scenario)
+            columns["created_at"].append(created_at)
+            columns["timestamp"].append(entry.get("timestamp"))
+            columns["forecast_energy"].append(entry.get("forecast_energy"))
+            columns["energy_savings"].append(entry.get("energy_savings"))
+            columns["peak_load"].append(entry.get("peak_load"))
+            for feat in FEATURE_COLUMNS:
+                columns[feat].append(contributions.get(feat))
+            rows += 1
+            if rows >= row_group_rows:
+                yield columns
+                columns = _empty_columns(schema)
+                rows = 0
+    if rows:
+        yield columns
+
+def _to_table(columns, schema):
+    import pyarrow as pa
+
+    # Entry timestamps are stored as ISO strings; unparseable ones become nulls
+    # (offsets are normalized through UTC, naive values keep their wall time)
+    stamps = pd.to_datetime(pd.Series(columns["timestamp"], dtype=object), errors="coerce", utc=True)
+    stamps = stamps.dt.tz_convert(None)
+    arrays = []
+    for field in schema:
+        if field.name == "timestamp":
+            arrays.append(pa.Array.from_pandas(stamps).cast(field.type, safe=False))
+        else:
+            arrays.append(pa.array(columns[field.name], type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def export_columnar(path, fmt="parquet", user_id=None, start=None, end=None,
+                    row_group_rows=EXPORT_ROW_GROUP_ROWS, batch_size=EXPORT_BATCH_SIZE, db=None):
+    """Write matching forecast history to a Parquet or Arrow IPC file and return throughput stats.
+
+    Entries are collected into one row group at a time and written out before
+    the next one is read, so memory stays bounded by `row_group_rows`.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {sorted(EXPORT_FORMATS)}")
+
+    started = time.perf_counter()
+    schema = export_schema()
+    query = export_filter(user_id, start, end)
+    forecasts = export_cursor(query, batch_size, db,
+                              fields=("_id", "user_id", "site_id", "scenario", "timestamp", "forecast_data"))
+
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(path, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(path, schema)
+
+    rows = row_groups = 0
+    try:
+        for columns in _column_batches(forecasts, schema, row_group_rows):
+            table = _to_table(columns, schema)
+            writer.write_table(table)
+            rows += table.num_rows
+            row_groups += 1
+    finally:
+        writer.close()
+        forecasts.close()
+
+    seconds = time.perf_counter() - started
+    size = os.path.getsize(path)
+    return {
+        "format": fmt,
+        "filters": {
+            "user_id": str(user_id) if user_id is not None else None,
+            "from": start.isoformat() if start else None,
+            "to": end.isoformat() if end else None
+        },
+        "rows": rows,
+        "row_groups": row_groups,
+        "bytes": size,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds, 1) if seconds else None,
+        "mb_per_second": round(size / 1e6 / seconds, 2) if seconds else None
+    }
+
+def record_export(stats, requested_by, db=None):
+    """Keep the throughput stats of a bulk export in the `exports` collection."""
+    db = db if db is not None else get_db()
+    db.exports.insert_one(dict(stats, requested_by=requested_by, finished_at=datetime.datetime.now()))
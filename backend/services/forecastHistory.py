@@ -0,0 +1,123 @@
+import base64
+import datetime
+import json
+from bson import ObjectId
+from config.db import get_db
+from models.forecastDocument import with_forecast_data
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def _flag(value, default=False):
+    if value is None:
+        return default
+    return str(value).lower() in ("1", "true", "yes")
+
+def parse_time(value):
+    """Parse an ISO-8601 query value into the naive local time forecasts are stored in."""
+    parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+def encode_cursor(doc):
+    """Opaque keyset cursor pointing just past `doc` in (timestamp, _id) order."""
+    payload = json.dumps({"t": doc["timestamp"].isoformat(), "id": str(doc["_id"])})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(token):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return datetime.datetime.fromisoformat(payload["t"]), ObjectId(payload["id"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def parse_history_args(args, default_order="asc"):
+    """Paging options shared by the forecast listings.
+
+    page_size (capped at MAX_PAGE_SIZE), cursor (the previous page's
+    next_cursor), from/to (timestamp range, `to` exclusive), order (asc or
+    desc, `default_order` when absent) and include_forecast_data (false drops
+    the forecast_data arrays).
+    """
+    order = args.get("order", default_order)
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be 'asc' or 'desc'")
+
+    page_size = args.get("page_size", DEFAULT_PAGE_SIZE)
+    try:
+        page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise ValueError("page_size must be an integer")
+
+    try:
+        start = parse_time(args["from"]) if args.get("from") else None
+        end = parse_time(args["to"]) if args.get("to") else None
+    except ValueError:
+        raise ValueError("from and to must be ISO-8601 timestamps")
+
+    return {
+        "page_size": page_size,
+        "cursor": decode_cursor(args["cursor"]) if args.get("cursor") else None,
+        "start": start,
+        "end": end,
+        "descending": order == "desc",
+        "include_data": _flag(args.get("include_forecast_data"), default=True)
+    }
+
+def history_match(base_filter, params):
+    """Filter for one page: the time range plus the keyset condition after the cursor.
+
+    The cursor bound is a range on `timestamp` and only ties are resolved on
+    `_id`, so a compound index ending in (timestamp, _id) seeks straight to
+    the page however deep it is.
+    """
+    match = dict(base_filter)
+    timestamp = {}
+    if params["start"] is not None:
+        timestamp["$gte"] = params["start"]
+    if params["end"] is not None:
+        timestamp["$lt"] = params["end"]
+
+    if params["cursor"] is not None:
+        last_time, last_id = params["cursor"]
+        if params["descending"]:
+            timestamp["$lte"] = last_time
+            match["$or"] = [{"timestamp": {"$lt": last_time}}, {"_id": {"$lt": last_id}}]
+        else:
+            timestamp["$gte"] = max(last_time, params["start"]) if params["start"] is not None else last_time
+            match["$or"] = [{"timestamp": {"$gt": last_time}}, {"_id": {"$gt": last_id}}]
+
+    if timestamp:
+        match["timestamp"] = timestamp
+    return match
+
+def history_sort(params):
+    direction = -1 if params["descending"] else 1
+    return [("timestamp", direction), ("_id", direction)]
+
+def finish_page(docs, params):
+    """Trim the look-ahead document and return (page, next_cursor)."""
+    if len(docs) <= params["page_size"]:
+        return docs, None
+    page = docs[:params["page_size"]]
+    return page, encode_cursor(page[-1])
+
+def list_user_forecasts(user_id, params, db=None):
+    """One page of a user's forecasts and the cursor of the next page."""
+    db = db if db is not None else get_db()
+    projection = {"_id": 1, "timestamp": 1}
+    if params["include_data"]:
+        projection.update({"forecast_data": 1, "series": 1})
+
+    cursor = (db.forecasts.find(history_match({"user_id": user_id}, params), projection)
+              .sort(history_sort(params))
+              .limit(params["page_size"] + 1))
+    forecasts, next_cursor = finish_page(list(cursor), params)
+
+    for forecast in forecasts:
+        with_forecast_data(forecast)
+        forecast["_id"] = str(forecast["_id"])
+        # Ensure timestamp is in ISO format
+        forecast["timestamp"] = forecast["timestamp"].isoformat() if isinstance(forecast["timestamp"], datetime.datetime) else str(forecast["timestamp"])
+    return forecasts, next_cursor
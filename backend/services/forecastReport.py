@@ -0,0 +1,121 @@
+import os
+import time
+import tempfile
+from bson import ObjectId
+from config.db import get_db
+from models.forecastDocument import forecast_entries
+from services.forecastExport import export_cursor, export_filter
+from services.sarimaxTrainer import FEATURE_COLUMNS
+
+REPORT_DIR = os.getenv("REPORT_DIR", os.path.join(tempfile.gettempdir(), "energauge_reports"))
+
+# Rows per table; platypus splits tables across pages, smaller ones split much faster
+TABLE_ROWS = 200
+
+def history_version(user_id, db=None):
+    """Version of a user's forecast history: changes whenever a forecast is added or removed."""
+    db = db if db is not None else get_db()
+    query = {"user_id": user_id}
+    count = db.forecasts.count_documents(query)
+    if not count:
+        return None
+    latest = next(db.forecasts.find(query, {"_id": 1}).sort([("timestamp", -1), ("_id", -1)]).limit(1))
+    return f"{count}-{latest['_id']}"
+
+def report_path(user_id, version):
+    """Cache location of the PDF report of one history version."""
+    return os.path.join(REPORT_DIR, str(user_id), f"{version}.pdf")
+
+def _forecast_tables(forecast, styles):
+    """Heading and tables of one forecast's entries, TABLE_ROWS rows per table."""
+    from reportlab.platypus import Paragraph, Table, TableStyle, Spacer
+    from reportlab.lib import colors
+
+    created = forecast.get("timestamp")
+    title = f"Forecast made {created:%Y-%m-%d %H:%M}" if created else "Forecast"
+    if forecast.get("site_id"):
+        title += f" - site {forecast['site_id']}"
+    flowables = [Paragraph(title, styles["Heading3"])]
+
+    header = ["Timestamp", "Energy", "Savings", "Peak Load"] + FEATURE_COLUMNS
+    style = TableStyle([
+        ("FONT", (0, 0), (-1, -1), "Helvetica", 6.5),
+        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold", 6.5),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#2c3e50")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f2f4f5")]),
+        ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#bdc3c7")),
+    ])
+
+    rows = []
+    for entry in forecast_entries(forecast):
+        contributions = entry.get("feature_contributions", {})
+        rows.append([
+            entry.get("timestamp", ""),
+            entry.get("forecast_energy", ""),
+            entry.get("energy_savings", ""),
+            entry.get("peak_load", "")
+        ] + [contributions.get(feat, "") for feat in FEATURE_COLUMNS])
+
+    for start in range(0, len(rows), TABLE_ROWS):
+        # repeatRows keeps the header on every page a table spills onto
+        flowables.append(Table([header] + rows[start:start + TABLE_ROWS], style=style, repeatRows=1))
+    flowables.append(Spacer(1, 12))
+    return flowables
+
+def render_report(user_id, version, path):
+    """Render a user's forecast history to `path` and return render timings.
+
+    Runs in the report worker process. Each page's render time is taken
+    between consecutive page callbacks.
+    """
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph
+
+    user_id = ObjectId(user_id)
+    styles = getSampleStyleSheet()
+    story = [
+        Paragraph("Forecast Data", styles["Title"]),
+        Paragraph(f"User ID: {user_id}", styles["Normal"])
+    ]
+    for forecast in export_cursor(export_filter(user_id), fields=("timestamp", "site_id", "forecast_data")):
+        story.extend(_forecast_tables(forecast, styles))
+
+    page_starts = []
+
+    def on_page(canvas, doc):
+        page_starts.append(time.perf_counter())
+        canvas.setFont("Helvetica", 8)
+        canvas.drawRightString(doc.pagesize[0] - 36, 20, f"Page {doc.page}")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, staging = tempfile.mkstemp(suffix=".pdf", dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        started = time.perf_counter()
+        doc = SimpleDocTemplate(staging, pagesize=landscape(letter), leftMargin=36, rightMargin=36,
+                                topMargin=36, bottomMargin=36, title="Forecast Data")
+        doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
+        finished = time.perf_counter()
+        # Publish atomically so a concurrent download never sees a partial file
+        os.replace(staging, path)
+    finally:
+        if os.path.exists(staging):
+            os.remove(staging)
+
+    # Older versions of this user's report are stale now
+    for name in os.listdir(os.path.dirname(path)):
+        if name.endswith(".pdf") and name != os.path.basename(path):
+            os.remove(os.path.join(os.path.dirname(path), name))
+
+    page_seconds = [end - begin for begin, end in zip(page_starts, page_starts[1:] + [finished])]
+    return {
+        "version": version,
+        "pages": len(page_seconds),
+        "bytes": os.path.getsize(path),
+        "render_seconds": round(finished - started, 3),
+        "mean_page_seconds": round(sum(page_seconds) / len(page_seconds), 4) if page_seconds else 0,
+        "max_page_seconds": round(max(page_seconds), 4) if page_seconds else 0
+    }
@@ -0,0 +1,34 @@
+import numpy as np
+
+def iso_timestamps(dates):
+    """ISO-8601 strings for a DatetimeIndex, matching Timestamp.isoformat()."""
+    # Whole-second naive timestamps (the usual case) are formatted by NumPy in one call.
+    # asi8 counts in the index's own unit: ns for ingested data, us for parsed request strings
+    per_second = np.timedelta64(1, "s") // np.timedelta64(1, dates.unit)
+    if dates.tz is None and not (dates.asi8 % per_second).any():
+        return np.datetime_as_string(dates.values, unit="s").tolist()
+    return [ts.isoformat() for ts in dates]
+
+def build_forecast_data(timestamps, forecast, energy_savings, peak_load, contributions, feature_names):
+    """Build the forecast_data records of one forecast from whole arrays.
+
+    Values are rounded as arrays and turned into Python floats with a single
+    tolist() each, so the only per-row work left is assembling the dicts.
+    `contributions` is a (steps, features) array in `feature_names` order.
+    """
+    forecast = np.round(np.asarray(forecast, dtype=float), 2).tolist()
+    energy_savings = np.round(np.asarray(energy_savings, dtype=float), 2).tolist()
+    contributions = np.round(np.asarray(contributions, dtype=float), 2).tolist()
+    peak_load = round(float(peak_load), 2)
+    feature_names = list(feature_names)
+
+    return [
+        {
+            "timestamp": ts,
+            "forecast_energy": energy,
+            "energy_savings": savings,
+            "peak_load": peak_load,
+            "feature_contributions": dict(zip(feature_names, row))
+        }
+        for ts, energy, savings, row in zip(timestamps, forecast, energy_savings, contributions)
+    ]
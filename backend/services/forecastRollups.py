@@ -0,0 +1,255 @@
+import datetime
+from config.db import get_db
+from models.forecastDocument import forecast_entries
+from services.sarimaxTrainer import FEATURE_COLUMNS
+
+ROLLUP_COLLECTION = "forecast_rollups"
+GLOBAL_ID = "global"
+
+# The user dashboard has never averaged DayOfWeek
+USER_FACTORS = [feat for feat in FEATURE_COLUMNS if feat != "DayOfWeek"]
+WEEKDAYS = [str(day) for day in range(7)]
+
+def user_rollup_id(user_id):
+    return f"user:{user_id}"
+
+def empty_rollup():
+    """Rollup counters in the shape they are stored in `forecast_rollups`."""
+    return {
+        "forecasts": 0,
+        "entries": 0,
+        "energy": 0.0,
+        "savings": 0.0,
+        "peak_sum": 0.0,        # per-forecast peaks, averaged over forecasts by /trends
+        "peak_entry_sum": 0.0,  # per-entry peak_load, averaged over entries by /userforecast
+        "peak_min": None,
+        "peak_max": None,
+        "features": dict.fromkeys(FEATURE_COLUMNS, 0.0),
+        "feature_counts": dict.fromkeys(FEATURE_COLUMNS, 0),
+        "weekday_energy": dict.fromkeys(WEEKDAYS, 0.0),
+        "weekday_entries": dict.fromkeys(WEEKDAYS, 0)
+    }
+
+def forecast_rollup(forecast):
+    """Rollup counters contributed by one forecast document, in either storage layout."""
+    rollup = empty_rollup()
+    rollup["forecasts"] = 1
+    peak = None
+    for entry in forecast_entries(forecast):
+        energy = entry.get("forecast_energy", 0)
+        entry_peak = entry.get("peak_load", 0)
+        rollup["entries"] += 1
+        rollup["energy"] += energy
+        rollup["savings"] += entry.get("energy_savings", 0)
+        rollup["peak_entry_sum"] += entry_peak
+        peak = energy if peak is None else max(peak, energy)
+        rollup["peak_min"] = entry_peak if rollup["peak_min"] is None else min(rollup["peak_min"], entry_peak)
+        rollup["peak_max"] = entry_peak if rollup["peak_max"] is None else max(rollup["peak_max"], entry_peak)
+
+        contributions = entry.get("feature_contributions", {})
+        for feat in FEATURE_COLUMNS:
+            if feat in contributions:
+                rollup["features"][feat] += contributions[feat]
+                rollup["feature_counts"][feat] += 1
+
+        timestamp = entry.get("timestamp")
+        if timestamp:
+            try:
+                weekday = str(datetime.datetime.fromisoformat(timestamp).weekday())
+            except ValueError:
+                continue  # Skip invalid timestamps
+            rollup["weekday_energy"][weekday] += energy
+            rollup["weekday_entries"][weekday] += 1
+
+    # A forecast without entries counts as a zero peak, as on the dashboards
+    rollup["peak_sum"] = peak or 0
+    return rollup
+
+def merge_rollup(total, part):
+    """Add the counters of `part` into `total` in place."""
+    for key in ("forecasts", "entries", "energy", "savings", "peak_sum", "peak_entry_sum"):
+        total[key] += part[key]
+    for key in ("features", "feature_counts", "weekday_energy", "weekday_entries"):
+        for name, value in part[key].items():
+            total[key][name] = total[key].get(name, 0) + value
+    if part["peak_min"] is not None:
+        total["peak_min"] = part["peak_min"] if total["peak_min"] is None else min(total["peak_min"], part["peak_min"])
+    if part["peak_max"] is not None:
+        total["peak_max"] = part["peak_max"] if total["peak_max"] is None else max(total["peak_max"], part["peak_max"])
+    return total
+
+def _update(part):
+    """Atomic $inc/$min/$max update applying a rollup delta to a stored rollup."""
+    increments = {key: part[key] for key in ("forecasts", "entries", "energy", "savings", "peak_sum", "peak_entry_sum")}
+    for key in ("features", "feature_counts", "weekday_energy", "weekday_entries"):
+        increments.update({f"{key}.{name}": value for name, value in part[key].items()})
+
+    update = {"$inc": increments}
+    if part["peak_min"] is not None:
+        update["$min"] = {"peak_min": part["peak_min"]}
+        update["$max"] = {"peak_max": part["peak_max"]}
+    return update
+
+def _stored(rollup):
+    """A rollup ready to write; unset peaks are left out because $min treats null as lowest."""
+    return {key: value for key, value in rollup.items() if value is not None}
+
+def record_forecasts(forecast_entries, db=None):
+    """Fold newly inserted forecast documents into the per-user and global rollups.
+
+    One update per user and one global update, whatever the number of forecasts.
+    """
+    db = db if db is not None else get_db()
+    per_user = {}
+    for forecast in forecast_entries:
+        part = forecast_rollup(forecast)
+        if forecast["user_id"] in per_user:
+            merge_rollup(per_user[forecast["user_id"]], part)
+        else:
+            per_user[forecast["user_id"]] = part
+
+    total = empty_rollup()
+    new_users = 0
+    for user_id, part in per_user.items():
+        update = _update(part)
+        update["$setOnInsert"] = {"user_id": user_id}
+        key = user_rollup_id(user_id)
+        result = db[ROLLUP_COLLECTION].update_one({"_id": key}, update, upsert=True)
+        if result.upserted_id is not None:
+            # A rollup created by this update means a first-time forecaster, unless
+            # they forecast before rollups existed; then start from their full history
+            inserted = part["forecasts"]
+            if db.forecasts.count_documents({"user_id": user_id}, limit=inserted + 1) > inserted:
+                history = rollups_from_history(db, user_id)[key]
+                db[ROLLUP_COLLECTION].replace_one({"_id": key}, _stored(history))
+            new_users += 1
+        merge_rollup(total, part)
+
+    update = _update(total)
+    update["$inc"]["users"] = new_users
+    result = db[ROLLUP_COLLECTION].update_one({"_id": GLOBAL_ID}, update, upsert=True)
+    if result.upserted_id is not None:
+        # Started on an empty history, so it covers every forecast; otherwise
+        # /trends keeps using the aggregation pipeline until rebuild_rollups() runs
+        if db.forecasts.count_documents({}, limit=total["forecasts"] + 1) == total["forecasts"]:
+            db[ROLLUP_COLLECTION].update_one({"_id": GLOBAL_ID}, {"$set": {"complete": True}})
+
+def rollups_from_history(db=None, user_id=None):
+    """Recompute rollups from raw forecasts; returns {rollup _id: rollup}."""
+    db = db if db is not None else get_db()
+    query = {} if user_id is None else {"user_id": user_id}
+    rollups = {}
+    total = empty_rollup()
+    total["users"] = 0
+
+    cursor = db.forecasts.find(query, {"_id": 0, "user_id": 1, "forecast_data": 1, "series": 1},
+                             batch_size=500)
+    for forecast in cursor:
+        part = forecast_rollup(forecast)
+        key = user_rollup_id(forecast["user_id"])
+        if key not in rollups:
+            rollups[key] = dict(empty_rollup(), user_id=forecast["user_id"])
+            total["users"] += 1
+        merge_rollup(rollups[key], part)
+        merge_rollup(total, part)
+
+    if user_id is None:
+        rollups[GLOBAL_ID] = total
+    return rollups
+
+def rebuild_rollups(db=None):
+    """Replace the stored rollups with ones recomputed from raw forecast history.
+
+    Forecasts inserted while this runs can be counted twice or not at all;
+    run it when predictions are quiet, then confirm with check_rollups().
+    """
+    db = db if db is not None else get_db()
+    rollups = rollups_from_history(db)
+    rollups[GLOBAL_ID].update(complete=True, rebuilt_at=datetime.datetime.now())
+    for key, rollup in rollups.items():
+        db[ROLLUP_COLLECTION].replace_one({"_id": key}, _stored(rollup), upsert=True)
+    db[ROLLUP_COLLECTION].delete_many({"_id": {"$nin": list(rollups)}})
+    return len(rollups)
+
+def _flatten(rollup, prefix=""):
+    flat = {}
+    for key, value in rollup.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif key not in ("_id", "user_id", "complete", "rebuilt_at"):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+def check_rollups(db=None, tolerance=0.01):
+    """Compare stored rollups with raw history; returns a list of mismatch descriptions."""
+    db = db if db is not None else get_db()
+    expected = rollups_from_history(db)
+    stored = {doc["_id"]: doc for doc in db[ROLLUP_COLLECTION].find()}
+
+    mismatches = []
+    for key in sorted(set(expected) | set(stored), key=str):
+        if key not in stored or key not in expected:
+            mismatches.append(f"{key}: {'missing' if key not in stored else 'has no forecasts'}")
+            continue
+        want, have = _flatten(expected[key]), _flatten(stored[key])
+        for field, value in want.items():
+            actual = have.get(field)
+            if value is None or actual is None:
+                if value != actual:
+                    mismatches.append(f"{key}.{field}: stored {actual}, expected {value}")
+            elif abs(actual - value) > tolerance * max(1, abs(value)):
+                mismatches.append(f"{key}.{field}: stored {actual}, expected {value}")
+    return mismatches
+
+def global_summary(db=None):
+    """The /trends summary from the global rollup, or None until it covers all history."""
+    db = db if db is not None else get_db()
+    rollup = db[ROLLUP_COLLECTION].find_one({"_id": GLOBAL_ID})
+    if rollup is None or not rollup.get("complete"):
+        return None
+
+    forecasts = rollup.get("forecasts", 0)
+    entries = rollup.get("entries", 0)
+    features = rollup.get("features", {})
+    return {
+        "total_forecasts": forecasts,
+        "total_energy": round(rollup.get("energy", 0), 2),
+        "total_energy_savings": round(rollup.get("savings", 0), 2),
+        "average_peak_load": round(rollup.get("peak_sum", 0) / forecasts, 2) if forecasts else 0,
+        "average_features": {
+            feat: round(features.get(feat, 0) / entries, 2) if entries else 0 for feat in FEATURE_COLUMNS
+        },
+        "total_users_forecasting": rollup.get("users", 0)
+    }
+
+def user_summary(user_id, db=None):
+    """The /userforecast summary of one user, or None if they have no forecasts."""
+    db = db if db is not None else get_db()
+    rollup = db[ROLLUP_COLLECTION].find_one({"_id": user_rollup_id(user_id)})
+    if rollup is None:
+        # Forecasts made before rollups existed; computed on the fly until a rebuild
+        rollup = rollups_from_history(db, user_id).get(user_rollup_id(user_id))
+    if not rollup or not rollup.get("forecasts"):
+        return None
+
+    entries = rollup.get("entries", 0)
+    features = rollup.get("features", {})
+    feature_counts = rollup.get("feature_counts", {})
+    weekday_energy = rollup.get("weekday_energy", {})
+    weekday_entries = rollup.get("weekday_entries", {})
+    return {
+        "total_forecasts": rollup["forecasts"],
+        "total_energy": round(rollup.get("energy", 0), 2),
+        "total_savings": round(rollup.get("savings", 0), 2),
+        "avg_peak_load": round(rollup.get("peak_entry_sum", 0) / entries, 2) if entries else 0,
+        "min_peak_load": round(rollup.get("peak_min") or 0, 2),
+        "max_peak_load": round(rollup.get("peak_max") or 0, 2),
+        "avg_factors": {
+            key: round(features.get(key, 0) / feature_counts[key], 2) if feature_counts.get(key) else 0
+            for key in USER_FACTORS
+        },
+        "energy_by_weekday": {
+            int(day): round(weekday_energy.get(day, 0) / weekday_entries[day], 2) if weekday_entries.get(day) else 0
+            for day in WEEKDAYS
+        }
+    }
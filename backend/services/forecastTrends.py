@@ -0,0 +1,95 @@
+from config.db import get_db
+from models.forecastDocument import with_forecast_data
+from services.forecastHistory import history_match, finish_page
+from services.sarimaxTrainer import FEATURE_COLUMNS
+
+def _values(field, series_field=None):
+    """Array of one entry field, read from `series` for compact forecasts and from forecast_data otherwise."""
+    return {"$ifNull": [f"$series.{series_field or field}", f"$forecast_data.{field}"]}
+
+def _forecast_totals():
+    """$project stage reducing each forecast's forecast_data array to its totals.
+
+    Array-path operators sum the entries in place, so forecasts are never
+    $unwind-ed into one document per timestep.
+    """
+    stage = {
+        "user_id": 1,
+        "energy": {"$sum": _values("forecast_energy")},
+        "savings": {"$sum": _values("energy_savings")},
+        # A forecast without entries counts as a zero peak, as before
+        "peak": {"$ifNull": [{"$max": _values("forecast_energy")}, 0]},
+        "entries": {"$size": {"$ifNull": ["$series.forecast_energy", {"$ifNull": ["$forecast_data", []]}]}}
+    }
+    for feat in FEATURE_COLUMNS:
+        stage[feat] = {"$sum": _values(f"feature_contributions.{feat}", f"contributions.{feat}")}
+    return {"$project": stage}
+
+def trends_summary(db=None):
+    """All-time admin dashboard numbers, aggregated inside MongoDB."""
+    db = db if db is not None else get_db()
+    sums = ["energy", "savings", "peak", "entries"] + FEATURE_COLUMNS
+
+    pipeline = [
+        _forecast_totals(),
+        # Per user first, so forecasters are counted without collecting their ids
+        {"$group": {"_id": "$user_id", "forecasts": {"$sum": 1}, **{key: {"$sum": f"${key}"} for key in sums}}},
+        {"$group": {"_id": None, "users": {"$sum": 1}, "forecasts": {"$sum": "$forecasts"},
+                    **{key: {"$sum": f"${key}"} for key in sums}}}
+    ]
+    totals = next(db.forecasts.aggregate(pipeline, allowDiskUse=True), None) or {}
+
+    forecasts = totals.get("forecasts", 0)
+    entries = totals.get("entries", 0)
+    return {
+        "total_forecasts": forecasts,
+        "total_energy": round(totals.get("energy", 0), 2),
+        "total_energy_savings": round(totals.get("savings", 0), 2),
+        "average_peak_load": round(totals.get("peak", 0) / forecasts, 2) if forecasts else 0,
+        "average_features": {
+            feat: round(totals.get(feat, 0) / entries, 2) if entries else 0 for feat in FEATURE_COLUMNS
+        },
+        "total_users_forecasting": totals.get("users", 0)
+    }
+
+def list_trend_forecasts(params, db=None):
+    """One page of forecasts with their totals and the forecaster's current name.
+
+    `params` comes from forecastHistory.parse_history_args; returns
+    (forecasts, next_cursor).
+    """
+    db = db if db is not None else get_db()
+    direction = -1 if params["descending"] else 1
+
+    project = {
+        "user_id": 1,
+        "timestamp": 1,
+        "first_name": {"$ifNull": [{"$arrayElemAt": ["$user.first_name", 0]}, "Unknown"]},
+        "last_name": {"$ifNull": [{"$arrayElemAt": ["$user.last_name", 0]}, "Unknown"]},
+        "total_forecast_energy": {"$sum": _values("forecast_energy")},
+        "total_energy_savings": {"$sum": _values("energy_savings")},
+        "peak_load": {"$ifNull": [{"$max": _values("forecast_energy")}, 0]}
+    }
+    if params["include_data"]:
+        project.update({"forecast_data": 1, "series": 1})
+
+    pipeline = [
+        {"$match": history_match({}, params)},
+        {"$sort": {"timestamp": direction, "_id": direction}},
+        # One extra document tells whether there is a next page
+        {"$limit": params["page_size"] + 1},
+        {"$lookup": {"from": "users", "localField": "user_id", "foreignField": "_id", "as": "user"}},
+        {"$project": project}
+    ]
+
+    forecasts, next_cursor = finish_page(list(db.forecasts.aggregate(pipeline)), params)
+    for forecast in forecasts:
+        forecast["_id"] = str(forecast["_id"])
+        forecast["user_id"] = str(forecast["user_id"])
+        if forecast.get("timestamp") is not None:
+            forecast["timestamp"] = forecast["timestamp"].isoformat()
+        if params["include_data"]:
+            with_forecast_data(forecast).setdefault("forecast_data", [])
+        for key in ("total_forecast_energy", "total_energy_savings", "peak_load"):
+            forecast[key] = round(forecast[key], 2)
+    return forecasts, next_cursor
@@ -0,0 +1,42 @@
+import os
+import time
+import importlib
+import threading
+
+# Libraries that take most of the boot time; they are imported only inside the
+# functions that use them (training, legacy pickles, reports, columnar export)
+HEAVY_MODULES = [
+    "statsmodels.tsa.statespace.sarimax",
+    "sklearn.preprocessing",
+    "joblib",
+    "reportlab.platypus",
+    "pyarrow.parquet",
+]
+
+# Import them in a background thread once the app is up, so the first training
+# or forecast request does not pay for them
+PRELOAD_HEAVY_IMPORTS = os.getenv("PRELOAD_HEAVY_IMPORTS", "false").lower() in ("1", "true", "yes")
+
+def preload_heavy_modules(modules=HEAVY_MODULES, background=True):
+    """Import the heavy libraries ahead of use and return their import times.
+
+    With `background` the imports run on a daemon thread and nothing is
+    returned; a request importing the same module meanwhile simply waits on
+    Python's per-module import lock.
+    """
+    if background:
+        threading.Thread(target=preload_heavy_modules, args=(modules, False),
+                         name="heavy-imports", daemon=True).start()
+        return None
+
+    timings = {}
+    for name in modules:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            # Optional extras (pyarrow, reportlab) may not be installed
+            print(f"Error preloading {name}: {str(e)}")
+            continue
+        timings[name] = round(time.perf_counter() - started, 3)
+    return timings
@@ -0,0 +1,220 @@
+import os
+import time
+import socket
+import datetime
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from config.db import get_db
+
+# Job states as stored in the job collections
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# A runner renews the lease of its running job every JOB_HEARTBEAT_SECONDS; a job
+# whose lease ran out belongs to a runner that died and is queued again, or
+# failed once it has been started JOB_MAX_ATTEMPTS times
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 90))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", 15))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 2))
+# How often idle runners look for new jobs
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 2))
+
+def runner_id():
+    """Identify this process on the jobs it leases."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class JobQueue:
+    """Jobs stored in a MongoDB collection and run on a spawned process pool.
+
+    Web workers only insert jobs; runner threads (scripts.runJobs) claim them
+    one at a time with find_one_and_update and keep them leased while they
+    run. `tasks` maps the task name stored on a job to the function the pool
+    runs as task(*job["args"]). `prepare_update(job, update)` may adjust the
+    final update before it is written; `on_finish(job, update)` runs side
+    effects once it was, and only if this runner still held the job.
+    """
+
+    def __init__(self, name, collection, tasks, workers=1, prepare_update=None, on_finish=None):
+        self.name = name
+        self.collection = collection
+        self.tasks = tasks
+        self.workers = workers
+        self.prepare_update = prepare_update
+        self.on_finish = on_finish
+        self._executor = None
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._last_recovery = None
+
+    def _jobs(self):
+        return get_db()[self.collection]
+
+    def _get_executor(self):
+        """Create the process pool on first use."""
+        with self._lock:
+            if self._executor is None:
+                # Spawned workers never inherit the runner's Mongo client
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _reset_executor(self):
+        """Drop a broken process pool so the next job gets a new one."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def submit(self, task, args=(), **fields):
+        """Queue `task(*args)` with extra job fields and return the job id."""
+        if task not in self.tasks:
+            raise ValueError(f"Unknown {self.name} task: {task}")
+
+        job_id = ObjectId()
+        job = {
+            "_id": job_id,
+            "status": QUEUED,
+            "task": task,
+            "args": list(args),
+            "attempts": 0,
+            "runner": None,
+            "lease_until": None,
+            "submitted_at": datetime.datetime.now(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None
+        }
+        job.update(fields)
+        self._jobs().insert_one(job)
+        # Only reaches runner threads of this process; others poll
+        self._wakeup.set()
+        return str(job_id)
+
+    def claim(self):
+        """Atomically lease the oldest queued job to this process, or return None."""
+        now = datetime.datetime.now()
+        return self._jobs().find_one_and_update(
+            {"status": QUEUED},
+            {"$set": {"status": RUNNING, "runner": runner_id(), "started_at": now,
+                      "lease_until": now + datetime.timedelta(seconds=JOB_LEASE_SECONDS)},
+             "$inc": {"attempts": 1}},
+            sort=[("submitted_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def recover_expired(self):
+        """Queue again, or fail, running jobs whose runner stopped renewing the lease."""
+        jobs = self._jobs()
+        now = datetime.datetime.now()
+        requeued = failed = 0
+        # A running job without a lease was started before leases existed
+        for job in jobs.find({"status": RUNNING, "$or": [{"lease_until": {"$lt": now}}, {"lease_until": None}]}):
+            expired = {"_id": job["_id"], "status": RUNNING, "lease_until": job.get("lease_until")}
+            if job.get("attempts", 0) < JOB_MAX_ATTEMPTS and job.get("task") in self.tasks:
+                if jobs.update_one(expired, {"$set": {"status": QUEUED, "runner": None, "lease_until": None}}).modified_count:
+                    requeued += 1
+                continue
+
+            update = {"status": FAILED, "lease_until": None, "finished_at": now,
+                      "error": f"The {self.name} runner stopped while running this job"}
+            if self.prepare_update:
+                self.prepare_update(job, update)
+            if jobs.update_one(expired, {"$set": update}).matched_count:
+                failed += 1
+                if self.on_finish:
+                    self.on_finish(job, update)
+        if requeued or failed:
+            print(f"Recovered {self.name} jobs: {requeued} queued again, {failed} failed")
+        self._last_recovery = time.monotonic()
+        return requeued, failed
+
+    def _renew_lease(self, job):
+        try:
+            self._jobs().update_one(
+                {"_id": job["_id"], "runner": job["runner"], "status": RUNNING},
+                {"$set": {"lease_until": datetime.datetime.now() + datetime.timedelta(seconds=JOB_LEASE_SECONDS)}}
+            )
+        except PyMongoError as e:
+            # The task keeps running; the lease is renewed again at the next heartbeat
+            print(f"Error renewing {self.name} job lease: {str(e)}")
+
+    def run(self, job):
+        """Run a claimed job on the pool, renewing its lease, and store the outcome."""
+        started_at = job["started_at"]
+        update = {}
+        try:
+            task = self.tasks.get(job.get("task"))
+            if task is None:
+                raise ValueError(f"Unknown {self.name} task: {job.get('task')}")
+
+            future = self._get_executor().submit(task, *job.get("args", []))
+            while True:
+                try:
+                    result = future.result(timeout=JOB_HEARTBEAT_SECONDS)
+                    break
+                except FutureTimeoutError:
+                    self._renew_lease(job)
+            update = {"status": DONE, "result": result}
+        except BrokenProcessPool as e:
+            # The worker died (e.g. out of memory); start a fresh pool for the next job
+            self._reset_executor()
+            update = {"status": FAILED, "error": f"{self.name.capitalize()} worker crashed: {str(e)}"}
+        except Exception as e:
+            update = {"status": FAILED, "error": str(e)}
+        finally:
+            finished_at = datetime.datetime.now()
+            update.update({
+                "lease_until": None,
+                "finished_at": finished_at,
+                "elapsed_seconds": round((finished_at - started_at).total_seconds(), 3)
+            })
+            if self.prepare_update:
+                self.prepare_update(job, update)
+            # A runner that lost its lease leaves the job, and its upload, to whoever claimed it since
+            if self._jobs().update_one({"_id": job["_id"], "runner": job["runner"]}, {"$set": update}).matched_count:
+                if self.on_finish:
+                    self.on_finish(job, update)
+            else:
+                print(f"Lost the lease of {self.name} job {job['_id']}; its outcome was not stored")
+        return update
+
+    def run_pending(self):
+        """Run queued jobs until none are left; returns how many ran."""
+        # Also how jobs orphaned before this runner started are found
+        if self._last_recovery is None or time.monotonic() - self._last_recovery > JOB_LEASE_SECONDS:
+            self.recover_expired()
+        count = 0
+        while True:
+            job = self.claim()
+            if job is None:
+                return count
+            self.run(job)
+            count += 1
+
+    def _run_forever(self):
+        while True:
+            try:
+                self.run_pending()
+            except PyMongoError as e:
+                print(f"Error running {self.name} jobs: {str(e)}")
+            self._wakeup.wait(JOB_POLL_SECONDS)
+            self._wakeup.clear()
+
+    def start(self):
+        """Start this process's runner threads, one per pool worker, if they are not running."""
+        with self._lock:
+            self._threads[:] = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run_forever, name=f"{self.name}-runner", daemon=True)
+                thread.start()
+                self._threads.append(thread)
@@ -0,0 +1,62 @@
+import os
+import sys
+import signal
+import threading
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JOB_RUNNER_RESTART_SECONDS = float(os.getenv("JOB_RUNNER_RESTART_SECONDS", 5))
+JOB_RUNNER_STOP_SECONDS = float(os.getenv("JOB_RUNNER_STOP_SECONDS", 30))
+
+# gunicorn re-executes its config file on every reload (SIGHUP), so the state
+# of the master's runner lives here, in a module imported once per master
+_runner = None
+_supervisor = None
+_stopping = threading.Event()
+_lock = threading.Lock()
+
+def _signal_runner(sig):
+    # The runner leads its own process group, which also holds its pool workers
+    try:
+        os.killpg(_runner.pid, sig)
+    except ProcessLookupError:
+        pass
+
+def start_job_runner(log):
+    """Keep one scripts.runJobs process running until stop_job_runner; no-op once started."""
+    global _supervisor
+
+    def supervise():
+        global _runner
+        while not _stopping.is_set():
+            with _lock:
+                if _stopping.is_set():
+                    return
+                _runner = subprocess.Popen(
+                    [sys.executable, "-m", "scripts.runJobs", "--parent", str(os.getpid())],
+                    cwd=BACKEND_DIR, start_new_session=True
+                )
+            log.info("Started job runner (pid %s)", _runner.pid)
+            code = _runner.wait()
+            if not _stopping.is_set():
+                # Its running job is queued again once the lease runs out
+                log.warning("Job runner exited with %s, restarting", code)
+                _stopping.wait(JOB_RUNNER_RESTART_SECONDS)
+
+    with _lock:
+        if _supervisor is not None:
+            return
+        _supervisor = threading.Thread(target=supervise, name="job-runner-supervisor", daemon=True)
+        _supervisor.start()
+
+def stop_job_runner():
+    """Stop the runner and its pool workers, and keep it from being restarted."""
+    with _lock:
+        _stopping.set()
+        if _runner is None or _runner.poll() is not None:
+            return
+        _signal_runner(signal.SIGTERM)
+    try:
+        _runner.wait(JOB_RUNNER_STOP_SECONDS)
+    except subprocess.TimeoutExpired:
+        _signal_runner(signal.SIGKILL)
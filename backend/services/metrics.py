@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import bisect
+import tempfile
+import threading
+from contextlib import contextmanager
+from flask import g, has_request_context
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Metrics are kept per process. With several workers, set METRICS_DIR to a
+# directory they share: each worker writes its counts there every
+# METRICS_FLUSH_SECONDS and /metrics adds up every file, including those of
+# workers that have exited, so counters never go backwards.
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", 10))
+
+class Histogram:
+    """Prometheus-style histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # labels -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: [list(counts), total] for labels, (counts, total) in self._series.items()}
+
+def merge_snapshots(snapshots):
+    merged = {}
+    for snapshot in snapshots:
+        for labels, (counts, total) in snapshot.items():
+            if labels not in merged:
+                merged[labels] = [list(counts), total]
+            else:
+                merged[labels][0] = [a + b for a, b in zip(merged[labels][0], counts)]
+                merged[labels][1] += total
+    return merged
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def render_histogram(histogram, series):
+    """Prometheus text exposition of one histogram."""
+    lines = [f"# HELP {histogram.name} {histogram.help_text}", f"# TYPE {histogram.name} histogram"]
+    for labels in sorted(series):
+        counts, total = series[labels]
+        label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(histogram.label_names, labels))
+        prefix = label_text + "," if label_text else ""
+        cumulative = 0
+        for bound, count in zip(list(histogram.buckets) + ["+Inf"], counts):
+            cumulative += count
+            lines.append(f'{histogram.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        lines.append(f"{histogram.name}_sum{{{label_text}}} {total}")
+        lines.append(f"{histogram.name}_count{{{label_text}}} {cumulative}")
+    return lines
+
+request_latency = Histogram("energauge_http_request_duration_seconds",
+                            "Time to handle a request, until its body has been sent", ("method", "route", "status"))
+span_latency = Histogram("energauge_span_duration_seconds",
+                         "Time spent in named sections of the request handlers and jobs", ("span",))
+HISTOGRAMS = [request_latency, span_latency]
+
+def record_span(name, seconds):
+    """Add a timed section to the span histogram and, inside a request, to its Server-Timing."""
+    span_latency.observe((name,), seconds)
+    if has_request_context():
+        spans = g.setdefault("timing_spans", {})
+        spans[name] = spans.get(name, 0.0) + seconds
+
+@contextmanager
+def span(name):
+    """Time the enclosed block as `name`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - started)
+
+def timed_stream(name, chunks):
+    """Pass a streamed body through, timing it as `name` once it has been sent."""
+    started = time.perf_counter()
+    try:
+        yield from chunks
+    finally:
+        # Runs after the response was returned, so this only reaches the histogram
+        span_latency.observe((name,), time.perf_counter() - started)
+
+def _snapshot_path(pid):
+    return os.path.join(METRICS_DIR, f"{pid}.json")
+
+def write_snapshot():
+    """Write this process's counts to METRICS_DIR for the other workers' /metrics."""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    payload = {histogram.name: [[list(labels), series] for labels, series in histogram.snapshot().items()]
+               for histogram in HISTOGRAMS}
+    fd, staging = tempfile.mkstemp(dir=METRICS_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(payload, f)
+    os.replace(staging, _snapshot_path(os.getpid()))
+
+def start_snapshot_writer():
+    """Periodically write this process's snapshot when METRICS_DIR is set."""
+    if not METRICS_DIR:
+        return None
+
+    def write_forever():
+        while True:
+            time.sleep(METRICS_FLUSH_SECONDS)
+            try:
+                write_snapshot()
+            except OSError as e:
+                print(f"Error writing metrics snapshot: {str(e)}")
+
+    thread = threading.Thread(target=write_forever, name="metrics-writer", daemon=True)
+    thread.start()
+    return thread
+
+def _other_snapshots():
+    """{histogram name: [snapshot]} of every other process that wrote to METRICS_DIR."""
+    snapshots = {histogram.name: [] for histogram in HISTOGRAMS}
+    if not METRICS_DIR or not os.path.isdir(METRICS_DIR):
+        return snapshots
+    own = os.path.basename(_snapshot_path(os.getpid()))
+    for filename in os.listdir(METRICS_DIR):
+        if not filename.endswith(".json") or filename == own:
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, filename)) as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, series in payload.items():
+            if name in snapshots:
+                snapshots[name].append({tuple(labels): values for labels, values in series})
+    return snapshots
+
+def render_metrics():
+    """Every histogram in the Prometheus text format, summed over the workers."""
+    others = _other_snapshots()
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(render_histogram(histogram, merge_snapshots([histogram.snapshot()] + others[histogram.name])))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import itertools
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+
+ORDER_SEARCH_WORKERS = int(os.getenv("ORDER_SEARCH_WORKERS", os.cpu_count() or 1))
+MAX_CANDIDATES = 64
+CRITERIA = ("aic", "bic", "holdout")
+
+DEFAULT_GRID = {
+    "p": [1, 2, 5], "d": [1], "q": [0, 1],
+    "P": [0, 1], "D": [1], "Q": [0, 1], "s": [24]
+}
+
+class CandidateAborted(Exception):
+    """Raised from the optimizer callback to stop a candidate early."""
+
+def parse_order_grid(grid):
+    """Expand a {"p": [...], ..., "s": [...]} grid (JSON string or dict) into candidate orders."""
+    if isinstance(grid, str):
+        try:
+            grid = json.loads(grid)
+        except ValueError:
+            raise ValueError("order_grid must be a JSON object")
+    grid = {**DEFAULT_GRID, **(grid or {})}
+
+    for key, values in grid.items():
+        if key not in DEFAULT_GRID:
+            raise ValueError(f"Unknown order_grid key: {key}")
+        if not isinstance(values, list) or not values or not all(isinstance(v, int) and v >= 0 for v in values):
+            raise ValueError(f"order_grid['{key}'] must be a non-empty list of non-negative integers")
+
+    candidates = []
+    for p, d, q, P, D, Q, s in itertools.product(*(grid[key] for key in ("p", "d", "q", "P", "D", "Q", "s"))):
+        # Without seasonal terms the period is irrelevant
+        seasonal_order = (P, D, Q, s) if (P or D or Q) else (0, 0, 0, 0)
+        candidate = {"order": (p, d, q), "seasonal_order": seasonal_order}
+        if candidate not in candidates:
+            candidates.append(candidate)
+
+    if len(candidates) > MAX_CANDIDATES:
+        raise ValueError(f"order_grid expands to {len(candidates)} candidates; the limit is {MAX_CANDIDATES}")
+    return candidates
+
+def _fit_candidate(data_dir, order, seasonal_order, criterion, holdout_rows, time_budget, maxiter):
+    """Fit one candidate in a worker process and score it."""
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    started = time.perf_counter()
+    endog = np.load(os.path.join(data_dir, "endog.npy"), mmap_mode="r")
+    exog = np.load(os.path.join(data_dir, "exog.npy"), mmap_mode="r")
+
+    train_rows = len(endog) - holdout_rows
+    model = SARIMAX(np.array(endog[:train_rows]), exog=np.array(exog[:train_rows]),
+                    order=order, seasonal_order=seasonal_order)
+
+    def stop_early(params):
+        if not np.all(np.isfinite(params)):
+            raise CandidateAborted("parameters diverged")
+        if time.perf_counter() - started > time_budget:
+            raise CandidateAborted(f"exceeded the {time_budget}s time budget")
+
+    result = {"order": list(order), "seasonal_order": list(seasonal_order)}
+    try:
+        fitted = model.fit(disp=False, maxiter=maxiter, callback=stop_early)
+    except CandidateAborted as e:
+        result.update({"status": "aborted", "error": str(e)})
+    except Exception as e:
+        result.update({"status": "failed", "error": str(e)})
+    else:
+        converged = bool((fitted.mle_retvals or {}).get("converged", True))
+        result.update({
+            "status": "ok" if converged else "not_converged",
+            "converged": converged,
+            "aic": float(fitted.aic),
+            "bic": float(fitted.bic),
+            "params": np.asarray(fitted.params).tolist()
+        })
+        if holdout_rows:
+            forecast = fitted.forecast(steps=holdout_rows, exog=np.array(exog[train_rows:]))
+            errors = np.asarray(forecast) - np.asarray(endog[train_rows:])
+            result["holdout_rmse"] = float(np.sqrt(np.nanmean(errors ** 2)))
+
+    result["fit_seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+def _stop_pool(pool, futures):
+    """Shut the pool down, killing workers still fitting a candidate."""
+    processes = list((pool._processes or {}).values())
+    # cancel_futures only drops candidates that have not started; running fits would go on burning CPU
+    if not all(future.done() for future in futures):
+        for process in processes:
+            process.terminate()
+    pool.shutdown(wait=True, cancel_futures=True)
+    for process in processes:
+        process.join()
+
+def select_order(endog, exog, candidates, criterion="aic", holdout_fraction=0.1,
+                 time_budget=120, maxiter=50, workers=ORDER_SEARCH_WORKERS):
+    """Fit candidate orders in parallel and return (winner, leaderboard).
+
+    Candidates run on a process pool with one optimizer time budget each; a
+    candidate is abandoned as soon as it exceeds the budget or its
+    parameters diverge, and ones that hit `maxiter` without converging are
+    scored but cannot win. With the "holdout" criterion every candidate is
+    fitted on all but the last `holdout_fraction` of rows and ranked by
+    forecast RMSE on them; otherwise by AIC or BIC on all rows.
+    """
+    if criterion not in CRITERIA:
+        raise ValueError(f"order_criterion must be one of {CRITERIA}")
+
+    holdout_rows = int(len(endog) * holdout_fraction) if criterion == "holdout" else 0
+    if criterion == "holdout" and holdout_rows < 1:
+        raise ValueError("Not enough rows for a holdout split")
+
+    # Candidates read the data from memory-mapped files instead of each receiving a pickled copy
+    data_dir = tempfile.mkdtemp(prefix="order_search_")
+    np.save(os.path.join(data_dir, "endog.npy"), np.asarray(endog, dtype=float))
+    np.save(os.path.join(data_dir, "exog.npy"), np.asarray(exog, dtype=float))
+
+    leaderboard = []
+    workers = max(1, min(workers, len(candidates)))
+    # Backstop for candidates stuck outside the optimizer, where the callback cannot stop them
+    rounds = -(-len(candidates) // workers)
+    deadline = time_budget * 2 * rounds + 60
+
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    futures = {}
+    try:
+        futures = {
+            pool.submit(_fit_candidate, data_dir, c["order"], c["seasonal_order"], criterion,
+                        holdout_rows, time_budget, maxiter): c
+            for c in candidates
+        }
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                try:
+                    leaderboard.append(future.result())
+                except Exception as e:
+                    candidate = futures[future]
+                    leaderboard.append({
+                        "order": list(candidate["order"]), "seasonal_order": list(candidate["seasonal_order"]),
+                        "status": "failed", "error": str(e)
+                    })
+        except FuturesTimeoutError:
+            finished = {tuple(r["order"]) + tuple(r["seasonal_order"]) for r in leaderboard}
+            for candidate in candidates:
+                if tuple(candidate["order"]) + tuple(candidate["seasonal_order"]) not in finished:
+                    leaderboard.append({
+                        "order": list(candidate["order"]), "seasonal_order": list(candidate["seasonal_order"]),
+                        "status": "aborted", "error": "search deadline reached"
+                    })
+    finally:
+        # The candidates read the data directory until their processes are gone
+        _stop_pool(pool, futures)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    score_key = "holdout_rmse" if criterion == "holdout" else criterion
+    for entry in leaderboard:
+        score = entry.get(score_key) if entry.get("status") == "ok" else None
+        entry["score"] = score if score is not None and np.isfinite(score) else None
+    leaderboard.sort(key=lambda entry: (entry["score"] is None, entry["score"] if entry["score"] is not None else 0))
+
+    winner = leaderboard[0] if leaderboard and leaderboard[0]["score"] is not None else None
+    if winner is None:
+        raise ValueError("No candidate order converged")
+
+    return winner, leaderboard
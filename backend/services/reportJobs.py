@@ -0,0 +1,59 @@
+import os
+import datetime
+from bson import ObjectId
+from config.db import mongo
+from services.forecastReport import render_report, report_path
+from services.jobRunner import JobQueue, QUEUED, RUNNING, DONE, FAILED
+from services.metrics import record_span
+
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", 1))
+
+def _prepare_report_update(job, update):
+    if update["status"] == DONE:
+        update["stats"] = update.pop("result")
+
+def _finish_report(job, update):
+    if update["status"] == DONE:
+        # Rendered in the pool process; only its timing reaches the runner's metrics
+        record_span("pdf_render", update["stats"]["render_seconds"])
+
+# Rendering is CPU-bound Python; the job runner keeps it out of the web workers
+report_jobs = JobQueue("report", "report_jobs", {"render": render_report},
+                       workers=REPORT_WORKERS, prepare_update=_prepare_report_update,
+                       on_finish=_finish_report)
+
+def submit_report_job(user_id, version):
+    """Queue a report for one history version, reusing a live job already pending for it."""
+    now = datetime.datetime.now()
+    # A running job whose runner stopped renewing its lease will never finish; fail it instead of waiting on it
+    mongo.db.report_jobs.update_many(
+        {"user_id": user_id, "version": version, "status": RUNNING,
+         "$or": [{"lease_until": {"$lt": now}}, {"lease_until": None}]},
+        {"$set": {"status": FAILED, "lease_until": None, "finished_at": now,
+                  "error": "The report runner stopped while rendering this report"}}
+    )
+
+    pending = mongo.db.report_jobs.find_one(
+        {"user_id": user_id, "version": version, "status": {"$in": [QUEUED, RUNNING]}}, {"_id": 1}
+    )
+    if pending:
+        return str(pending["_id"])
+
+    return report_jobs.submit(
+        "render", [str(user_id), version, report_path(user_id, version)],
+        user_id=user_id,
+        version=version,
+        stats=None
+    )
+
+def get_report_job(job_id):
+    """Return a report job as a JSON-friendly dict, or None."""
+    job = mongo.db.report_jobs.find_one({"_id": ObjectId(job_id)}, {"args": 0})
+    if not job:
+        return None
+    job["_id"] = str(job["_id"])
+    job["user_id"] = str(job["user_id"])
+    for key in ("submitted_at", "started_at", "finished_at", "lease_until"):
+        if isinstance(job.get(key), datetime.datetime):
+            job[key] = job[key].isoformat()
+    return job
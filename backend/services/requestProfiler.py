@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import random
+import threading
+from collections import Counter
+
+# Off unless PROFILE_SAMPLE_RATE > 0. A sampled request has its thread's stack
+# recorded every PROFILE_INTERVAL_MS; if it then takes longer than
+# PROFILE_SLOW_MS the stacks are written to PROFILE_DIR in the collapsed
+# format flame graph tools read, otherwise they are thrown away.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", 1000))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+_active = {}  # thread id -> Counter of collapsed stacks
+_lock = threading.Lock()
+_sampler = None
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+def _sample_forever():
+    interval = PROFILE_INTERVAL_MS / 1000
+    while True:
+        time.sleep(interval)
+        with _lock:
+            if not _active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, stacks in _active.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stacks[_collapse(frame)] += 1
+
+def _ensure_sampler():
+    global _sampler
+    with _lock:
+        if _sampler is None or not _sampler.is_alive():
+            _sampler = threading.Thread(target=_sample_forever, name="request-profiler", daemon=True)
+            _sampler.start()
+
+def start_profile():
+    """Start sampling the current thread if this request is picked; returns whether it was."""
+    if PROFILE_SAMPLE_RATE <= 0 or random.random() >= PROFILE_SAMPLE_RATE:
+        return False
+    _ensure_sampler()
+    with _lock:
+        _active[threading.get_ident()] = Counter()
+    return True
+
+def finish_profile(label, seconds):
+    """Stop sampling the current thread; keep the stacks only if the request was slow."""
+    with _lock:
+        stacks = _active.pop(threading.get_ident(), None)
+    if not stacks or seconds * 1000 < PROFILE_SLOW_MS:
+        return None
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe_label = "".join(c if c.isalnum() else "_" for c in label).strip("_") or "request"
+    path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_label}-{int(seconds * 1000)}ms.txt")
+    with open(path, "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    print(f"Slow request {label} took {seconds:.3f}s, profile written to {path}")
+    return path
@@ -0,0 +1,292 @@
+import time
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from models.forecastModel import save_model, get_model_bundle, DEFAULT_SITE
+from models.seasonality import fourier_terms, fourier_names
+from services.csvIngest import load_training_frame, scale_training_frame, release_training_frame
+from services.orderSelection import parse_order_grid, select_order
+
+REQUIRED_COLUMNS = [
+    "Timestamp", "Temperature", "Humidity", "SquareFootage", "Occupancy",
+    "HVACUsage", "LightingUsage", "RenewableEnergy", "DayOfWeek",
+    "Holiday", "EnergyConsumption"
+]
+
+FEATURE_COLUMNS = [
+    "Temperature", "Humidity", "SquareFootage", "Occupancy",
+    "HVACUsage", "LightingUsage", "RenewableEnergy", "DayOfWeek", "Holiday"
+]
+
+# How each column is aggregated when the series is resampled to a coarser frequency
+RESAMPLE_AGGREGATIONS = {
+    "Temperature": "mean", "Humidity": "mean", "SquareFootage": "mean", "Occupancy": "mean",
+    "HVACUsage": "mean", "LightingUsage": "mean", "RenewableEnergy": "mean",
+    "DayOfWeek": "first", "Holiday": "max", "EnergyConsumption": "sum"
+}
+
+DEFAULT_ORDER = (5, 1, 0)
+DEFAULT_SEASONAL_ORDER = (1, 1, 1, 24)
+DEFAULT_FOURIER_TERMS = 3
+MAX_FOURIER_TERMS = 12
+
+def parse_training_options(values):
+    """Validate the optional training settings submitted with an upload.
+
+    `resample` is a pandas offset alias such as "h" or "D". `seasonality` is
+    "sarima" (seasonal ARMA terms, the default) or "fourier", which replaces
+    them with `fourier_terms` sine/cosine pairs over `fourier_period_hours`.
+    `auto_order` searches `order_grid` (see orderSelection.parse_order_grid)
+    instead of using the default orders, ranking candidates by
+    `order_criterion` ("aic", "bic" or "holdout").
+    """
+    options = {"resample": None, "seasonality": values.get("seasonality") or "sarima"}
+
+    if values.get("resample"):
+        try:
+            options["resample"] = to_offset(values["resample"]).freqstr
+        except ValueError:
+            raise ValueError(f"Unknown resample frequency: {values['resample']}")
+
+    if options["seasonality"] not in ("sarima", "fourier"):
+        raise ValueError("seasonality must be 'sarima' or 'fourier'")
+
+    if options["seasonality"] == "fourier":
+        terms = int(values.get("fourier_terms") or DEFAULT_FOURIER_TERMS)
+        if not 1 <= terms <= MAX_FOURIER_TERMS:
+            raise ValueError(f"fourier_terms must be between 1 and {MAX_FOURIER_TERMS}")
+        options["fourier_terms"] = terms
+
+        period_hours = values.get("fourier_period_hours")
+        options["fourier_period_hours"] = float(period_hours) if period_hours else None
+        if options["fourier_period_hours"] is not None and options["fourier_period_hours"] <= 0:
+            raise ValueError("fourier_period_hours must be positive")
+
+    # Automatic order selection over a grid of (p,d,q)(P,D,Q,s) candidates
+    if str(values.get("auto_order", "")).lower() in ("1", "true", "yes"):
+        options["order_search"] = {
+            "candidates": parse_order_grid(values.get("order_grid")),
+            "criterion": values.get("order_criterion") or "aic",
+            "time_budget": float(values.get("candidate_time_budget") or 120),
+            "holdout_fraction": float(values.get("holdout_fraction") or 0.1)
+        }
+        if not 0 < options["order_search"]["holdout_fraction"] < 0.5:
+            raise ValueError("holdout_fraction must be between 0 and 0.5")
+
+    return options
+
+def resample_frame(df, rule):
+    """Aggregate an unscaled training frame to the frequency `rule`."""
+    resampled = df.resample(rule).agg(RESAMPLE_AGGREGATIONS)
+
+    # Empty bins sum to 0; mark them missing so the state space model skips them
+    counts = df["EnergyConsumption"].resample(rule).count()
+    resampled.loc[(counts == 0).to_numpy(), "EnergyConsumption"] = np.nan
+
+    # Exog may not have gaps, and the weekday follows from the bin itself
+    resampled[FEATURE_COLUMNS] = resampled[FEATURE_COLUMNS].ffill().bfill()
+    resampled["DayOfWeek"] = ((resampled.index.dayofweek + 1) % 7) / 6.0
+
+    return resampled.astype(np.float32)
+
+def missing_columns(columns):
+    """Return the required training columns that are absent from `columns`."""
+    return [col for col in REQUIRED_COLUMNS if col not in columns]
+
+def infer_step_seconds(index):
+    """Return the typical spacing of a DatetimeIndex in seconds."""
+    if len(index) < 2:
+        return None
+    return float(np.median(np.diff(index.as_unit("ns").asi8)) / 1e9)
+
+def index_metadata(index, step_seconds=None):
+    """Model metadata describing where the training series ends."""
+    return {
+        "feature_columns": FEATURE_COLUMNS,
+        "last_timestamp": index[-1].isoformat(),
+        "step_seconds": step_seconds or infer_step_seconds(index)
+    }
+
+def seasonality_metadata(options, step_seconds):
+    """Describe the model's seasonality so prediction can rebuild generated regressors."""
+    if options["seasonality"] != "fourier":
+        return {"mode": "sarima"}
+
+    period_hours = options.get("fourier_period_hours")
+    if period_hours is None:
+        # A daily cycle for intra-day data, a weekly one once rows are a day or longer
+        period_hours = 24 * 7 if step_seconds and step_seconds >= 86400 else 24
+    return {"mode": "fourier", "period_seconds": period_hours * 3600, "terms": options["fourier_terms"]}
+
+def model_exog(df, seasonality):
+    """The exogenous regressors for a prepared frame: user features plus any Fourier terms."""
+    exog = df[FEATURE_COLUMNS]
+    if seasonality["mode"] != "fourier":
+        return exog
+
+    fourier = fourier_terms(df.index, seasonality["period_seconds"], seasonality["terms"])
+    fourier = pd.DataFrame(fourier, index=df.index, columns=fourier_names(seasonality["terms"]))
+    return pd.concat([exog, fourier], axis=1)
+
+def fit_sarimax(df, seasonality=None, order=DEFAULT_ORDER, seasonal_order=DEFAULT_SEASONAL_ORDER, **fit_kwargs):
+    """Fit the SARIMAX model on a prepared training frame."""
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    seasonality = seasonality or {"mode": "sarima"}
+    if seasonality["mode"] == "fourier":
+        # The Fourier regressors carry the seasonal cycle instead of seasonal ARMA terms
+        seasonal_order = (0, 0, 0, 0)
+
+    model = SARIMAX(
+        df["EnergyConsumption"],
+        exog=model_exog(df, seasonality),
+        order=order,
+        seasonal_order=seasonal_order
+    )
+
+    return model.fit(disp=False, **fit_kwargs)
+
+def search_orders(df, seasonality, search):
+    """Pick the model orders with a parallel candidate search; return them with the leaderboard."""
+    candidates = search["candidates"]
+    if seasonality["mode"] == "fourier":
+        # Seasonal ARMA terms are not used next to Fourier regressors
+        candidates = [dict(c, seasonal_order=(0, 0, 0, 0)) for c in candidates]
+        candidates = [c for i, c in enumerate(candidates) if c not in candidates[:i]]
+
+    winner, leaderboard = select_order(
+        df["EnergyConsumption"], model_exog(df, seasonality), candidates,
+        criterion=search["criterion"], holdout_fraction=search["holdout_fraction"],
+        time_budget=search["time_budget"]
+    )
+
+    start_params = winner["params"]
+    for entry in leaderboard:
+        entry.pop("params", None)
+    return tuple(winner["order"]), tuple(winner["seasonal_order"]), start_params, leaderboard
+
+def load_prepared_frame(csv_path, options, energy_scaler=None, scaler=None):
+    """Read, optionally resample, and scale a training CSV."""
+    if not options.get("resample"):
+        return load_training_frame(
+            csv_path, FEATURE_COLUMNS, "EnergyConsumption", energy_scaler=energy_scaler, scaler=scaler
+        )
+
+    # Aggregation must see raw values (sums of scaled values are not scaled sums)
+    df, _, _ = load_training_frame(csv_path, FEATURE_COLUMNS, "EnergyConsumption", scale=False)
+    try:
+        resampled = resample_frame(df, options["resample"])
+    finally:
+        release_training_frame(df)
+
+    return scale_training_frame(resampled, FEATURE_COLUMNS, "EnergyConsumption", energy_scaler, scaler)
+
+def train_from_csv(csv_path, options=None, site_id=DEFAULT_SITE):
+    """Train and save a site's model from a CSV file on disk.
+
+    This is the entry point of the training worker process, so it only takes
+    picklable arguments and returns a plain dict.
+    """
+    started = time.perf_counter()
+    options = options or parse_training_options({})
+
+    df, energy_scaler, scaler = load_prepared_frame(csv_path, options)
+    metadata = index_metadata(df.index)
+    metadata["resample"] = options["resample"]
+    metadata["seasonality"] = seasonality_metadata(options, metadata["step_seconds"])
+    try:
+        order, seasonal_order, fit_kwargs = DEFAULT_ORDER, DEFAULT_SEASONAL_ORDER, {}
+        leaderboard = None
+        if options.get("order_search"):
+            order, seasonal_order, start_params, leaderboard = search_orders(
+                df, metadata["seasonality"], options["order_search"]
+            )
+            # The winner is refitted on all rows, starting from its candidate estimate
+            fit_kwargs["start_params"] = start_params
+            metadata["order_selection"] = {
+                "criterion": options["order_search"]["criterion"],
+                "leaderboard": leaderboard
+            }
+
+        fitted_model = fit_sarimax(df, metadata["seasonality"], order, seasonal_order, **fit_kwargs)
+    finally:
+        release_training_frame(df)
+
+    # Save the trained model and scalers
+    version = save_model(fitted_model, energy_scaler, scaler, metadata, site_id=site_id)
+
+    return {
+        "site_id": site_id,
+        "model_version": version,
+        "rows": len(df),
+        "resample": options["resample"],
+        "seasonality": metadata["seasonality"]["mode"],
+        "order": list(fitted_model.model.order),
+        "seasonal_order": list(fitted_model.model.seasonal_order),
+        "leaderboard": leaderboard,
+        "converged": bool((fitted_model.mle_retvals or {}).get("converged", True)),
+        "fit_seconds": round(time.perf_counter() - started, 3),
+    }
+
+def validate_continuation(index, columns, spec):
+    """Check that new rows continue the training series of a saved model."""
+    feature_columns = spec.get("feature_columns")
+    if feature_columns != FEATURE_COLUMNS or not all(col in columns for col in feature_columns):
+        raise ValueError(f"Feature columns must match the trained model: {feature_columns}")
+
+    if not spec.get("last_timestamp") or not spec.get("step_seconds"):
+        raise ValueError("The saved model does not record its time index; run a full training first.")
+
+    if index.has_duplicates:
+        raise ValueError("New rows contain duplicate timestamps.")
+
+    step = pd.Timedelta(seconds=spec["step_seconds"])
+    expected_start = pd.Timestamp(spec["last_timestamp"]) + step
+    if index[0] != expected_start:
+        raise ValueError(f"New rows must start at {expected_start.isoformat()}, got {index[0].isoformat()}.")
+
+    if len(index) > 1 and not (pd.Series(index).diff().dropna() == step).all():
+        raise ValueError(f"New rows must be evenly spaced every {step}.")
+
+def append_from_csv(csv_path, refit=False, site_id=DEFAULT_SITE):
+    """Extend a site's saved model with rows that follow its training data.
+
+    Runs in the training worker process like train_from_csv. The stored
+    parameters and scalers are kept; with `refit` the parameters are
+    re-estimated on the new rows, warm-started from the current ones.
+    """
+    started = time.perf_counter()
+
+    bundle = get_model_bundle(site_id)
+    if bundle is None or getattr(bundle.model, "spec", None) is None:
+        raise ValueError("No slim model to append to; train or convert a model first.")
+    model, energy_scaler, scaler, version = bundle
+
+    # New rows get the same resampling and generated regressors as the original training data
+    seasonality = model.spec.get("seasonality") or {"mode": "sarima"}
+    options = {"resample": model.spec.get("resample")}
+    df, energy_scaler, scaler = load_prepared_frame(csv_path, options, energy_scaler, scaler)
+    try:
+        validate_continuation(df.index, df.columns, model.spec)
+        fitted_model = model.extend(
+            df["EnergyConsumption"].reset_index(drop=True),
+            model_exog(df, seasonality).reset_index(drop=True),
+            refit=refit
+        )
+    finally:
+        release_training_frame(df)
+
+    metadata = index_metadata(df.index, step_seconds=model.spec["step_seconds"])
+    metadata.update({"resample": options["resample"], "seasonality": seasonality})
+    # Rejected if another job saved this site while the rows were being appended
+    new_version = save_model(fitted_model, energy_scaler, scaler, metadata, site_id=site_id, expected_version=version)
+
+    return {
+        "site_id": site_id,
+        "model_version": new_version,
+        "previous_version": version,
+        "rows": len(df),
+        "refit": refit,
+        "converged": bool((getattr(fitted_model, "mle_retvals", None) or {}).get("converged", True)),
+        "fit_seconds": round(time.perf_counter() - started, 3),
+    }
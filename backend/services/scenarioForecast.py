@@ -0,0 +1,124 @@
+import os
+import numpy as np
+import pandas as pd
+from models.seasonality import add_model_regressors
+from services.sarimaxTrainer import FEATURE_COLUMNS
+
+MAX_SCENARIOS = int(os.getenv("MAX_SCENARIOS", 500))
+
+def encode_features(feature_df):
+    """Convert request feature values into the numeric form the model was trained on."""
+    feature_df["HVACUsage"] = feature_df["HVACUsage"].astype(int)
+    feature_df["LightingUsage"] = feature_df["LightingUsage"].astype(int)
+    feature_df["Holiday"] = feature_df["Holiday"].map({"Yes": 1, "No": 0}).fillna(0).astype(int)
+
+    # Normalize DayOfWeek to 0-1 scale
+    feature_df["DayOfWeek"] = feature_df["DayOfWeek"] / 6.0
+    return feature_df
+
+def parse_scenarios(data, steps):
+    """Turn a batch payload into [(name, feature records)].
+
+    A scenario either lists its own `features`, or derives them from the
+    payload's `base_features` with `adjust` (values added to a column, e.g.
+    {"Temperature": 2}) and `set` (values replacing a column).
+    """
+    scenarios = data.get("scenarios") or []
+    if not scenarios:
+        raise ValueError("Provide at least one scenario.")
+    if len(scenarios) > MAX_SCENARIOS:
+        raise ValueError(f"At most {MAX_SCENARIOS} scenarios are allowed per batch.")
+
+    base_features = data.get("base_features")
+    parsed = []
+    for i, scenario in enumerate(scenarios):
+        name = str(scenario.get("name") or f"scenario_{i + 1}")
+        if scenario.get("features") is not None:
+            features = scenario["features"]
+        elif base_features is not None:
+            features = [dict(row) for row in base_features]
+            for row in features:
+                for col, delta in (scenario.get("adjust") or {}).items():
+                    row[col] = row.get(col, 0) + delta
+                row.update(scenario.get("set") or {})
+        else:
+            raise ValueError(f"Scenario '{name}' needs features or base_features to adjust.")
+
+        if len(features) != steps:
+            raise ValueError(f"Scenario '{name}' must have one feature row per timestamp.")
+        parsed.append((name, features))
+    return parsed
+
+def exog_coefficients(model):
+    """Regression coefficients of the exogenous columns, or None if they are not constant."""
+    results = getattr(model, "results", model)
+    state_space = results.model
+    if getattr(state_space, "time_varying_regression", False) or not getattr(state_space, "mle_regression", True):
+        return None
+    start = state_space.k_trend
+    return np.asarray(results.params)[start:start + state_space.k_exog]
+
+def forecast_scenarios(model, energy_scaler, feature_scaler, future_dates, scenario_features):
+    """Forecast every scenario against one model in a single vectorized pass.
+
+    SARIMAX forecasts are linear in the future exog (y = x'beta + ARMA errors),
+    so one forecast with the user features set to zero gives the shared error
+    path and each scenario only adds its own features times beta.
+    """
+    steps = len(future_dates)
+    n_scenarios = len(scenario_features)
+
+    # Encode and scale all scenarios at once, then view them as (scenario, step, feature)
+    feature_df = encode_features(pd.DataFrame([row for rows in scenario_features for row in rows]))
+    missing = [col for col in FEATURE_COLUMNS if col not in feature_df.columns]
+    if missing:
+        raise ValueError(f"Missing required feature columns: {missing}")
+    scaled = np.asarray(feature_scaler.transform(feature_df[FEATURE_COLUMNS]), dtype=float)
+    scaled = scaled.reshape(n_scenarios, steps, len(FEATURE_COLUMNS))
+
+    spec = getattr(model, "spec", None)
+    beta = exog_coefficients(model)
+    if beta is not None:
+        zero_exog = add_model_regressors(spec, future_dates, np.zeros((steps, len(FEATURE_COLUMNS))))
+        base = np.asarray(model.forecast(steps=steps, exog=zero_exog), dtype=float)
+        scaled_forecast = base[None, :] + scaled @ beta[:len(FEATURE_COLUMNS)]
+    else:
+        # Time-varying coefficients break linearity; fall back to one forecast per scenario
+        scaled_forecast = np.vstack([
+            np.asarray(model.forecast(steps=steps, exog=add_model_regressors(spec, future_dates, s)), dtype=float)
+            for s in scaled
+        ])
+
+    forecast = energy_scaler.inverse_transform(scaled_forecast.reshape(-1, 1)).reshape(n_scenarios, steps)
+    forecast = np.maximum(forecast, 0)
+
+    renewable = feature_df["RenewableEnergy"].to_numpy(dtype=float).reshape(n_scenarios, steps)
+    energy_savings = forecast * (renewable.mean(axis=1, keepdims=True) / 100)
+    peak_load = forecast.max(axis=1)
+
+    # Same attribution as predict_forecast, for every scenario at once
+    feature_sums = np.abs(scaled).sum(axis=2, keepdims=True)
+    contributions = np.abs(scaled) * (forecast[:, :, None] / feature_sums)
+
+    return forecast, energy_savings, peak_load, contributions
+
+def summarize_scenarios(names, forecast, energy_savings, peak_load):
+    """Cross-scenario comparison: totals per scenario and the spread per timestep."""
+    totals = forecast.sum(axis=1)
+    return {
+        "scenario_totals": {
+            name: {
+                "total_energy": round(float(total), 2),
+                "total_savings": round(float(savings), 2),
+                "peak_load": round(float(peak), 2)
+            }
+            for name, total, savings, peak in zip(names, totals, energy_savings.sum(axis=1), peak_load)
+        },
+        "lowest_energy_scenario": names[int(np.argmin(totals))],
+        "highest_energy_scenario": names[int(np.argmax(totals))],
+        "per_step": {
+            "min": np.round(forecast.min(axis=0), 2).tolist(),
+            "mean": np.round(forecast.mean(axis=0), 2).tolist(),
+            "max": np.round(forecast.max(axis=0), 2).tolist()
+        }
+    }
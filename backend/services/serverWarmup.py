@@ -0,0 +1,97 @@
+import os
+import time
+import datetime
+import threading
+import numpy as np
+import pandas as pd
+from models.forecastModel import get_model_bundle, get_model_version, list_model_sites
+from models.modelRegistry import registry
+from models.seasonality import add_model_regressors
+from services.sarimaxTrainer import FEATURE_COLUMNS
+
+# Sites whose models the server master loads before forking: comma-separated ids, or "all"
+PRELOAD_SITES = os.getenv("PRELOAD_SITES", "all")
+# Length of the dummy forecast that warms a model
+WARMUP_STEPS = int(os.getenv("WARMUP_STEPS", 24))
+
+# {site_id: version} of the models the master loaded, compared against the store by the watcher
+loaded_versions = {}
+_reload_pending = threading.Event()
+
+def preload_sites():
+    if PRELOAD_SITES.strip().lower() == "all":
+        # More sites than the registry keeps would only be evicted again
+        return list_model_sites()[:registry.max_sites]
+    return [site.strip() for site in PRELOAD_SITES.split(",") if site.strip()]
+
+def warm_bundle(bundle, steps=WARMUP_STEPS):
+    """Run one throwaway forecast through a model so its first real request pays no setup cost.
+
+    Nothing is stored and the forecast cache is bypassed.
+    """
+    future_dates = pd.date_range(datetime.datetime.now().replace(minute=0, second=0, microsecond=0),
+                                 periods=steps, freq="h")
+    scaled = bundle.feature_scaler.transform(np.zeros((steps, len(FEATURE_COLUMNS))))
+    exog = add_model_regressors(getattr(bundle.model, "spec", None), future_dates, scaled)
+    forecast = bundle.model.forecast(steps=steps, exog=exog)
+    return bundle.energy_scaler.inverse_transform(np.array(forecast).reshape(-1, 1)).flatten()
+
+def preload_models():
+    """Load and warm the preloaded sites' models in this process; returns {site_id: version}."""
+    versions = {}
+    for site_id in preload_sites():
+        started = time.perf_counter()
+        try:
+            bundle = get_model_bundle(site_id)
+            if bundle is None:
+                continue
+            warm_bundle(bundle)
+        except Exception as e:
+            print(f"Error preloading model of site {site_id}: {str(e)}")
+            continue
+        versions[site_id] = bundle.version
+        print(f"Preloaded model of site {site_id} (version {bundle.version}) in {time.perf_counter() - started:.2f}s")
+
+    loaded_versions.clear()
+    loaded_versions.update(versions)
+    _reload_pending.clear()
+    return versions
+
+def warm_worker():
+    """Warm every model this worker inherited from the master."""
+    for site_id in loaded_versions:
+        try:
+            bundle = get_model_bundle(site_id)
+            if bundle is not None:
+                warm_bundle(bundle)
+        except Exception as e:
+            print(f"Error warming model of site {site_id}: {str(e)}")
+
+def stale_sites():
+    """Preloaded sites whose current stored version differs from the one loaded."""
+    return [site_id for site_id, version in list(loaded_versions.items())
+            if get_model_version(site_id) not in (None, version)]
+
+def watch_model_versions(on_change, interval):
+    """Call `on_change(sites)` from a daemon thread when a preloaded site gets a new model.
+
+    Only version stamps are read here; loading stays with the caller, which
+    should clear the pending reload by calling preload_models.
+    """
+    def watch():
+        while True:
+            time.sleep(interval)
+            if _reload_pending.is_set():
+                continue
+            try:
+                sites = stale_sites()
+            except Exception as e:
+                print(f"Error checking model versions: {str(e)}")
+                continue
+            if sites:
+                _reload_pending.set()
+                on_change(sites)
+
+    thread = threading.Thread(target=watch, name="model-version-watcher", daemon=True)
+    thread.start()
+    return thread
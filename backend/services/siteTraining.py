@@ -0,0 +1,93 @@
+import os
+import time
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from models.forecastModel import validate_site_id
+from services.csvIngest import CHUNK_ROWS
+from services.sarimaxTrainer import train_from_csv
+
+SITE_COLUMN = "SiteId"
+SITE_TRAINING_WORKERS = int(os.getenv("SITE_TRAINING_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+# Upper bound on the `workers` an upload may ask for
+MAX_SITE_TRAINING_WORKERS = int(os.getenv("MAX_SITE_TRAINING_WORKERS", os.cpu_count() or 1))
+
+def split_by_site(csv_path, site_column, out_dir, chunk_rows=CHUNK_ROWS):
+    """Stream a combined CSV into one CSV per site; return {site: (path, rows)}."""
+    sites = {}
+    # Values are copied through as text; each site's file is parsed properly when it is trained
+    for chunk in pd.read_csv(csv_path, dtype=str, chunksize=chunk_rows, keep_default_na=False):
+        if site_column not in chunk.columns:
+            raise ValueError(f"CSV is missing the site column '{site_column}'")
+
+        for site, rows in chunk.groupby(site_column, sort=False):
+            if site not in sites:
+                sites[site] = (os.path.join(out_dir, f"site_{len(sites)}.csv"), 0)
+            path, count = sites[site]
+            rows.drop(columns=[site_column]).to_csv(path, mode="a", header=count == 0, index=False)
+            sites[site] = (path, count + len(rows))
+    return sites
+
+def _train_site(site_path, options, site_id):
+    """Worker entry point: train one site and time it."""
+    started = time.perf_counter()
+    result = train_from_csv(site_path, options, site_id)
+    result["fit_seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+def train_sites_from_csv(csv_path, options=None, site_column=SITE_COLUMN, workers=SITE_TRAINING_WORKERS):
+    """Fit one model per site of a combined CSV on a process pool.
+
+    Runs in the training worker process. Each site's rows are trained and
+    saved as that site's model exactly like a single-site upload; a site that
+    fails is reported and does not stop the others.
+    """
+    started = time.perf_counter()
+    work_dir = tempfile.mkdtemp(prefix="site_training_")
+    report = []
+    try:
+        sites = split_by_site(csv_path, site_column, work_dir)
+        if not sites:
+            raise ValueError("CSV contains no rows")
+
+        futures = {}
+        pool = ProcessPoolExecutor(
+            max_workers=max(1, min(workers, MAX_SITE_TRAINING_WORKERS, len(sites))),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        with pool:
+            for site, (path, rows) in sites.items():
+                try:
+                    site_id = validate_site_id(site)
+                except ValueError as e:
+                    report.append({"site_id": site, "rows": rows, "status": "failed", "error": str(e)})
+                    continue
+                futures[pool.submit(_train_site, path, options, site_id)] = (site_id, rows)
+
+            for future in as_completed(futures):
+                site_id, rows = futures[future]
+                entry = {"site_id": site_id, "rows": rows}
+                try:
+                    result = future.result()
+                    entry.update({
+                        "status": "done",
+                        "model_version": result["model_version"],
+                        "fitted_rows": result["rows"],
+                        "fit_seconds": result["fit_seconds"],
+                        "converged": result["converged"]
+                    })
+                except Exception as e:
+                    entry.update({"status": "failed", "error": str(e)})
+                report.append(entry)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report.sort(key=lambda entry: entry["site_id"])
+    return {
+        "sites": report,
+        "succeeded": sum(1 for entry in report if entry["status"] == "done"),
+        "failed": sum(1 for entry in report if entry["status"] == "failed"),
+        "total_seconds": round(time.perf_counter() - started, 3)
+    }
@@ -0,0 +1,76 @@
+import os
+import datetime
+import tempfile
+from bson import ObjectId
+from config.db import mongo
+from services.jobRunner import JobQueue, RUNNING, DONE
+from services.sarimaxTrainer import train_from_csv, append_from_csv
+from services.siteTraining import train_sites_from_csv
+
+# Uploads are read by the job runner, which must run on the same host as the web workers
+UPLOAD_DIR = os.path.join(tempfile.gettempdir(), "energauge_uploads")
+
+def _prepare_training_update(job, update):
+    if update["status"] == DONE:
+        update["model_version"] = update["result"].get("model_version")
+
+def _finish_training(job, update):
+    # The upload is only needed while the job can still run
+    csv_path = job["args"][0] if job.get("args") else None
+    if csv_path and os.path.exists(csv_path):
+        os.remove(csv_path)
+
+# A single worker runs fits one after another, so they never overwrite each
+# other's artifacts; the task name is the upload mode
+training_jobs = JobQueue("training", "training_jobs", {
+    "full": train_from_csv,
+    "append": append_from_csv,
+    "multisite": train_sites_from_csv,
+}, workers=1, prepare_update=_prepare_training_update, on_finish=_finish_training)
+
+def save_upload(file):
+    """Persist an uploaded file so a worker process can read it later."""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    fd, csv_path = tempfile.mkstemp(suffix=".csv", dir=UPLOAD_DIR)
+    with os.fdopen(fd, "wb") as f:
+        file.save(f)
+    return csv_path
+
+def submit_training_job(csv_path, user_id, filename=None, mode="full", site_id=None, args=()):
+    """Queue the training task of `mode` for `csv_path` and return its job id."""
+    return training_jobs.submit(
+        mode, [csv_path, *args],
+        mode=mode,
+        site_id=site_id,
+        submitted_by=ObjectId(user_id),
+        filename=filename,
+        elapsed_seconds=None,
+        model_version=None
+    )
+
+def serialize_job(job):
+    """Convert a job document into a JSON-friendly dict."""
+    # The arguments hold the upload's path on the runner host
+    job.pop("args", None)
+    job["_id"] = str(job["_id"])
+    job["submitted_by"] = str(job["submitted_by"])
+    for key in ("submitted_at", "started_at", "finished_at", "lease_until"):
+        if isinstance(job.get(key), datetime.datetime):
+            job[key] = job[key].isoformat()
+
+    # Report live elapsed time for jobs that are still running
+    if job["status"] == RUNNING and job.get("started_at"):
+        started_at = datetime.datetime.fromisoformat(job["started_at"])
+        job["elapsed_seconds"] = round((datetime.datetime.now() - started_at).total_seconds(), 3)
+
+    return job
+
+def get_job(job_id):
+    """Return a single training job or None."""
+    job = mongo.db.training_jobs.find_one({"_id": ObjectId(job_id)})
+    return serialize_job(job) if job else None
+
+def list_jobs(limit=20):
+    """Return the most recently submitted training jobs."""
+    jobs = mongo.db.training_jobs.find({}).sort("submitted_at", -1).limit(limit)
+    return [serialize_job(job) for job in jobs]
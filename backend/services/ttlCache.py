@@ -0,0 +1,99 @@
+import time
+import threading
+from collections import OrderedDict
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds; a ttl of 0 disables it.
+
+    Bounded by entry count and, when `sizeof` is given, by `max_bytes`.
+    Entries may belong to a group (e.g. a site) that is invalidated as a
+    whole. A value read before an invalidation is not stored after it: take
+    `generation(group)` before the lookup and pass it to `put`.
+    """
+
+    def __init__(self, max_entries, ttl, max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (expires_at, group, value, nbytes)
+        # Bumped by every invalidation of a key or of everything, and per group
+        self._generation = 0
+        self._group_generations = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    def generation(self, group=None):
+        with self._lock:
+            return self._generation, self._group_generations.get(group, 0)
+
+    def _drop(self, key):
+        self._bytes -= self._entries.pop(key)[3]
+
+    def get(self, key):
+        """The cached value, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._drop(key)
+                self.stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[2]
+
+    def put(self, key, value, generation=None, ttl=None, group=None):
+        """Store `value` for `ttl` seconds (at most the cache's own ttl)."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        nbytes = self.sizeof(value) if self.sizeof else 0
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            if generation is not None and generation != (self._generation, self._group_generations.get(group, 0)):
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, group, value, nbytes)
+            self._bytes += nbytes
+            while len(self._entries) > self.max_entries or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def invalidate(self, key=None):
+        """Forget one key, or everything."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._drop(key)
+            self._generation += 1
+            self.stats["invalidations"] += 1
+
+    def invalidate_group(self, group):
+        """Forget every entry stored under `group`."""
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[1] == group]:
+                self._drop(key)
+            self._group_generations[group] = self._group_generations.get(group, 0) + 1
+            self.stats["invalidations"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            if self.sizeof:
+                stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0
+        stats.update({"max_entries": self.max_entries, "ttl_seconds": self.ttl})
+        if self.max_bytes is not None:
+            stats["max_bytes"] = self.max_bytes
+        return stats
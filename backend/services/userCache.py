@@ -0,0 +1,34 @@
+import os
+from bson import ObjectId
+from config.db import mongo
+from services.ttlCache import TTLCache
+
+# User documents (without the password hash) by id. Each process keeps its own
+# copy, so an update made through another worker shows up within the TTL.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 10000))
+
+user_cache = TTLCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS)
+
+def get_user_doc(user_id):
+    """A copy of the user's document without the password, or None if there is no such user."""
+    user_id = str(user_id)
+    generation = user_cache.generation()
+    user = user_cache.get(user_id)
+    if user is None:
+        user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"password": 0})
+        if user is None:
+            return None
+        user_cache.put(user_id, user, generation)
+    return dict(user)
+
+def get_user_names(user_id):
+    """(first_name, last_name) stored with a user's forecasts."""
+    user = get_user_doc(user_id)
+    first_name = user.get("first_name", "Unknown") if user else "Unknown"
+    last_name = user.get("last_name", "Unknown") if user else "Unknown"
+    return first_name, last_name
+
+def invalidate_user(user_id):
+    """Drop a user's cached document after it changed or was deleted."""
+    user_cache.invalidate(str(user_id))
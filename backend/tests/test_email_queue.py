@@ -0,0 +1,44 @@
+"""Attempt accounting of the outbound email queue (services/emailQueue.py)."""
+import datetime
+import pytest
+from services import emailQueue
+from services.emailQueue import claim_batch, enqueue_email, QUEUED, SENDING, FAILED
+
+mongomock = pytest.importorskip("mongomock")
+
+@pytest.fixture
+def db(monkeypatch):
+    database = mongomock.MongoClient().energauge
+    monkeypatch.setattr(emailQueue, "get_db", lambda: database)
+    return database
+
+def expire_leases(db):
+    db.email_outbox.update_many({"status": SENDING},
+                                {"$set": {"locked_until": datetime.datetime.now() - datetime.timedelta(seconds=1)}})
+
+def test_crashed_send_runs_out_of_attempts(db, monkeypatch):
+    monkeypatch.setattr(emailQueue, "EMAIL_MAX_ATTEMPTS", 3)
+    enqueue_email(["user@example.com"], "Verify", "<p>hi</p>", start_workers=False)
+
+    # Each worker claims the message and dies mid-send, recording nothing
+    for attempt in range(1, 4):
+        batch = claim_batch(db)
+        assert len(batch) == 1 and batch[0]["attempts"] == attempt
+        expire_leases(db)
+
+    assert claim_batch(db) == []
+    doc = db.email_outbox.find_one()
+    assert doc["status"] == FAILED and doc["attempts"] == 3
+
+def test_live_lease_is_not_claimed_again(db):
+    enqueue_email(["user@example.com"], "Verify", "<p>hi</p>", start_workers=False)
+    assert len(claim_batch(db)) == 1
+    assert claim_batch(db) == []
+
+def test_rejected_send_counts_one_attempt(db):
+    enqueue_email(["user@example.com"], "Verify", "<p>hi</p>", start_workers=False)
+    doc = claim_batch(db)[0]
+    emailQueue._record_failure(db, doc, ValueError("550 no such user"))
+
+    doc = db.email_outbox.find_one()
+    assert doc["status"] == QUEUED and doc["attempts"] == 1 and doc["locked_until"] is None
@@ -0,0 +1,19 @@
+"""Startup cost of the web app, measured like scripts.benchStartup.
+
+`import app` runs in a fresh interpreter under `python -X importtime`, so
+the app's own setup (init_app, mail, metrics, blueprints) is counted along
+with everything it imports.
+"""
+from scripts.benchStartup import STARTUP_IMPORT_BUDGET_MS, measure_imports, total_ms, eager_heavy_modules
+
+def test_import_app_within_budget():
+    # The first run also writes bytecode; the best of three is what a restart costs
+    runs = [measure_imports(["app"])[0] for _ in range(3)]
+    best_ms = min(total_ms(rows) for rows in runs)
+    assert best_ms <= STARTUP_IMPORT_BUDGET_MS, (
+        f"import app took {best_ms:.0f} ms, budget {STARTUP_IMPORT_BUDGET_MS:.0f} ms"
+    )
+
+def test_heavy_libraries_not_imported_at_startup():
+    rows, _ = measure_imports(["app"])
+    assert eager_heavy_modules(rows) == []
@@ -0,0 +1,19 @@
+"""Production entry point, served by gunicorn with the settings in config/gunicornConfig.py:
+
+    gunicorn -c config/gunicornConfig.py wsgi:app
+
+With preload_app the master imports this module once before forking, so the
+heavy libraries and the preloaded, warmed models are shared copy-on-write by
+every worker.
+"""
+import gc
+from services.heavyImports import preload_heavy_modules
+
+preload_heavy_modules(background=False)
+
+from app import app
+from services.serverWarmup import preload_models
+
+preload_models()
+# Keep the cyclic GC from touching (and so copying) the objects workers inherit
+gc.freeze()
@@ -22,9 +22,12 @@ const Forecast = () => {
     axios
       .get(`http://localhost:5000/trends`, {
         headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
+        // The latest page of forecasts; the chart only needs their totals
+        params: { order: "desc", include_forecast_data: false },
       })
       .then((response) => {
-        setForecasts(response.data.forecasts);
+        // Oldest first so the chart reads left to right
+        setForecasts([...response.data.forecasts].reverse());
         setTotalPredictions(response.data.total_forecasts);
         setTotalEnergy(response.data.total_energy);
         setTotalEnergySavings(response.data.total_energy_savings);
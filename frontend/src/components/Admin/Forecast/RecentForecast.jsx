@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import { Container, Grid, Card, CardContent, Typography, Box, Chip, Avatar } from "@mui/material";
+import { Container, Grid, Card, CardContent, Typography, Box, Chip, Avatar, Button } from "@mui/material";
 import axios from "axios";
 import Loader from "../../layouts/Loader";
 import { styled, ThemeProvider, createTheme } from "@mui/material/styles";
@@ -80,14 +80,21 @@ const RecentForecast = () => {
   const [forecasts, setForecasts] = useState([]);
   const [loading, setLoading] = useState(true);
   const [animate, setAnimate] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // Newest forecasts first, one page at a time
+  const fetchPage = (cursor) =>
+    axios.get(`http://localhost:5000/trends`, {
+      headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
+      params: { order: "desc", include_forecast_data: false, ...(cursor ? { cursor } : {}) },
+    });
 
   useEffect(() => {
-    axios
-      .get(`http://localhost:5000/trends`, {
-        headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
-      })
+    fetchPage()
       .then((response) => {
         setForecasts(response.data.forecasts);
+        setNextCursor(response.data.next_cursor);
         setLoading(false);
         setTimeout(() => setAnimate(true), 100);
       })
@@ -97,6 +104,17 @@ const RecentForecast = () => {
       });
   }, []);
 
+  const loadMore = () => {
+    setLoadingMore(true);
+    fetchPage(nextCursor)
+      .then((response) => {
+        setForecasts((previous) => [...previous, ...response.data.forecasts]);
+        setNextCursor(response.data.next_cursor);
+      })
+      .catch((error) => console.error("Error fetching more forecasts", error))
+      .finally(() => setLoadingMore(false));
+  };
+
   if (loading) {
     return <Loader />;
   }
@@ -169,6 +187,13 @@ const RecentForecast = () => {
               </FadeInBox>
             )}
           </Grid>
+          {nextCursor && (
+            <Box display="flex" justifyContent="center" mt={4}>
+              <Button variant="outlined" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? "Loading..." : "Load older forecasts"}
+              </Button>
+            </Box>
+          )}
         </Container>
       </Box>
     </ThemeProvider>
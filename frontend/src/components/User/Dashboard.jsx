@@ -1,4 +1,4 @@
-import React from "react";
+import React, { useState } from "react";
 import { 
   Grid, 
   Typography, 
@@ -7,7 +7,9 @@ import {
   Container,
   useTheme,
   IconButton,
-  Tooltip 
+  Tooltip,
+  Snackbar,
+  Alert
 } from "@mui/material";
 import ForecastData from "../User/UserForecast";
 import PictureAsPdfIcon from '@mui/icons-material/PictureAsPdf';
@@ -48,8 +50,13 @@ const DashboardTitle = styled(Typography)(({ theme }) => ({
   },
 }));
 
+// How long to wait for a background PDF report before giving up
+const PDF_POLL_INTERVAL_MS = 1000;
+const PDF_POLL_TIMEOUT_MS = 2 * 60 * 1000;
+
 const Dashboard = () => {
   const theme = useTheme();
+  const [errorMessage, setErrorMessage] = useState("");
 
   const downloadCSV = async () => {
     try {
@@ -71,17 +78,38 @@ const Dashboard = () => {
       link.click();
     } catch (error) {
       console.error('Error downloading CSV:', error);
+      setErrorMessage('Could not download the CSV. Please try again.');
     }
   };
 
   const downloadPDF = async () => {
+    let failure = 'Could not download the PDF report. Please try again.';
     try {
-      const response = await fetch('http://localhost:5000/download/pdf', {
-        method: 'GET',
-        headers: {
-          'Authorization': `Bearer ${localStorage.getItem("token")}`,
-        },
-      });
+      const headers = { 'Authorization': `Bearer ${localStorage.getItem("token")}` };
+      let response = await fetch('http://localhost:5000/download/pdf', { method: 'GET', headers });
+
+      // The report is generated in the background the first time; wait for it, then download
+      if (response.status === 202) {
+        const { status_url } = await response.json();
+        const deadline = Date.now() + PDF_POLL_TIMEOUT_MS;
+        let status = 'queued';
+        while (status === 'queued' || status === 'running') {
+          if (Date.now() > deadline) {
+            failure = 'The PDF report is taking too long. Please try again later.';
+            throw new Error('Timed out waiting for the PDF report');
+          }
+          await new Promise((resolve) => setTimeout(resolve, PDF_POLL_INTERVAL_MS));
+          const jobResponse = await fetch(`http://localhost:5000${status_url}`, { headers });
+          if (!jobResponse.ok) {
+            throw new Error(`Failed to check the PDF report: ${jobResponse.status}`);
+          }
+          status = (await jobResponse.json()).status;
+        }
+        if (status !== 'done') {
+          throw new Error(`PDF report job ended as ${status}`);
+        }
+        response = await fetch('http://localhost:5000/download/pdf', { method: 'GET', headers });
+      }
 
       if (!response.ok) {
         throw new Error(`Failed to fetch PDF: ${response.status}`);
@@ -94,6 +122,7 @@ const Dashboard = () => {
       link.click();
     } catch (error) {
       console.error('Error downloading PDF:', error);
+      setErrorMessage(failure);
     }
   };
 
@@ -155,6 +184,16 @@ const Dashboard = () => {
           </StyledPaper>
         </Grid>
       </Grid>
+      <Snackbar
+        open={Boolean(errorMessage)}
+        autoHideDuration={6000}
+        onClose={() => setErrorMessage("")}
+        anchorOrigin={{ vertical: 'bottom', horizontal: 'center' }}
+      >
+        <Alert onClose={() => setErrorMessage("")} severity="error" variant="filled">
+          {errorMessage}
+        </Alert>
+      </Snackbar>
     </DashboardContainer>
   );
 };